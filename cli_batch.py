@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+命令行工具 - 无界面批量下载歌词
+每个音乐文件输出一行 JSON 结果到标准输出，日志输出到标准错误
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.library_index import (
+    LibraryIndex, OUTCOME_DOWNLOADED, OUTCOME_NOT_FOUND, OUTCOME_SKIPPED,
+    OUTCOME_NO_METADATA, OUTCOME_ERROR, OUTCOME_TIMEOUT
+)
+from core.async_engine import AsyncLookupEngine, DEFAULT_CONCURRENCY
+from core.lyrics_downloader import LyricsDownloader, RACE_MIN_MATCH, DEFAULT_TOP_K
+from core.music_processor import MusicProcessor
+
+DEFAULT_WORKERS = 4
+
+
+def _start_track(music_file, skip_existing=True, index=None):
+    """
+    查找前的准备: 返回 (result, lrc_path, metadata)
+    不需要查找时 (已有 LRC 或没有元数据) metadata 为 None，result 已带状态
+    """
+    result = {'file': music_file, 'status': None}
+    lrc_path = MusicProcessor.get_lrc_path(music_file)
+
+    if skip_existing and os.path.exists(lrc_path):
+        result['status'] = OUTCOME_SKIPPED
+        return result, lrc_path, None
+
+    if index is not None:
+        metadata = index.get_metadata(music_file)
+    else:
+        metadata = MusicProcessor.extract_metadata(music_file)
+
+    if not metadata:
+        result['status'] = OUTCOME_NO_METADATA
+        return result, lrc_path, None
+
+    result['artist'] = metadata['artist']
+    result['title'] = metadata['title']
+    return result, lrc_path, metadata
+
+
+def _save_winner(result, lrc_path, winner):
+    """写入选中的歌词并设置状态"""
+    if winner:
+        with open(lrc_path, 'w', encoding='utf-8') as f:
+            f.write(winner['full_lyrics'])
+        result['status'] = OUTCOME_DOWNLOADED
+        result['source'] = winner.get('source')
+        result['match_score'] = winner.get('match_score')
+        result['lrc'] = lrc_path
+    elif result['status'] is None:
+        result['status'] = OUTCOME_NOT_FOUND
+
+
+def _finish_track(result, started, index=None):
+    """记录用时并把结果写回索引"""
+    result['elapsed'] = round(time.monotonic() - started, 3)
+    if index is not None:
+        try:
+            index.record_outcome(result['file'], result['status'])
+        except Exception as e:
+            print(f"✗ 无法更新索引 {result['file']}: {e}", file=sys.stderr)
+    return result
+
+
+def _set_error(result, e):
+    result['status'] = OUTCOME_ERROR
+    result['error'] = f"{e.__class__.__name__}: {e}"
+
+
+def best_candidate(candidates, min_match=RACE_MIN_MATCH):
+    """匹配分数达到 min_match 的最佳候选，没有则返回 None"""
+    confident = [c for c in candidates if c.get('match_score', 0) >= min_match]
+    if not confident:
+        return None
+    return max(confident, key=lambda c: (c['match_score'], c.get('score', 0)))
+
+
+def resolve_best(downloader, metadata, top_k, min_match=RACE_MIN_MATCH, deadline=None, force_refresh=False):
+    """
+    两阶段查找 (先搜索所有来源，只获取最好的 top_k 个歌词)，返回最佳候选或 None
+    超过 deadline 秒抛出 TimeoutError，未完成的查找在后台结束
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        future = executor.submit(downloader.resolve_top_candidates, metadata, top_k,
+                                 force_refresh=force_refresh)
+        try:
+            candidates = future.result(timeout=deadline)
+        except FutureTimeoutError:
+            raise TimeoutError(f"no lyrics for '{metadata['artist']} - {metadata['title']}' within {deadline}s")
+    finally:
+        executor.shutdown(wait=False)
+    return best_candidate(candidates, min_match)
+
+
+def process_track(music_file, downloader, skip_existing=True, deadline=None,
+                  min_match=RACE_MIN_MATCH, index=None, force_refresh=False, top_k=None):
+    """
+    为单个音乐文件下载歌词，返回结果字典 (即输出的一行 JSON)
+    force_refresh 忽略以前记录的未找到结果和缓存的响应
+    top_k 为 None 时竞速所有来源，否则用两阶段查找 (见 resolve_best)
+    """
+    started = time.monotonic()
+    result = {'file': music_file, 'status': None}
+
+    try:
+        result, lrc_path, metadata = _start_track(music_file, skip_existing, index)
+        if metadata:
+            try:
+                if top_k:
+                    winner = resolve_best(downloader, metadata, top_k, min_match, deadline, force_refresh)
+                else:
+                    winner = downloader.race_lyrics(metadata, min_match=min_match, timeout=deadline,
+                                                    force_refresh=force_refresh)
+            except TimeoutError:
+                winner = None
+                result['status'] = OUTCOME_TIMEOUT
+            _save_winner(result, lrc_path, winner)
+    except Exception as e:
+        _set_error(result, e)
+
+    return _finish_track(result, started, index)
+
+
+def run_batch(music_files, downloader, out, workers=DEFAULT_WORKERS, skip_existing=True,
+              deadline=None, min_match=RACE_MIN_MATCH, index=None, force_refresh=False, top_k=None):
+    """
+    用线程池处理所有音乐文件，每完成一个就向 out 写一行 JSON
+    music_files 可以是生成器，最多 2 * workers 个文件同时处理
+    返回各状态的计数
+    """
+    counts = {}
+    files = iter(music_files)
+
+    def emit(result):
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit_next():
+            music_file = next(files, None)
+            if music_file is not None:
+                pending.add(executor.submit(process_track, music_file, downloader,
+                                            skip_existing, deadline, min_match, index, force_refresh, top_k))
+
+        pending = set()
+        for _ in range(workers * 2):
+            submit_next()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                submit_next()
+                emit(future.result())
+    return counts
+
+
+def run_batch_async(music_files, engine, out, skip_existing=True, deadline=None,
+                    min_match=RACE_MIN_MATCH, index=None, force_refresh=False):
+    """
+    用 AsyncLookupEngine 在一个事件循环上查找所有音乐文件，每完成一个就向 out 写一行 JSON
+    不需要查找的文件 (已有 LRC、没有元数据) 在读取时直接输出
+    deadline: 每首歌的最长查找秒数，超时记为 timeout
+    返回各状态的计数
+    """
+    counts = {}
+    tracks = {}
+    positions = itertools.count()
+
+    def emit(result):
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+
+    def metadatas():
+        # lookup_many numbers the metadatas it is given; remember which track each one is
+        for music_file in music_files:
+            started = time.monotonic()
+            result = {'file': music_file, 'status': None}
+            try:
+                result, lrc_path, metadata = _start_track(music_file, skip_existing, index)
+            except Exception as e:
+                _set_error(result, e)
+                metadata = None
+            if not metadata:
+                emit(_finish_track(result, started, index))
+                continue
+            tracks[next(positions)] = (result, lrc_path, started)
+            yield metadata
+
+    async def drive():
+        async for position, candidates in engine.lookup_many(metadatas(), force_refresh=force_refresh,
+                                                             timeout=deadline):
+            result, lrc_path, started = tracks.pop(position)
+            if candidates is None:
+                result['status'] = OUTCOME_TIMEOUT
+                emit(_finish_track(result, started, index))
+                continue
+            try:
+                _save_winner(result, lrc_path, best_candidate(candidates, min_match))
+            except Exception as e:
+                _set_error(result, e)
+            emit(_finish_track(result, started, index))
+
+    asyncio.run(drive())
+    return counts
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='无界面批量下载歌词 (JSON Lines 输出)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help='为文件夹中的所有音乐文件下载歌词')
+    batch.add_argument('folder', help='音乐文件夹')
+    batch.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                       help=f'同时处理的文件数 (默认 {DEFAULT_WORKERS})')
+    batch.add_argument('--overwrite', action='store_true', help='覆盖已有的 LRC 文件 (默认跳过)')
+    batch.add_argument('--deadline', type=float, default=None,
+                       help='每首歌的最长查找秒数，超时记为 timeout')
+    batch.add_argument('--min-match', type=int, default=RACE_MIN_MATCH,
+                       help=f'接受歌词的最低匹配分数 0-100 (默认 {RACE_MIN_MATCH})')
+    batch.add_argument('--top-k', type=int, default=None,
+                       help='先搜索所有来源，只获取最好的 N 个歌词再选最佳 (默认竞速所有来源；'
+                            f'--async 模式默认 {DEFAULT_TOP_K})')
+    batch.add_argument('--no-recursive', action='store_true', help='不扫描子文件夹')
+    batch.add_argument('--no-index', action='store_true', help='不使用元数据索引缓存')
+    batch.add_argument('--refresh', action='store_true',
+                       help='重新查询所有来源，忽略以前的未找到记录和缓存的响应')
+    batch.add_argument('--async', dest='use_async', action='store_true',
+                       help='在一个事件循环上查找所有歌曲 (需要 aiohttp，适合大量文件)')
+    batch.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help=f'--async 模式下同时进行的请求数 (默认 {DEFAULT_CONCURRENCY})')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        print(f"✗ 错误: 文件夹不存在 - {args.folder}", file=sys.stderr)
+        sys.exit(1)
+    if args.top_k is not None and args.top_k < 1:
+        print("✗ 错误: --top-k 必须至少为 1", file=sys.stderr)
+        sys.exit(1)
+
+    # Sources log with print(); keep stdout for the JSON stream only
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    index = None
+    if not args.no_index:
+        try:
+            index = LibraryIndex()
+        except Exception as e:
+            print(f"✗ 元数据索引不可用: {e}")
+
+    music_files = MusicProcessor.iter_music_files(args.folder, recursive=not args.no_recursive)
+
+    started = time.monotonic()
+    try:
+        if args.use_async:
+            engine = AsyncLookupEngine(concurrency=max(1, args.concurrency),
+                                       top_k=args.top_k or DEFAULT_TOP_K)
+            counts = run_batch_async(music_files, engine, out, skip_existing=not args.overwrite,
+                                     deadline=args.deadline, min_match=args.min_match, index=index,
+                                     force_refresh=args.refresh)
+        else:
+            counts = run_batch(music_files, LyricsDownloader(), out, workers=max(1, args.workers),
+                               skip_existing=not args.overwrite, deadline=args.deadline,
+                               min_match=args.min_match, index=index, force_refresh=args.refresh,
+                               top_k=args.top_k)
+    except KeyboardInterrupt:
+        print("\n已取消")
+        sys.exit(130)
+    finally:
+        if index is not None:
+            index.close()
+
+    total = sum(counts.values())
+    summary = ', '.join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    print(f"\n完成: {total} 个文件, 用时 {time.monotonic() - started:.1f} 秒 ({summary})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,164 +1,178 @@
 #!/usr/bin/env python3
 """
 命令行元数据检查工具
+可以检查单个文件或整个文件夹；jsonl/csv 格式每个文件输出一条记录到标准输出，
+汇总信息输出到标准错误
 """
 
+import argparse
+import csv
+import json
 import os
 import sys
+import time
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def analyze_file_metadata(file_path):
-    """分析单个文件的元数据"""
-    from core.music_processor import MusicProcessor
-    from mutagen.mp3 import MP3
-    from mutagen.flac import FLAC
-    from mutagen.wave import WAVE
-    
-    filename = os.path.basename(file_path)
-    ext = os.path.splitext(filename)[1].lower()
-    
-    print(f"\n=== 分析文件: {filename} ===")
-    print(f"格式: {ext.upper()}")
-    
-    # 标准提取
-    metadata = MusicProcessor.extract_metadata(file_path)
-    print(f"标准提取结果: {metadata}")
-    
-    # 详细分析
-    try:
-        issues = []
-        raw_data = []
-        artist = ""
-        title = ""
-        
-        if ext == '.mp3':
-            audio = MP3(file_path)
-            if audio.tags:
-                raw_data.append(f"Tags: {list(audio.tags.keys())}")
-                
-                # 检查艺术家
-                if 'TPE1' in audio.tags:
-                    artist_raw = audio.tags['TPE1']
-                    artist = str(artist_raw)
-                    raw_data.append(f"TPE1: {repr(artist_raw)}")
-                elif 'ARTIST' in audio.tags:
-                    artist_raw = audio.tags['ARTIST']
-                    artist = str(artist_raw)
-                    raw_data.append(f"ARTIST: {repr(artist_raw)}")
-                else:
-                    issues.append("缺少艺术家标签")
-                
-                # 检查歌曲名
-                if 'TIT2' in audio.tags:
-                    title_raw = audio.tags['TIT2']
-                    title = str(title_raw)
-                    raw_data.append(f"TIT2: {repr(title_raw)}")
-                elif 'TITLE' in audio.tags:
-                    title_raw = audio.tags['TITLE']
-                    title = str(title_raw)
-                    raw_data.append(f"TITLE: {repr(title_raw)}")
-                else:
-                    issues.append("缺少歌曲名标签")
-            else:
-                issues.append("没有元数据标签")
-                
-        elif ext == '.flac':
-            audio = FLAC(file_path)
-            raw_data.append(f"Tags: {list(audio.keys())}")
-            
-            if 'artist' in audio:
-                artist_raw = audio['artist'][0] if isinstance(audio['artist'], list) else audio['artist']
-                artist = str(artist_raw)
-                raw_data.append(f"ARTIST: {repr(artist_raw)}")
-            else:
-                issues.append("缺少艺术家标签")
-            
-            if 'title' in audio:
-                title_raw = audio['title'][0] if isinstance(audio['title'], list) else audio['title']
-                title = str(title_raw)
-                raw_data.append(f"TITLE: {repr(title_raw)}")
-            else:
-                issues.append("缺少歌曲名标签")
-                
-        elif ext == '.wav':
-            audio = WAVE(file_path)
-            if audio.tags:
-                raw_data.append(f"Tags: {list(audio.tags.keys())}")
-                
-                if 'artist' in audio.tags:
-                    artist_raw = audio.tags['artist'][0] if isinstance(audio.tags['artist'], list) else audio.tags['artist']
-                    artist = str(artist_raw)
-                    raw_data.append(f"ARTIST: {repr(artist_raw)}")
-                else:
-                    issues.append("缺少艺术家标签")
-                
-                if 'title' in audio.tags:
-                    title_raw = audio.tags['title'][0] if isinstance(audio.tags['title'], list) else audio.tags['title']
-                    title = str(title_raw)
-                    raw_data.append(f"TITLE: {repr(title_raw)}")
-                else:
-                    issues.append("缺少歌曲名标签")
-            else:
-                issues.append("没有元数据标签")
-        
-        # 检查常见问题
-        if artist:
-            if isinstance(artist, bytes):
-                issues.append("艺术家为字节类型")
-            if '\x00' in artist:
-                issues.append("艺术家包含空字符")
-            if not artist.strip():
-                issues.append("艺术家为空")
-            if artist != artist.strip():
-                issues.append("艺术家有多余空格")
-        
-        if title:
-            if isinstance(title, bytes):
-                issues.append("歌曲名为字节类型")
-            if '\x00' in title:
-                issues.append("歌曲名包含空字符")
-            if not title.strip():
-                issues.append("歌曲名为空")
-            if title != title.strip():
-                issues.append("歌曲名有多余空格")
-        
-        print(f"艺术家: '{artist}'")
-        print(f"歌曲名: '{title}'")
-        print(f"问题: {'; '.join(issues) if issues else '正常'}")
-        print(f"原始数据: {' | '.join(raw_data)}")
-        
-        return len(issues) == 0
-        
-    except Exception as e:
-        print(f"分析错误: {e}")
+from core.metadata_analysis import analyze_file, analyze_batch, format_issues
+from core.music_processor import MusicProcessor, ORDER_NATIVE
+
+OUTPUT_FORMATS = ('text', 'jsonl', 'csv')
+CSV_FIELDS = ('file', 'format', 'ok', 'artist', 'title', 'issues', 'error', 'raw_data')
+
+def print_analysis(result, out=None):
+    """打印单个文件的分析结果，返回是否正常"""
+    out = out or sys.stdout
+    filename = os.path.basename(result['file'])
+
+    print(f"\n=== 分析文件: {filename} ===", file=out)
+    print(f"格式: .{result['format'].upper()}", file=out)
+    print(f"标准提取结果: {result['metadata']}", file=out)
+
+    if result['error']:
+        print(f"分析错误: {result['error']}", file=out)
         return False
 
-def main():
-    if len(sys.argv) < 2:
-        print("用法: python cli_metadata_check.py <音乐文件路径...>")
-        print("示例: python cli_metadata_check.py song1.mp3 song2.flac")
-        sys.exit(1)
-    
-    print("=== LRC 歌词下载器 - 命令行元数据检查工具 ===")
-    
-    total_files = len(sys.argv) - 1
-    good_files = 0
-    
-    for i, file_path in enumerate(sys.argv[1:], 1):
-        if not os.path.exists(file_path):
-            print(f"错误: 文件不存在 - {file_path}")
+    print(f"艺术家: '{result['artist']}'", file=out)
+    print(f"歌曲名: '{result['title']}'", file=out)
+    print(f"问题: {format_issues(result['issues'])}", file=out)
+    print(f"原始数据: {result['raw_data']}", file=out)
+
+    return not result['issues']
+
+def analyze_file_metadata(file_path):
+    """分析单个文件的元数据 (每个文件只解析一次)"""
+    return print_analysis(analyze_file(file_path))
+
+def iter_input_files(paths, recursive=True, missing=None):
+    """
+    逐个产生要检查的文件: 文件直接产生，文件夹边扫描边产生
+    不存在的路径追加到 missing 列表
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            yield from MusicProcessor.iter_music_files(path, recursive=recursive, order=ORDER_NATIVE)
+        elif os.path.isfile(path):
+            yield path
+        else:
+            print(f"错误: 文件不存在 - {path}", file=sys.stderr)
+            if missing is not None:
+                missing.append(path)
+
+def issue_kind(issue):
+    """问题类别，用于汇总 (去掉 ': ' 之后的具体内容)"""
+    return issue.split(': ', 1)[0]
+
+def to_record(result):
+    """分析结果 -> 一条输出记录"""
+    return {
+        'file': result['file'],
+        'format': result['format'],
+        'ok': not result['issues'],
+        'artist': result['artist'],
+        'title': result['title'],
+        'issues': result['issues'],
+        'error': result['error'],
+        'raw_data': result['raw_data'],
+    }
+
+def run_check(files, out, output_format='jsonl', workers=None, use_processes=False,
+              ordered=False, issues_only=False):
+    """
+    用工作池分析所有文件，每个文件向 out 写一条记录
+    files 可以是生成器，边扫描边分析
+    返回汇总字典: total, ok, problems, errors, issues (类别 -> 文件数), elapsed
+    """
+    started = time.monotonic()
+    summary = {'total': 0, 'ok': 0, 'problems': 0, 'errors': 0, 'issues': {}}
+
+    writer = None
+    if output_format == 'csv':
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+
+    results = analyze_batch(files, ordered=ordered, max_workers=workers, use_processes=use_processes)
+    for result in results:
+        summary['total'] += 1
+        if result['error']:
+            summary['errors'] += 1
+        if result['issues']:
+            summary['problems'] += 1
+            for kind in dict.fromkeys(issue_kind(issue) for issue in result['issues']):
+                summary['issues'][kind] = summary['issues'].get(kind, 0) + 1
+        else:
+            summary['ok'] += 1
+            if issues_only:
+                continue
+
+        if output_format == 'text':
+            print_analysis(result, out)
             continue
-        
-        if analyze_file_metadata(file_path):
-            good_files += 1
-    
-    print(f"\n=== 分析完成 ===")
-    print(f"总文件数: {total_files}")
-    print(f"正常文件: {good_files}")
-    print(f"问题文件: {total_files - good_files}")
+
+        record = to_record(result)
+        if writer is not None:
+            record['issues'] = '; '.join(record['issues'])
+            writer.writerow(record)
+        else:
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    summary['elapsed'] = round(time.monotonic() - started, 3)
+    return summary
+
+def print_summary(summary, out):
+    """打印汇总信息"""
+    elapsed = summary['elapsed']
+    rate = summary['total'] / elapsed if elapsed > 0 else 0
+    print(f"\n=== 分析完成 ===", file=out)
+    print(f"总文件数: {summary['total']} (用时 {elapsed:.1f} 秒, {rate:.0f} 个/秒)", file=out)
+    print(f"正常文件: {summary['ok']}", file=out)
+    print(f"问题文件: {summary['problems']}", file=out)
+    if summary['errors']:
+        print(f"读取错误: {summary['errors']}", file=out)
+    if summary.get('missing'):
+        print(f"不存在的路径: {summary['missing']}", file=out)
+    for kind, count in sorted(summary['issues'].items(), key=lambda item: -item[1]):
+        print(f"  {kind}: {count}", file=out)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='检查音乐文件的元数据标签')
+    parser.add_argument('paths', nargs='+', help='音乐文件或文件夹')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='text',
+                        help='输出格式: text (默认, 便于阅读), jsonl 或 csv (每个文件一条记录)')
+    parser.add_argument('--workers', type=int, default=None, help='同时分析的文件数 (默认按 CPU 数)')
+    parser.add_argument('--processes', action='store_true', help='用多进程代替多线程 (本地磁盘上更快)')
+    parser.add_argument('--issues-only', action='store_true', help='只输出有问题的文件')
+    parser.add_argument('--no-recursive', action='store_true', help='不扫描子文件夹')
+    parser.add_argument('--summary-json', metavar='FILE', help='把汇总信息以 JSON 写入文件')
+    args = parser.parse_args()
+
+    out = sys.stdout
+    if args.format == 'text':
+        print("=== LRC 歌词下载器 - 命令行元数据检查工具 ===")
+    else:
+        # Keep stdout for the records only
+        sys.stdout = sys.stderr
+
+    missing = []
+    files = iter_input_files(args.paths, recursive=not args.no_recursive, missing=missing)
+    try:
+        summary = run_check(files, out, output_format=args.format,
+                            workers=max(1, args.workers) if args.workers else None,
+                            use_processes=args.processes,
+                            ordered=args.format == 'text', issues_only=args.issues_only)
+    except KeyboardInterrupt:
+        print("\n已取消", file=sys.stderr)
+        sys.exit(130)
+    out.flush()
+    summary['missing'] = len(missing)
+
+    print_summary(summary, sys.stdout if args.format == 'text' else sys.stderr)
+    if args.summary_json:
+        with open(args.summary_json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -6,15 +6,92 @@
 
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 
-def show_all_sources_results(artist: str, title: str):
+def _stats_delta(before, after):
+    return {key: after[key] - before[key] for key in after}
+
+
+def query_source(source, artist: str, title: str):
     """
-    从所有源搜索歌词，显示详细结果和日志
+    查询单个源: 先搜索再获取歌词，分别计时并统计请求数和流量
+    返回报告字典: source, hits, candidates, search_time, fetch_time,
+    search (请求统计), fetch (请求统计), error
+    """
+    report = {'source': getattr(source, 'SOURCE_NAME', source.__class__.__name__),
+              'hits': 0, 'candidates': [], 'search_time': 0.0, 'fetch_time': 0.0,
+              'search': None, 'fetch': None, 'error': None}
+    
+    before = source.stats.snapshot()
+    started = time.perf_counter()
+    try:
+        hits = source.search(artist, title)
+        searched = time.perf_counter()
+        after_search = source.stats.snapshot()
+        report['search_time'] = searched - started
+        report['search'] = _stats_delta(before, after_search)
+        report['hits'] = len(hits)
+        
+        report['candidates'] = source.fetch_candidates(hits[:source.CANDIDATE_LIMIT]) if hits else []
+    except Exception as e:
+        report['error'] = f"{e.__class__.__name__}: {e}"
+    finally:
+        # Time and count whatever ran, also when a phase failed
+        now = time.perf_counter()
+        if report['search'] is None:
+            report['search_time'] = now - started
+            report['search'] = _stats_delta(before, source.stats.snapshot())
+        else:
+            report['fetch_time'] = now - searched
+            report['fetch'] = _stats_delta(after_search, source.stats.snapshot())
+    return report
+
+
+def _format_bytes(count: int) -> str:
+    if count >= 1024 * 1024:
+        return f"{count / (1024 * 1024):.1f} MB"
+    if count >= 1024:
+        return f"{count / 1024:.1f} KB"
+    return f"{count} B"
+
+
+def print_timing_table(reports, wall_time: float):
+    """打印每个源的耗时、请求数、流量和候选数"""
+    print(f"\n{'='*100}")
+    print(f"各源性能对比")
+    print(f"{'='*100}")
+    print(f"{'来源':15s} {'搜索耗时':>10s} {'歌词耗时':>10s} {'总耗时':>10s} {'请求数':>8s} {'缓存命中':>8s} {'流量':>10s} {'结果':>6s} {'候选':>6s}")
+    print(f"{'-'*100}")
+    for report in reports:
+        search = report['search'] or {}
+        fetch = report['fetch'] or {}
+        requests_sent = search.get('requests', 0) + fetch.get('requests', 0)
+        failures = search.get('failures', 0) + fetch.get('failures', 0)
+        cache_hits = search.get('cache_hits', 0) + fetch.get('cache_hits', 0)
+        received = search.get('bytes', 0) + fetch.get('bytes', 0)
+        total_time = report['search_time'] + report['fetch_time']
+        requests_text = f"{requests_sent}" + (f" ({failures}✗)" if failures else "")
+        print(f"{report['source']:15s} {report['search_time']:9.2f}s {report['fetch_time']:9.2f}s "
+              f"{total_time:9.2f}s {requests_text:>8s} {cache_hits:8d} {_format_bytes(received):>10s} "
+              f"{report['hits']:6d} {len(report['candidates']):6d}")
+        if report['error']:
+            print(f"{'':15s} ✗ 错误: {report['error']}")
+    
+    slowest = max((r['search_time'] + r['fetch_time'] for r in reports), default=0.0)
+    print(f"{'-'*100}")
+    print(f"并行总耗时: {wall_time:.2f}s (最慢的源: {slowest:.2f}s)")
+
+
+def show_all_sources_results(artist: str, title: str, use_cache: bool = True):
+    """
+    并行查询所有源，显示详细结果、每个源的耗时和请求统计
+    use_cache=False 时绕过响应缓存，测量真实的网络性能
     """
     from core.lrc_sources import ALL_SOURCES
     
@@ -24,59 +101,60 @@ def show_all_sources_results(artist: str, title: str):
     print(f"搜索: {artist} - {title}")
     print("="*100 + "\n")
     
+    sources = [source_class(use_cache=use_cache) for source_class in ALL_SOURCES]
+    
+    # 所有源同时查询; 下面的日志会交错输出，结果按源的顺序显示
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(sources))) as executor:
+        reports = list(executor.map(lambda source: query_source(source, artist, title), sources))
+    wall_time = time.perf_counter() - started
+    
     all_results = []
     
-    # 遍历所有源
-    for source_class in ALL_SOURCES:
-        source = source_class()
-        source_name = source.__class__.__name__
-        
+    for report in reports:
         print(f"\n{'='*100}")
-        print(f"来源: {source_name}")
+        print(f"来源: {report['source']}")
         print(f"{'='*100}")
         
-        try:
-            # 调用 get_lyrics_candidates 获取候选
-            candidates = source.get_lyrics_candidates(artist, title)
+        if report['error']:
+            print(f"✗ 错误: {report['error']}")
+            continue
+        
+        candidates = report['candidates']
+        if not candidates:
+            print(f"✗ 未找到歌词候选")
+            continue
+        
+        print(f"✓ 找到 {len(candidates)} 个候选\n")
+        
+        # 显示每个候选
+        for i, candidate in enumerate(candidates, 1):
+            all_results.append(candidate)
             
-            if not candidates:
-                print(f"✗ 未找到歌词候选")
-                continue
+            artist_found = candidate.get('artist', 'Unknown')
+            title_found = candidate.get('title', 'Unknown')
+            score = candidate.get('score', 0)
+            preview = candidate.get('preview', '')
             
-            print(f"✓ 找到 {len(candidates)} 个候选\n")
+            print(f"[{i}] 匹配分数: {score:3d}")
+            print(f"    艺术家: {artist_found}")
+            print(f"    歌曲名: {title_found}")
+            print(f"    预览:")
             
-            # 显示每个候选
-            for i, candidate in enumerate(candidates, 1):
-                all_results.append(candidate)
-                
-                source_name_cand = candidate.get('source', 'Unknown')
-                artist_found = candidate.get('artist', 'Unknown')
-                title_found = candidate.get('title', 'Unknown')
-                score = candidate.get('score', 0)
-                preview = candidate.get('preview', '')
-                
-                print(f"[{i}] 匹配分数: {score:3d}")
-                print(f"    艺术家: {artist_found}")
-                print(f"    歌曲名: {title_found}")
-                print(f"    预览:")
-                
-                if preview:
-                    for line in preview.split('\n'):
-                        if line.strip():
-                            print(f"      {line}")
-                else:
-                    print(f"      (无预览)")
-                
-                # 显示完整歌词长度
-                full_lyrics = candidate.get('full_lyrics', '')
-                lines_count = len(full_lyrics.split('\n'))
-                print(f"    完整歌词: {lines_count} 行")
-                print()
-        
-        except Exception as e:
-            print(f"✗ 错误: {e}")
-            import traceback
-            traceback.print_exc()
+            if preview:
+                for line in preview.split('\n'):
+                    if line.strip():
+                        print(f"      {line}")
+            else:
+                print(f"      (无预览)")
+            
+            # 显示完整歌词长度
+            full_lyrics = candidate.get('full_lyrics', '')
+            lines_count = len(full_lyrics.split('\n'))
+            print(f"    完整歌词: {lines_count} 行")
+            print()
+    
+    print_timing_table(reports, wall_time)
     
     # 总结
     print(f"\n{'='*100}")
@@ -106,18 +184,21 @@ def show_all_sources_results(artist: str, title: str):
 
 def main():
     """主函数"""
+    args = [arg for arg in sys.argv[1:] if arg != '--no-cache']
     
-    if len(sys.argv) < 3:
-        print("用法: python cli_show_all_sources.py <艺术家> <歌曲名>")
+    if len(args) < 2:
+        print("用法: python cli_show_all_sources.py <艺术家> <歌曲名> [--no-cache]")
+        print("\n选项:")
+        print("  --no-cache  不使用响应缓存，测量真实的网络耗时")
         print("\n示例:")
         print("  python cli_show_all_sources.py 周杰伦 青花瓷")
         print("  python cli_show_all_sources.py 'Ed Sheeran' 'Shape of You'")
         sys.exit(1)
     
-    artist = sys.argv[1]
-    title = sys.argv[2]
+    artist = args[0]
+    title = args[1]
     
-    show_all_sources_results(artist, title)
+    show_all_sources_results(artist, title, use_cache='--no-cache' not in sys.argv[1:])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+命令行工具 - 监视音乐文件夹，自动为新增或修改的音乐文件下载歌词
+"""
+
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.library_index import (
+    LibraryIndex, OUTCOME_DOWNLOADED, OUTCOME_NOT_FOUND, OUTCOME_SKIPPED,
+    OUTCOME_NO_METADATA, OUTCOME_ERROR
+)
+from core.library_watcher import LibraryWatcher, DEFAULT_SETTLE, DEFAULT_POLL_INTERVAL
+from core.lyrics_downloader import LyricsDownloader, DEFAULT_TOP_K
+from core.music_processor import MusicProcessor
+
+
+def process_files(music_files, downloader, index, overwrite=False, force_refresh=False, top_k=DEFAULT_TOP_K):
+    """
+    为一批新增/修改的音乐文件提取元数据并下载歌词
+    每首歌先搜索所有来源，只获取最好的 top_k 个歌词，保存匹配最好的一个
+    force_refresh 忽略以前记录的未找到结果和缓存的响应
+    """
+    metadata_map = index.load_metadata(music_files)
+
+    for music_file in music_files:
+        name = os.path.basename(music_file)
+        lrc_path = MusicProcessor.get_lrc_path(music_file)
+
+        if os.path.exists(lrc_path) and not overwrite:
+            print(f"- 跳过 (已有歌词): {name}")
+            index.record_outcome(music_file, OUTCOME_SKIPPED)
+            continue
+
+        metadata = metadata_map.get(music_file)
+        if not metadata:
+            print(f"✗ 无法提取元数据: {name}")
+            index.record_outcome(music_file, OUTCOME_NO_METADATA)
+            continue
+
+        try:
+            candidates = downloader.resolve_top_candidates(metadata, top_k, force_refresh=force_refresh)
+            if candidates:
+                # Candidates come best match first
+                with open(lrc_path, 'w', encoding='utf-8') as f:
+                    f.write(candidates[0]['full_lyrics'])
+                print(f"✓ 已下载: {metadata['artist']} - {metadata['title']} ({candidates[0]['source']})")
+                index.record_outcome(music_file, OUTCOME_DOWNLOADED)
+            else:
+                print(f"✗ 未找到歌词: {metadata['artist']} - {metadata['title']}")
+                index.record_outcome(music_file, OUTCOME_NOT_FOUND)
+        except Exception as e:
+            print(f"✗ 错误: {name} - {e}")
+            index.record_outcome(music_file, OUTCOME_ERROR)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='监视音乐文件夹，自动为新音乐下载歌词')
+    parser.add_argument('folders', nargs='+', help='要监视的音乐文件夹')
+    parser.add_argument('--poll', action='store_true', help='不使用 inotify，改为定期扫描')
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'定期扫描间隔秒数 (默认 {DEFAULT_POLL_INTERVAL:g})')
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE,
+                        help=f'文件停止变化多少秒后再处理 (默认 {DEFAULT_SETTLE:g})')
+    parser.add_argument('--overwrite', action='store_true', help='覆盖已有的 LRC 文件')
+    parser.add_argument('--refresh', action='store_true',
+                        help='重新查询所有来源，忽略以前的未找到记录和缓存的响应')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help=f'每首歌只获取搜索结果中最好的 N 个歌词 (默认 {DEFAULT_TOP_K})')
+    args = parser.parse_args()
+
+    for folder in args.folders:
+        if not os.path.isdir(folder):
+            print(f"✗ 错误: 文件夹不存在 - {folder}")
+            sys.exit(1)
+    if args.top_k < 1:
+        print("✗ 错误: --top-k 必须至少为 1")
+        sys.exit(1)
+
+    downloader = LyricsDownloader(concurrent=True)
+    index = LibraryIndex()
+    watcher = LibraryWatcher(args.folders, settle=args.settle, poll_interval=args.interval,
+                             use_inotify=not args.poll)
+
+    def on_files(music_files):
+        print(f"\n发现 {len(music_files)} 个新增或修改的音乐文件")
+        process_files(music_files, downloader, index, args.overwrite, args.refresh, args.top_k)
+
+    print("正在监视: " + ", ".join(watcher.roots))
+    print("按 Ctrl+C 停止\n")
+    try:
+        watcher.run(on_files)
+    except KeyboardInterrupt:
+        print("\n已停止监视")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
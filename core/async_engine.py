@@ -0,0 +1,273 @@
+"""
+asyncio engine for running many lyrics lookups on a single thread
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Iterable, AsyncIterator, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from core.lrc_sources import SourceUnavailable
+from core.lyrics_downloader import LyricsDownloader, DEFAULT_TOP_K
+from core.negative_cache import ANY_SOURCE
+
+try:
+    import aiohttp
+except ImportError:  # optional: pip install aiohttp
+    aiohttp = None
+
+DEFAULT_CONCURRENCY = 32
+
+class AsyncHttpClient:
+    """
+    HTTP transport for the async source methods, used as an async context
+    manager. With aiohttp installed all requests are multiplexed on the
+    event loop; without it, the blocking LRCSource._safe_request runs on a
+    bounded thread pool instead. Either way responses go through the
+    source's response cache and per-host rate limiter, and at most
+    `concurrency` requests are in flight.
+    """
+    
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, timeout: float = 15):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._session = None
+        self._executor = None
+        self._semaphore = None
+    
+    async def __aenter__(self) -> 'AsyncHttpClient':
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if aiohttp is not None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    async def request(self, source, method: str, url: str, params: Optional[Dict] = None,
+                      force_refresh: bool = False) -> Optional[requests.Response]:
+        """
+        Make a request on behalf of a source; returns None on failure like
+        _safe_request, and like it skips the cache lookup with force_refresh
+        """
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            if self._session is None:
+                return await loop.run_in_executor(
+                    self._executor, functools.partial(source._safe_request, method, url,
+                                                      force_refresh=force_refresh, params=params)
+                )
+            
+            # The response cache is sqlite; keep its blocking calls off the event loop
+            cache = source.response_cache
+            if cache is not None and not force_refresh:
+                cached = await loop.run_in_executor(None, cache.get, method, url, params)
+                if cached is not None:
+                    source.stats.record(cached, cached=True)
+                    return cached
+            
+            response = await self._send(source, method, url, params)
+            source.stats.record(response)
+            return response
+    
+    async def cache_response(self, source, method: str, url: str, params: Optional[Dict],
+                             response: Optional[requests.Response]) -> None:
+        """Async LRCSource._cache_response; the sqlite write runs off the event loop"""
+        if source.response_cache is None or response is None or getattr(response, 'from_cache', False):
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, source._cache_response, method, url, params, response)
+    
+    async def _send(self, source, method: str, url: str, params: Optional[Dict]) -> Optional[requests.Response]:
+        """aiohttp request with the same SSL fallback and retry policy as the sync path"""
+        max_retries = 2
+        retry_delay = 1.0
+        query = {str(k): str(v) for k, v in (params or {}).items()}
+        headers = dict(source.session.headers)
+        
+        for attempt in range(max_retries):
+            delay = source.rate_limiter.reserve(url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                return await self._fetch(method, url, query, headers, ssl=None)
+            except aiohttp.ClientSSLError:
+                # Fallback to disabled SSL verification if SSL fails; a second
+                # request to the host, so it waits for its own token
+                delay = source.rate_limiter.reserve(url)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    return await self._fetch(method, url, query, headers, ssl=False)
+                except Exception:
+                    return None
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(retry_delay)
+                    continue
+                return None
+            except Exception:
+                return None
+        
+        return None
+    
+    async def _fetch(self, method: str, url: str, query: Dict, headers: Dict, ssl) -> requests.Response:
+        async with self._session.request(method, url, params=query, headers=headers, ssl=ssl) as resp:
+            body = await resp.read()
+            # Hand the sources the same response type as the sync path
+            response = requests.Response()
+            response.status_code = resp.status
+            response._content = body
+            response.headers = CaseInsensitiveDict(resp.headers)
+            response.encoding = resp.charset
+            response.url = str(resp.url)
+            return response
+
+class AsyncLookupEngine:
+    """
+    Resolves lyrics for many tracks concurrently on one event loop, with the
+    same two-phase strategy as LyricsDownloader.resolve_top_candidates:
+    every source is searched, then lyrics are fetched only for the top_k
+    best hits overall. The downloader's sources and negative cache are
+    used, so known misses are skipped and new ones recorded. Per-host
+    pacing comes from the sources' shared rate limiter.
+    """
+    
+    def __init__(self, downloader: Optional[LyricsDownloader] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 max_tracks: Optional[int] = None, top_k: int = DEFAULT_TOP_K):
+        """
+        downloader: supplies the sources and the negative cache (default: a new LyricsDownloader)
+        concurrency: maximum HTTP requests in flight
+        max_tracks: maximum tracks being resolved at once (default: concurrency)
+        top_k: lyric bodies fetched per track
+        """
+        self.downloader = downloader if downloader is not None else LyricsDownloader()
+        self.concurrency = concurrency
+        self.max_tracks = max_tracks or concurrency
+        self.top_k = top_k
+    
+    async def lookup(self, metadata: Dict, client: AsyncHttpClient, force_refresh: bool = False) -> List[Dict]:
+        """Candidates for one track, best match first (at most top_k)"""
+        if not metadata or self.top_k <= 0:
+            return []
+        
+        artist = metadata.get('artist', '').strip()
+        title = metadata.get('title', '').strip()
+        if not artist or not title:
+            return []
+        
+        downloader = self.downloader
+        loop = asyncio.get_running_loop()
+        # The negative cache is sqlite too; keep it off the event loop
+        sources = await loop.run_in_executor(None, self._sources_to_query, artist, title, force_refresh)
+        if sources is None:
+            return []
+        
+        # Phase 1: searches only
+        results = await asyncio.gather(
+            *(source.async_search(artist, title, client, force_refresh=force_refresh) for source in sources),
+            return_exceptions=True,
+        )
+        answered = []
+        for source, result in zip(sources, results):
+            if isinstance(result, Exception):
+                print(f"Error searching {source.__class__.__name__} for '{artist} - {title}': {result}")
+                continue
+            answered.append((source, result))
+        ranked = await loop.run_in_executor(None, downloader._rank_hits, artist, title, answered)
+        
+        # Phase 2: lyric bodies for the global best only, replacing hits
+        # without lyrics up to 2 * top_k requests
+        candidates = []
+        max_fetches = min(len(ranked), self.top_k * 2)
+        position = 0
+        while len(candidates) < self.top_k and position < max_fetches:
+            batch = ranked[position:min(position + self.top_k - len(candidates), max_fetches)]
+            position += len(batch)
+            bodies = await asyncio.gather(
+                *(source.async_fetch_lyrics(hit, client, force_refresh=force_refresh) for source, hit in batch),
+                return_exceptions=True,
+            )
+            for (source, hit), body in zip(batch, bodies):
+                if isinstance(body, SourceUnavailable):
+                    continue
+                if isinstance(body, Exception):
+                    print(f"Error fetching lyrics from {source.__class__.__name__} for '{artist} - {title}': {body}")
+                    continue
+                if body:
+                    candidates.append(source.make_candidate(hit, body))
+        
+        if candidates:
+            await loop.run_in_executor(None, downloader._record_found, artist, title)
+        elif not ranked and len(answered) == len(sources):
+            await loop.run_in_executor(None, downloader._record_miss, artist, title, ANY_SOURCE)
+        return candidates
+    
+    def _sources_to_query(self, artist: str, title: str, force_refresh: bool) -> Optional[List]:
+        """Sources without a recent miss, or None if the track itself is a known miss"""
+        if self.downloader._known_miss(artist, title, ANY_SOURCE, force_refresh):
+            print(f"Skipping '{artist} - {title}': no lyrics found on a previous run")
+            return None
+        return self.downloader._sources_to_query(artist, title, force_refresh)
+    
+    async def lookup_many(self, metadatas: Iterable[Dict], force_refresh: bool = False,
+                          timeout: Optional[float] = None) -> AsyncIterator[Tuple[int, Optional[List[Dict]]]]:
+        """
+        Yield (index, candidates) as tracks finish, with at most max_tracks in flight.
+        force_refresh skips the response cache. With timeout (seconds), a
+        track still unresolved that long after it started is abandoned and
+        yielded with candidates None.
+        """
+        async with AsyncHttpClient(self.concurrency) as client:
+            pending = {}
+            items = iter(enumerate(metadatas))
+            exhausted = False
+            
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_tracks:
+                    try:
+                        index, metadata = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[asyncio.ensure_future(self._lookup_within(metadata, client, force_refresh, timeout))] = index
+                
+                if not pending:
+                    break
+                
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+    
+    async def _lookup_within(self, metadata: Dict, client: AsyncHttpClient, force_refresh: bool,
+                             timeout: Optional[float]) -> Optional[List[Dict]]:
+        if timeout is None:
+            return await self.lookup(metadata, client, force_refresh)
+        try:
+            return await asyncio.wait_for(self.lookup(metadata, client, force_refresh), timeout)
+        except asyncio.TimeoutError:
+            print(f"Lookup for '{metadata.get('artist')} - {metadata.get('title')}' timed out after {timeout}s")
+            return None
+    
+    def run(self, metadatas: Iterable[Dict]) -> List[List[Dict]]:
+        """Blocking driver: resolve every track and return candidates in input order"""
+        async def collect():
+            results = {}
+            async for index, candidates in self.lookup_many(metadatas):
+                results[index] = candidates
+            return [results[index] for index in range(len(results))]
+        
+        return asyncio.run(collect())
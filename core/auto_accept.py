@@ -0,0 +1,78 @@
+"""
+Decide when a lyrics candidate is good enough to save without asking
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# Lowest match_score (0-100) that can be accepted automatically
+DEFAULT_MIN_MATCH = 90
+# How far the best candidate must lead any candidate with different lyrics
+DEFAULT_MIN_MARGIN = 15
+# Line overlap (0-1) at which two candidates count as the same lyrics
+DEFAULT_MIN_AGREEMENT = 0.8
+
+_TAG_RE = re.compile(r'\[[^\]]*\]')
+
+def lyric_lines(lyrics: str) -> set:
+    """Normalized text lines of an LRC body, ignoring timestamps and tags"""
+    lines = set()
+    for line in (lyrics or '').split('\n'):
+        text = ' '.join(_TAG_RE.sub('', line).lower().split())
+        if text:
+            lines.add(text)
+    return lines
+
+def _overlap(lines_a: set, lines_b: set) -> float:
+    if not lines_a or not lines_b:
+        return 0.0
+    return len(lines_a & lines_b) / len(lines_a | lines_b)
+
+def lyric_similarity(a: str, b: str) -> float:
+    """Share of distinct lyric lines two LRC bodies have in common (0-1)"""
+    return _overlap(lyric_lines(a), lyric_lines(b))
+
+class AutoAcceptPolicy:
+    """
+    Picks a candidate to save without user input, or None when the choice
+    is ambiguous. The best candidate by match_score is accepted when it
+    reaches min_match and either
+    - leads every candidate with different lyrics by at least min_margin, or
+    - another source returned the same lyrics (line overlap of at least
+      min_agreement) and nothing with different lyrics scores as high.
+    Candidates with the same lyrics never count against the margin.
+    """
+
+    def __init__(self, min_match: int = DEFAULT_MIN_MATCH, min_margin: int = DEFAULT_MIN_MARGIN,
+                 min_agreement: float = DEFAULT_MIN_AGREEMENT):
+        self.min_match = min_match
+        self.min_margin = min_margin
+        self.min_agreement = min_agreement
+
+    def choose(self, candidates: List[Dict]) -> Optional[Dict]:
+        """Candidate to accept automatically, or None to ask the user"""
+        candidates = [c for c in candidates if c.get('full_lyrics')]
+        if not candidates:
+            return None
+
+        ranked = sorted(candidates, key=lambda c: (c.get('match_score', 0), c.get('score', 0)),
+                        reverse=True)
+        best = ranked[0]
+        best_match = best.get('match_score', 0)
+        if best_match < self.min_match:
+            return None
+
+        best_lines = lyric_lines(best['full_lyrics'])
+        rival_match = 0
+        agreed = False
+        for other in ranked[1:]:
+            if _overlap(best_lines, lyric_lines(other['full_lyrics'])) >= self.min_agreement:
+                if other.get('source') != best.get('source'):
+                    agreed = True
+            else:
+                rival_match = max(rival_match, other.get('match_score', 0))
+
+        margin = best_match - rival_match
+        if margin >= self.min_margin or (agreed and margin > 0):
+            return best
+        return None
@@ -0,0 +1,213 @@
+"""
+Persistent on-disk cache for LRC source HTTP responses
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Seconds a cached response stays fresh, by URL prefix (longest prefix wins).
+# Search results change as catalogues grow; lyric bodies almost never do.
+DEFAULT_TTLS = {
+    'https://music.163.com/api/v1/search/get': 24 * 3600,
+    'https://music.163.com/api/song/lyric': 30 * 24 * 3600,
+    'https://songsearch.kugou.com/song_search_v2': 24 * 3600,
+    'https://www.kugou.com/yy/index.php': 30 * 24 * 3600,
+    'https://c.y.qq.com/soso/fcgi-bin/client_search_cp': 24 * 3600,
+    'https://c.y.qq.com/lyric/fcgi-bin/fcg_query_lyric_new.fcg': 30 * 24 * 3600,
+}
+
+# Endpoints without a TTL entry are not cached
+DEFAULT_TTL = 0
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def default_cache_dir() -> str:
+    """Directory for persistent caches (override with LRC_CACHE_DIR)"""
+    return os.environ.get('LRC_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'lrc_downloader')
+
+class ResponseCache:
+    """
+    Disk-backed HTTP response cache keyed on normalized method + URL + params.
+    Entries expire per endpoint TTL; once the total body size exceeds
+    max_bytes the least recently used entries are evicted.
+    Safe to share between threads and between LRCSource instances.
+    """
+    
+    def __init__(self, path: Optional[str] = None, ttls: Optional[Dict[str, int]] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, default_ttl: int = DEFAULT_TTL):
+        if path is None:
+            path = os.path.join(default_cache_dir(), 'http_cache.sqlite3')
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' key TEXT PRIMARY KEY,'
+                ' status INTEGER NOT NULL,'
+                ' content_type TEXT,'
+                ' encoding TEXT,'
+                ' body BLOB NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' expires REAL NOT NULL,'
+                ' last_access REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)')
+            self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+    
+    @staticmethod
+    def make_key(method: str, url: str, params: Optional[Dict] = None) -> str:
+        """Normalize method, URL and query parameters into a cache key"""
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        if params:
+            query.extend((str(k), str(v)) for k, v in params.items() if v is not None)
+        query.sort()
+        
+        normalized = urlunsplit((
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path or '/',
+            urlencode(query),
+            '',
+        ))
+        return f"{method.upper()} {normalized}"
+    
+    def ttl_for(self, url: str) -> int:
+        """TTL in seconds for a URL, from the longest matching prefix"""
+        best = None
+        for prefix in self.ttls:
+            if url.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self.ttls[best] if best is not None else self.default_ttl
+    
+    def get(self, method: str, url: str, params: Optional[Dict] = None) -> Optional[requests.Response]:
+        """Return a cached response, or None on miss or expiry"""
+        if self.ttl_for(url) <= 0:
+            return None
+        
+        key = self.make_key(method, url, params)
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    'SELECT status, content_type, encoding, body, expires FROM responses WHERE key = ?',
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[4] <= now:
+                    self._delete(key)
+                    return None
+                self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+        except sqlite3.Error as e:
+            print(f"HTTP cache read error: {e}")
+            return None
+        
+        status, content_type, encoding, body, _ = row
+        response = requests.Response()
+        response.status_code = status
+        response._content = bytes(body)
+        response.encoding = encoding
+        response.url = key.split(' ', 1)[1]
+        response.headers = CaseInsensitiveDict({'Content-Type': content_type or ''})
+        response.from_cache = True
+        return response
+    
+    def put(self, method: str, url: str, params: Optional[Dict], response: requests.Response) -> None:
+        """Store a successful response if its endpoint is cacheable"""
+        ttl = self.ttl_for(url)
+        if ttl <= 0 or response.status_code != 200 or not response.content:
+            return
+        
+        key = self.make_key(method, url, params)
+        body = response.content
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._delete(key)
+                self._conn.execute(
+                    'INSERT INTO responses (key, status, content_type, encoding, body, size, expires, last_access)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, response.status_code, response.headers.get('Content-Type'), response.encoding,
+                     sqlite3.Binary(body), len(body), now + ttl, now)
+                )
+                self._total_bytes += len(body)
+                self._evict()
+        except sqlite3.Error as e:
+            print(f"HTTP cache write error: {e}")
+    
+    def clear(self) -> None:
+        """Drop every cached response"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM responses')
+            self._total_bytes = 0
+    
+    def total_bytes(self) -> int:
+        return self._total_bytes
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+    
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._total_bytes -= row[0]
+    
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones, until under max_bytes"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        
+        self._conn.execute('DELETE FROM responses WHERE expires <= ?', (time.time(),))
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                'SELECT key, size FROM responses ORDER BY last_access LIMIT 64'
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._total_bytes -= size
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_cache() -> Optional[ResponseCache]:
+    """
+    Process-wide cache used by all sources by default.
+    Set LRC_HTTP_CACHE=0 to disable caching.
+    """
+    global _shared_cache
+    if os.environ.get('LRC_HTTP_CACHE', '1') == '0':
+        return None
+    
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = ResponseCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"HTTP cache disabled: {e}")
+                return None
+        return _shared_cache
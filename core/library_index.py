@@ -0,0 +1,177 @@
+"""
+Persistent index of a music library: cached metadata and lookup state per file
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, List, Iterable
+
+from core.http_cache import default_cache_dir
+from core.music_processor import MusicProcessor
+from core.scan_rules import ScanRules
+
+# Values for record_outcome()
+OUTCOME_DOWNLOADED = 'downloaded'
+OUTCOME_NOT_FOUND = 'not_found'
+OUTCOME_SKIPPED = 'skipped'
+OUTCOME_NO_METADATA = 'no_metadata'
+OUTCOME_ERROR = 'error'
+OUTCOME_TIMEOUT = 'timeout'
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+class LibraryIndex:
+    """
+    Caches extracted metadata per file path, validated by size and mtime,
+    so reopening a library only re-parses files that changed. Also keeps
+    whether an LRC file exists and the outcome of the last lyrics lookup.
+    Safe to share between the GUI thread and worker threads.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = os.path.join(default_cache_dir(), 'library_index.sqlite3')
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS files ('
+                ' path TEXT PRIMARY KEY,'
+                ' size INTEGER NOT NULL,'
+                ' mtime_ns INTEGER NOT NULL,'
+                ' artist TEXT,'
+                ' title TEXT,'
+                ' format TEXT,'
+                ' has_lrc INTEGER NOT NULL DEFAULT 0,'
+                ' last_outcome TEXT,'
+                ' last_lookup REAL,'
+                ' indexed REAL NOT NULL)'
+            )
+    
+    def scan(self, folder_path: str, recursive: bool = True, rules: Optional[ScanRules] = None) -> List[str]:
+        """
+        List the supported music files under a folder and drop index
+        entries for files under it that no longer exist (or are now excluded)
+        """
+        music_files = MusicProcessor.get_music_files(folder_path, recursive, rules)
+        present = {os.path.abspath(f) for f in music_files}
+        prefix = os.path.join(os.path.abspath(folder_path), '')
+        
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+            stale = [(path,) for (path,) in rows if path not in present]
+            if not recursive:
+                stale = [(path,) for (path,) in stale if os.path.dirname(path) == prefix.rstrip(os.sep)]
+            self._conn.executemany('DELETE FROM files WHERE path = ?', stale)
+        
+        return music_files
+    
+    def get_metadata(self, music_file: str) -> Optional[Dict]:
+        """Metadata for one file, re-extracted only if the file changed"""
+        return self.load_metadata([music_file]).get(music_file)
+    
+    def load_metadata(self, music_files: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Metadata for many files at once (path -> metadata dict or None).
+        Unchanged files come from the index; changed or new files are parsed
+        and written back in a single transaction.
+        """
+        music_files = list(music_files)
+        rows = self._fetch_rows(music_files)
+        
+        result = {}
+        changed = {}
+        for music_file in music_files:
+            try:
+                st = os.stat(music_file)
+            except OSError:
+                result[music_file] = None
+                continue
+            
+            row = rows.get(os.path.abspath(music_file))
+            if row is not None and row['size'] == st.st_size and row['mtime_ns'] == st.st_mtime_ns:
+                result[music_file] = self._row_metadata(row)
+            else:
+                changed[music_file] = st
+        
+        updates = []
+        for music_file, metadata, error in MusicProcessor.extract_metadata_batch(changed, ordered=False):
+            if error:
+                print(f"Error extracting metadata from {music_file}: {error}")
+            result[music_file] = metadata
+            st = changed[music_file]
+            abs_path = os.path.abspath(music_file)
+            updates.append((
+                abs_path, st.st_size, st.st_mtime_ns,
+                metadata.get('artist') if metadata else None,
+                metadata.get('title') if metadata else None,
+                metadata.get('format') if metadata else None,
+                int(os.path.exists(MusicProcessor.get_lrc_path(music_file))),
+                time.time(),
+            ))
+        
+        if updates:
+            with self._lock, self._conn:
+                # Keep the lookup history of files that were merely re-tagged
+                self._conn.executemany(
+                    'INSERT INTO files (path, size, mtime_ns, artist, title, format, has_lrc, indexed)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+                    ' ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns,'
+                    ' artist = excluded.artist, title = excluded.title, format = excluded.format,'
+                    ' has_lrc = excluded.has_lrc, indexed = excluded.indexed',
+                    updates
+                )
+        
+        return result
+    
+    def get_entry(self, music_file: str) -> Optional[Dict]:
+        """Raw index entry (metadata, has_lrc, last_outcome, ...) without validation"""
+        return self._fetch_rows([music_file]).get(os.path.abspath(music_file))
+    
+    def record_outcome(self, music_file: str, outcome: str) -> None:
+        """Store the result of a lyrics lookup and refresh the LRC state"""
+        has_lrc = int(os.path.exists(MusicProcessor.get_lrc_path(music_file)))
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE files SET last_outcome = ?, last_lookup = ?, has_lrc = ? WHERE path = ?',
+                (outcome, time.time(), has_lrc, os.path.abspath(music_file))
+            )
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+    
+    def _fetch_rows(self, music_files: List[str]) -> Dict[str, Dict]:
+        paths = [os.path.abspath(f) for f in music_files]
+        rows = {}
+        with self._lock:
+            for i in range(0, len(paths), _QUERY_CHUNK):
+                chunk = paths[i:i + _QUERY_CHUNK]
+                cursor = self._conn.execute(
+                    'SELECT path, size, mtime_ns, artist, title, format, has_lrc, last_outcome, last_lookup'
+                    f' FROM files WHERE path IN ({",".join("?" * len(chunk))})',
+                    chunk
+                )
+                columns = [d[0] for d in cursor.description]
+                for values in cursor:
+                    row = dict(zip(columns, values))
+                    row['has_lrc'] = bool(row['has_lrc'])
+                    rows[row['path']] = row
+        return rows
+    
+    @staticmethod
+    def _row_metadata(row: Dict) -> Optional[Dict]:
+        if not row['artist'] or not row['title']:
+            return None
+        return {'artist': row['artist'], 'title': row['title'], 'format': row['format']}
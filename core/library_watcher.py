@@ -0,0 +1,314 @@
+"""
+Watch music library folders and report new or modified audio files
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.music_processor import MusicProcessor, SUPPORTED_FORMATS
+from core.scan_rules import ScanRules, DEFAULT_SCAN_RULES
+
+# A file is reported once it has been left alone this long (seconds)
+DEFAULT_SETTLE = 2.0
+# How often the polling backend re-walks the library (seconds)
+DEFAULT_POLL_INTERVAL = 30.0
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct('iIII')
+
+class InotifyBackend:
+    """
+    Linux inotify via libc (no extra dependency). Watches every allowed
+    directory under the roots and reports completed writes, files moved in,
+    and new directories (which are watched as soon as they appear).
+
+    A size/mtime snapshot of the library is kept so that when the kernel
+    queue overflows, a rescan reports only the files that really changed.
+    Directories that cannot be watched once the watch limit is reached
+    are polled instead.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, roots: Iterable[str], rules: ScanRules, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._rules = rules
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: Dict[int, Tuple[str, int]] = {}
+        self._roots = [os.path.abspath(root) for root in roots]
+        self._poll_interval = poll_interval
+        # Subtrees left without watches (ENOSPC), or None
+        self._polled: Optional[PollingBackend] = None
+        try:
+            for root in self._roots:
+                self._watch_tree(root, 0)
+        except OSError:
+            self.close()
+            raise
+        self._snapshot = _take_snapshot(self._roots, rules)
+
+    def _watch_tree(self, path: str, depth: int):
+        """Add watches for a directory and its allowed subdirectories"""
+        stack = [(path, depth)]
+        while stack:
+            directory, level = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    continue
+                # ENOSPC: out of watches (fs.inotify.max_user_watches)
+                raise OSError(err, f"inotify_add_watch {directory}: {os.strerror(err)}")
+            self._dirs[wd] = (directory, level)
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if (entry.is_dir(follow_symlinks=False)
+                                and self._rules.allows_dir(entry.name, level + 1)):
+                            stack.append((entry.path, level + 1))
+            except OSError:
+                continue
+
+    def _add_watches(self, path: str, depth: int):
+        """_watch_tree, polling the subtree instead when out of watches"""
+        try:
+            self._watch_tree(path, depth)
+        except OSError as e:
+            print(f"✗ Cannot watch {path} ({e}), polling it instead")
+            if self._polled is None:
+                self._polled = PollingBackend([path], self._rules, self._poll_interval)
+            else:
+                self._polled.add_root(path)
+
+    def _rescan(self) -> Set[str]:
+        """After a queue overflow: re-add watches and return files that changed"""
+        for root in self._roots:
+            # Adding a watch to a watched directory is a no-op; this picks up
+            # directories created while events were being dropped
+            self._add_watches(root, 0)
+        snapshot = _take_snapshot(self._roots, self._rules)
+        changed = {path for path, sig in snapshot.items() if self._snapshot.get(path) != sig}
+        self._snapshot = snapshot
+        return changed
+
+    def wait(self, timeout: float) -> Tuple[Set[str], Set[str]]:
+        """Block up to timeout; return (touched files, new directories)"""
+        files, dirs = set(), set()
+        if self._polled is not None:
+            files.update(self._polled.poll())
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return files, dirs
+        try:
+            data = os.read(self._fd, 256 * 1024)
+        except BlockingIOError:
+            return files, dirs
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: compare the library against the snapshot
+                print("✗ inotify queue overflowed, rescanning library")
+                files.update(self._rescan())
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or not name:
+                continue
+
+            path = os.path.join(parent[0], name)
+            if mask & IN_ISDIR:
+                if self._rules.allows_dir(name, parent[1] + 1):
+                    self._add_watches(path, parent[1] + 1)
+                    self._snapshot.update(_take_snapshot([path], self._rules))
+                    dirs.add(path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                files.add(path)
+                if _is_music(path, self._rules):
+                    signature = _signature(path)
+                    if signature is not None:
+                        self._snapshot[path] = signature
+        return files, dirs
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+class PollingBackend:
+    """Portable fallback: re-walks the roots and compares size/mtime"""
+
+    name = 'polling'
+
+    def __init__(self, roots: Iterable[str], rules: ScanRules, interval: float = DEFAULT_POLL_INTERVAL):
+        self._roots = [os.path.abspath(root) for root in roots]
+        self._rules = rules
+        self.interval = interval
+        self._snapshot = _take_snapshot(self._roots, rules)
+        self._next_poll = time.monotonic() + interval
+
+    def add_root(self, root: str):
+        """Start polling another directory; its current files are not reported"""
+        root = os.path.abspath(root)
+        if root in self._roots:
+            return
+        self._roots.append(root)
+        self._snapshot.update(_take_snapshot([root], self._rules))
+
+    def poll(self) -> Set[str]:
+        """New or modified files if a poll is due, without blocking"""
+        if time.monotonic() < self._next_poll:
+            return set()
+
+        snapshot = _take_snapshot(self._roots, self._rules)
+        changed = {path for path, sig in snapshot.items() if self._snapshot.get(path) != sig}
+        self._snapshot = snapshot
+        self._next_poll = time.monotonic() + self.interval
+        return changed
+
+    def wait(self, timeout: float) -> Tuple[Set[str], Set[str]]:
+        """Block up to timeout; return (new or modified files, no directories)"""
+        delay = self._next_poll - time.monotonic()
+        if delay > 0:
+            time.sleep(min(delay, max(timeout, 0)))
+            return set(), set()
+        return self.poll(), set()
+
+    def close(self):
+        pass
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def _take_snapshot(roots: Iterable[str], rules: ScanRules) -> Dict[str, Tuple[int, int]]:
+    """(size, mtime) of every music file under the roots"""
+    snapshot = {}
+    for root in roots:
+        for music_file in MusicProcessor.iter_music_files(root, rules=rules):
+            signature = _signature(music_file)
+            if signature is not None:
+                snapshot[music_file] = signature
+    return snapshot
+
+def _is_music(path: str, rules: ScanRules) -> bool:
+    name = os.path.basename(path)
+    return os.path.splitext(name)[1].lower() in SUPPORTED_FORMATS and rules.allows_file(name)
+
+class LibraryWatcher:
+    """
+    Reports audio files that appear or change under the library roots.
+    Existing files are not reported. A file is only reported after its
+    size and mtime stayed the same for `settle` seconds, so albums still
+    being copied or ripped come through once complete, in batches.
+
+    Uses inotify on Linux and falls back to polling elsewhere, or when
+    inotify is unavailable or out of watches.
+    """
+
+    def __init__(self, roots: Iterable[str], rules: Optional[ScanRules] = None,
+                 settle: float = DEFAULT_SETTLE, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 use_inotify: bool = True):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.rules = rules if rules is not None else DEFAULT_SCAN_RULES
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend_name = None
+        self._pending: Dict[str, List] = {}
+        self._stop = threading.Event()
+
+    def _open_backend(self):
+        if self.use_inotify:
+            try:
+                return InotifyBackend(self.roots, self.rules, self.poll_interval)
+            except OSError as e:
+                print(f"✗ inotify unavailable ({e}), falling back to polling")
+        return PollingBackend(self.roots, self.rules, self.poll_interval)
+
+    def _touch(self, path: str, now: float):
+        self._pending[path] = [now + self.settle, _signature(path)]
+
+    def _collect_ready(self, now: float) -> List[str]:
+        ready = []
+        for path, entry in list(self._pending.items()):
+            due, signature = entry
+            if due > now:
+                continue
+            current = _signature(path)
+            if current is None:
+                del self._pending[path]
+            elif current != signature:
+                entry[:] = [now + self.settle, current]
+            else:
+                del self._pending[path]
+                ready.append(path)
+        return sorted(ready)
+
+    def _next_timeout(self, now: float) -> float:
+        if not self._pending:
+            return 0.5
+        due = min(entry[0] for entry in self._pending.values())
+        return min(0.5, max(due - now, 0))
+
+    def run(self, on_files: Callable[[List[str]], None]):
+        """
+        Watch until stop() is called, passing each batch of settled new or
+        modified files to on_files (called from this thread)
+        """
+        backend = self._open_backend()
+        self.backend_name = backend.name
+        try:
+            while not self._stop.is_set():
+                files, dirs = backend.wait(self._next_timeout(time.monotonic()))
+                now = time.monotonic()
+                for directory in dirs:
+                    for music_file in MusicProcessor.iter_music_files(directory, rules=self.rules):
+                        self._touch(music_file, now)
+                for path in files:
+                    if _is_music(path, self.rules):
+                        self._touch(path, now)
+
+                ready = self._collect_ready(now)
+                if ready:
+                    on_files(ready)
+        finally:
+            backend.close()
+
+    def stop(self):
+        """Ask run() to return; safe to call from any thread"""
+        self._stop.set()
@@ -2,19 +2,80 @@
 LRC sources handlers - supports multiple music platforms
 """
 
+import asyncio
 import requests
 import json
 import re
+import threading
 import time
 import base64
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from urllib.parse import quote
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from core.http_cache import ResponseCache, get_shared_cache
+from core.rate_limiter import HostRateLimiter, get_shared_rate_limiter
+
+# Version markers that usually mean "not the original recording";
+# used by the cross-source match score
+MATCH_PENALTY_KEYWORDS = ['翻唱', '伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental', 'karaoke', '卡拉ok', '钢琴版', '吉他版']
+
+class SourceUnavailable(Exception):
+    """
+    A source could not be asked: the request failed, timed out or got a
+    non-200 or unreadable response. Unlike an empty result this says
+    nothing about whether the source has the lyrics.
+    """
+
+class RequestStats:
+    """Thread-safe counters of the requests one source has made"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0      # requests sent over the network
+        self.failures = 0      # network requests that got no response
+        self.cache_hits = 0    # requests answered by the response cache
+        self.bytes = 0         # response body bytes received
+    
+    def record(self, response: Optional[requests.Response], cached: bool = False) -> None:
+        with self._lock:
+            if cached:
+                self.cache_hits += 1
+            else:
+                self.requests += 1
+                if response is None:
+                    self.failures += 1
+                else:
+                    self.bytes += len(response.content or b'')
+    
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {'requests': self.requests, 'failures': self.failures,
+                    'cache_hits': self.cache_hits, 'bytes': self.bytes}
 
 class LRCSource:
     """Base class for LRC sources"""
     
-    def __init__(self):
+    # Name reported in the 'source' field of hits and candidates
+    SOURCE_NAME = 'Unknown'
+    # Number of best search hits whose lyrics are fetched as candidates
+    CANDIDATE_LIMIT = 10
+    # Hits scoring below this (on the source's own scale) are not worth fetching
+    MIN_SCORE = 5
+    # Lyric requests fetched in parallel per candidate search; the rate
+    # limiter still caps what actually reaches each host
+    FETCH_WORKERS = 4
+    # Best search hits get_lyrics tries, in order, before giving up
+    LYRICS_ATTEMPTS = 5
+    
+    def __init__(self, response_cache: Optional[ResponseCache] = None, use_cache: bool = True,
+                 rate_limiter: Optional[HostRateLimiter] = None):
+        """
+        response_cache: cache for search/lyric responses; defaults to the
+        process-wide shared cache. Pass use_cache=False to always hit the network.
+        rate_limiter: per-host limiter for network requests; defaults to the
+        process-wide shared limiter so all sources share each host's budget.
+        """
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36',
@@ -25,6 +86,12 @@ class LRCSource:
         # Enable SSL verification but will fallback to disabled if needed
         self.session.verify = True
         self.timeout = 15
+        if not use_cache:
+            self.response_cache = None
+        else:
+            self.response_cache = response_cache if response_cache is not None else get_shared_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_shared_rate_limiter()
+        self.stats = RequestStats()
     
     @staticmethod
     def _normalize_search_term(text: str) -> str:
@@ -43,24 +110,52 @@ class LRCSource:
         except Exception:
             return text
     
-    def _safe_request(self, method: str, url: str, **kwargs) -> Optional[requests.Response]:
+    def _safe_request(self, method: str, url: str, force_refresh: bool = False,
+                      **kwargs) -> Optional[requests.Response]:
+        """
+        Make a request, answering from the response cache when possible
+        (never with force_refresh). Fresh responses are not stored here:
+        callers pass them to _cache_response once they parsed into
+        something worth keeping.
+        """
+        params = kwargs.get('params')
+        if self.response_cache is not None and not force_refresh:
+            cached = self.response_cache.get(method, url, params)
+            if cached is not None:
+                self.stats.record(cached, cached=True)
+                return cached
+        
+        response = self._send_request(method, url, **kwargs)
+        self.stats.record(response)
+        return response
+    
+    def _cache_response(self, method: str, url: str, params: Optional[Dict],
+                        response: Optional[requests.Response]) -> None:
+        """Store a response that parsed into hits or lyrics"""
+        if self.response_cache is None or response is None or getattr(response, 'from_cache', False):
+            return
+        self.response_cache.put(method, url, params, response)
+    
+    def _send_request(self, method: str, url: str, **kwargs) -> Optional[requests.Response]:
         """Make a request with SSL fallback and retry logic"""
         max_retries = 2
         retry_delay = 1.0
         
         for attempt in range(max_retries):
+            self.rate_limiter.acquire(url)
             try:
                 return self.session.request(method, url, timeout=self.timeout, **kwargs)
             except requests.exceptions.SSLError:
-                # Fallback to disabled SSL verification if SSL fails
-                old_verify = self.session.verify
-                self.session.verify = False
+                # Fallback to disabled SSL verification if SSL fails.
+                # Passed per request so parallel fetches on this session are unaffected.
+                # It is a second request to the host, so it needs its own token.
+                self.rate_limiter.acquire(url)
                 try:
-                    return self.session.request(method, url, timeout=self.timeout, **kwargs)
-                finally:
-                    self.session.verify = old_verify
+                    return self.session.request(method, url, timeout=self.timeout, verify=False, **kwargs)
+                except Exception:
+                    return None
             except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
-                # Retry on timeout/connection errors
+                # Retry on timeout/connection errors, backing off before the retry
                 if attempt < max_retries - 1:
                     time.sleep(retry_delay)
                     continue
@@ -70,840 +165,589 @@ class LRCSource:
         
         return None
     
-    def get_lyrics(self, artist: str, title: str) -> Optional[str]:
-        """Download lyrics for artist and title"""
-        raise NotImplementedError
+    def get_lyrics(self, artist: str, title: str, force_refresh: bool = False) -> Optional[str]:
+        """
+        Download lyrics for artist and title: the lyrics of the best of the
+        first LYRICS_ATTEMPTS search hits that has any.
+        Raises SourceUnavailable if the search failed, or if no lyrics were
+        found and some lyric request failed.
+        force_refresh skips the response cache (here and in the methods below).
+        """
+        hits = self.search(artist, title, force_refresh=force_refresh)
+        failure = None
+        for hit in hits[:self.LYRICS_ATTEMPTS]:
+            if hit['score'] < self.MIN_SCORE or not hit.get('ref'):
+                continue
+            try:
+                print(f"Trying: {hit['artist']} - {hit['title']} (score: {hit['score']})")
+                lyric_content = self.fetch_lyrics(hit, force_refresh=force_refresh)
+            except SourceUnavailable as e:
+                failure = e
+                continue
+            except Exception as e:
+                print(f"  ✗ Error: {e}")
+                continue
+            if lyric_content:
+                return lyric_content
+        
+        if failure is not None:
+            raise failure
+        return None
     
-    def get_lyrics_candidates(self, artist: str, title: str) -> List[Dict]:
+    def get_lyrics_candidates(self, artist: str, title: str, force_refresh: bool = False) -> List[Dict]:
         """
         Get multiple lyrics candidates from this source.
         Returns a list of dicts with: source, artist, title, preview, full_lyrics
+        Raises SourceUnavailable like get_lyrics, also for unexpected errors
+        (e.g. a body that would not parse); an empty list means the source
+        answered and had nothing.
         """
-        raise NotImplementedError
-
-
-class NetEaseSource(LRCSource):
-    """NetEase Music LRC source"""
-    
-    def get_lyrics(self, artist: str, title: str) -> Optional[str]:
         try:
-            # Normalize search terms
-            artist_norm = self._normalize_search_term(artist)
-            title_norm = self._normalize_search_term(title)
-            
-            print(f"\n=== NetEase Music API ===")
-            print(f"Original metadata: ARTIST='{artist}' | TITLE='{title}'")
-            print(f"Normalized search: '{artist_norm} {title_norm}'")
-            
-            # Search for song using the working API endpoint
-            search_url = "https://music.163.com/api/v1/search/get"
-            params = {
-                's': f"{artist_norm} {title_norm}",
-                'type': 1,
-                'limit': 20  # Get more results to find better match
-            }
-            
-            print(f"Search URL: {search_url}")
-            print(f"Search params: {params}")
-            
-            response = self._safe_request('GET', search_url, params=params)
-            if not response or response.status_code != 200:
-                print(f"✗ NetEase search failed (status: {response.status_code if response else 'None'})")
-                return None
-            
-            data = response.json()
-            if not data.get('result', {}).get('songs'):
-                print(f"✗ No songs found in NetEase results")
-                return None
-            
-            # Score all songs and sort by match quality
-            songs = data['result']['songs']
-            scored_songs = []
-            
-            for song in songs:
-                # Check if artist and title match
-                song_name = song.get('name', '').lower()
-                song_artists = song.get('artists', [])
-                song_artist_names = ' '.join([a.get('name', '').lower() for a in song_artists])
-                
-                # Combine song name and artist for better matching
-                song_full_text = f"{song_name} {song_artist_names}".lower()
-                artist_norm_lower = artist_norm.lower()
-                title_norm_lower = title_norm.lower()
-                
-                # Calculate match score
-                score = 0
-                
-                # Exact title match (highest priority)
-                if title_norm_lower == song_name:
-                    score += 20
-                elif title_norm_lower in song_name or song_name in title_norm_lower:
-                    score += 10
-                elif title_norm_lower in song_full_text:
-                    score += 5
-                
-                # Exact artist match - CRITICAL for correct song
-                if artist_norm_lower == song_artist_names:
-                    score += 30  # Higher weight for exact artist match
-                elif artist_norm_lower in song_artist_names:
-                    score += 15
-                elif artist_norm_lower in song_full_text:
-                    score += 8
-                else:
-                    # If artist doesn't match at all, heavily penalize
-                    score -= 10
-                
-                # Check if artist mentioned in song name (original singer credits)
-                if '原唱' in song_name or '原版' in song_name:
-                    # This is often a cover, reduce score
-                    if artist_norm_lower not in song_artist_names:
-                        score -= 5  # It's a cover version
-                    else:
-                        score += 3  # It's marked as original
-                
-                # Penalize covers, remixes, live versions, instrumentals
-                penalty_keywords = ['翻唱', '伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental', 'karaoke', '卡拉OK', '钢琴版', '吉他版']
-                for keyword in penalty_keywords:
-                    if keyword in song_name:
-                        score -= 8
-                
-                scored_songs.append((score, song))
-            
-            # Sort by score descending (highest scores first)
-            scored_songs.sort(key=lambda x: x[0], reverse=True)
+            hits = self.search(artist, title, force_refresh=force_refresh)
+            if not hits:
+                return []
             
-            # Print all scored songs for debugging
-            print(f"\nFound {len(scored_songs)} songs, top 10 scores:")
-            for i, (score, song) in enumerate(scored_songs[:10]):
-                song_name = song.get('name', '')
-                song_artists = song.get('artists', [])
-                artist_names = ', '.join([a.get('name', '') for a in song_artists])
-                print(f"  {i+1}. [{score:3d}] {artist_names} - {song_name}")
+            print(f"Top scores: {[hit['score'] for hit in hits[:5]]}")
             
-            # Try songs in order of match quality
-            print(f"\nAttempting to get lyrics from top matches:")
-            for score, attempt_song in scored_songs[:8]:  # Try top 8 best matches
-                # Skip songs with very low scores (likely not relevant)
-                if score < 5:
-                    continue
-                    
-                try:
-                    song_name = attempt_song.get('name', '')
-                    song_artists = attempt_song.get('artists', [])
-                    artist_names = ', '.join([a.get('name', '') for a in song_artists])
-                    song_id = attempt_song.get('id')
-                    print(f"  Trying song #{song_id}: {artist_names} - {song_name} (score: {score})")
-                    
-                    lyric_url = f"https://music.163.com/api/song/lyric?id={song_id}&lv=1"
-                    print(f"    Lyrics API: {lyric_url}")
-                    lyric_response = self._safe_request('GET', lyric_url)
-                    
-                    if lyric_response and lyric_response.status_code == 200:
-                        lyric_data = lyric_response.json()
-                        lyric_content = lyric_data.get('lrc', {}).get('lyric', '')
-                        if lyric_content and lyric_content.strip():
-                            print(f"    ✓ SUCCESS: Found lyrics for: {artist_names} - {song_name}")
-                            return lyric_content
-                        else:
-                            print(f"    ✗ No lyrics available (empty/null)")
-                except Exception as e:
-                    print(f"    ✗ Error getting lyrics: {e}")
-                    continue
+            # Fetch lyrics for the best matches only
+            return self.fetch_candidates(hits[:self.CANDIDATE_LIMIT], force_refresh=force_refresh)
         
+        except SourceUnavailable:
+            raise
+        except Exception as e:
+            print(f"{self.SOURCE_NAME} error: {e}")
+            raise SourceUnavailable(f"{self.SOURCE_NAME} error: {e}") from e
+    
+    def search(self, artist: str, title: str, force_refresh: bool = False) -> List[Dict]:
+        """
+        Search this source without fetching any lyrics.
+        Returns scored hits (best first) as dicts with:
+        source, artist, title, score, match_score, ref
+        An empty list means the source answered without matches; failures
+        raise SourceUnavailable.
+        """
+        artist_norm, title_norm = self._prepare_search(artist, title)
+        try:
+            search_url, params = self._search_request(artist_norm, title_norm)
+            response = self._safe_request('GET', search_url, force_refresh=force_refresh, params=params)
+            hits = self._hits_from_response(response, artist_norm, title_norm)
+            if hits:
+                self._cache_response('GET', search_url, params, response)
+            return hits
+        except SourceUnavailable:
+            raise
         except Exception as e:
-            print(f"NetEase error: {e}")
+            print(f"{self.SOURCE_NAME} search error: {e}")
+            raise SourceUnavailable(f"{self.SOURCE_NAME} search error: {e}") from e
+    
+    def fetch_lyrics(self, hit: Dict, force_refresh: bool = False) -> Optional[str]:
+        """Fetch the lyrics body for a single search hit (None if it has none; may raise SourceUnavailable)"""
+        if not hit.get('ref'):
+            print(f"  ✗ No song reference for: {hit.get('artist')} - {hit.get('title')}")
+            return None
         
-        return None
+        lyric_url, lyric_params = self._lyric_request(hit)
+        lyric_response = self._safe_request('GET', lyric_url, force_refresh=force_refresh, params=lyric_params)
+        lyric_content = self._lyrics_from_response(lyric_response)
+        if lyric_content:
+            self._cache_response('GET', lyric_url, lyric_params, lyric_response)
+        return lyric_content
+    
+    def _prepare_search(self, artist: str, title: str) -> Tuple[str, str]:
+        artist_norm = self._normalize_search_term(artist)
+        title_norm = self._normalize_search_term(title)
+        
+        print(f"\n=== {self.SOURCE_NAME} API (Search) ===")
+        print(f"Searching for: {artist_norm} {title_norm}")
+        return artist_norm, title_norm
+    
+    def _hits_from_response(self, response: Optional[requests.Response], artist_norm: str, title_norm: str) -> List[Dict]:
+        """Parse, annotate and sort the hits of a search response"""
+        data = self._json_or_unavailable(response, f"{self.SOURCE_NAME} search")
+        hits = self._parse_search(data, artist_norm, title_norm)
+        if not hits:
+            print(f"✗ No songs found in {self.SOURCE_NAME} results")
+            return []
+        
+        print(f"Found {len(hits)} songs in search results")
+        
+        for hit in hits:
+            hit['source'] = self.SOURCE_NAME
+            hit['match_score'] = self.match_score(artist_norm, title_norm, hit['artist'], hit['title'])
+        
+        hits.sort(key=lambda x: x['score'], reverse=True)
+        return hits
     
-    def get_lyrics_candidates(self, artist: str, title: str) -> List[Dict]:
-        """Get multiple lyrics candidates from NetEase Music"""
-        candidates = []
+    def _json_or_unavailable(self, response: Optional[requests.Response], what: str) -> Dict:
+        """
+        Decoded body of a 200 response that is not an API error; anything
+        else raises SourceUnavailable
+        """
+        if response is None or response.status_code != 200:
+            message = f"{what} failed (status: {response.status_code if response is not None else 'None'})"
+            print(f"  ✗ {message}")
+            raise SourceUnavailable(message)
         try:
-            # Normalize search terms
-            artist_norm = self._normalize_search_term(artist)
-            title_norm = self._normalize_search_term(title)
-            
-            print(f"\n=== NetEase Music API (Candidates) ===")
-            print(f"Searching for: {artist_norm} {title_norm}")
-            
-            # Search for song using the working API endpoint
-            search_url = "https://music.163.com/api/v1/search/get"
-            params = {
-                's': f"{artist_norm} {title_norm}",
-                'type': 1,
-                'limit': 20
-            }
-            
-            response = self._safe_request('GET', search_url, params=params)
-            if not response or response.status_code != 200:
-                print(f"✗ NetEase search failed (status: {response.status_code if response else 'None'})")
-                return candidates
-            
             data = response.json()
-            if not data.get('result', {}).get('songs'):
-                print(f"✗ No songs found in NetEase results")
-                return candidates
-            
-            # Score all songs and sort by match quality
-            songs = data['result']['songs']
-            scored_songs = []
-            
-            print(f"Found {len(songs)} songs in search results")
-            
-            for song in songs:
-                song_name = song.get('name', '').lower()
-                song_artists = song.get('artists', [])
-                song_artist_names = ' '.join([a.get('name', '').lower() for a in song_artists])
-                
-                song_full_text = f"{song_name} {song_artist_names}".lower()
-                artist_norm_lower = artist_norm.lower()
-                title_norm_lower = title_norm.lower()
-                
-                # Calculate match score
-                score = 0
-                
-                if title_norm_lower == song_name:
-                    score += 20
-                elif title_norm_lower in song_name or song_name in title_norm_lower:
-                    score += 10
-                elif title_norm_lower in song_full_text:
-                    score += 5
-                
-                if artist_norm_lower == song_artist_names:
-                    score += 30
-                elif artist_norm_lower in song_artist_names:
-                    score += 15
-                elif artist_norm_lower in song_full_text:
-                    score += 8
-                else:
-                    score -= 10
-                
-                if '原唱' in song_name or '原版' in song_name:
-                    if artist_norm_lower not in song_artist_names:
-                        score -= 5
-                    else:
-                        score += 3
-                
-                penalty_keywords = ['翻唱', '伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental', 'karaoke', '卡拉OK', '钢琴版', '吉他版']
-                for keyword in penalty_keywords:
-                    if keyword in song_name:
-                        score -= 8
-                
-                scored_songs.append((score, song))
-            
-            scored_songs.sort(key=lambda x: x[0], reverse=True)
-            
-            print(f"Top scores: {[score for score, _ in scored_songs[:5]]}")
-            
-            # Try top 15 best matches with valid scores
-            for score, attempt_song in scored_songs[:15]:
-                if score < 5:
-                    print(f"Skipping song with score < 5: {score}")
-                    continue
-                
-                try:
-                    song_name = attempt_song.get('name', '')
-                    song_artists = attempt_song.get('artists', [])
-                    artist_names = ', '.join([a.get('name', '') for a in song_artists])
-                    song_id = attempt_song.get('id')
-                    
-                    print(f"Trying: {artist_names} - {song_name} (score: {score})")
-                    
-                    lyric_url = f"https://music.163.com/api/song/lyric?id={song_id}&lv=1"
-                    lyric_response = self._safe_request('GET', lyric_url)
-                    
-                    if lyric_response and lyric_response.status_code == 200:
-                        lyric_data = lyric_response.json()
-                        lyric_content = lyric_data.get('lrc', {}).get('lyric', '')
-                        if lyric_content and lyric_content.strip():
-                            print(f"  ✓ Found lyrics")
-                            # Extract preview (first 3 lines with timestamps)
-                            lines = lyric_content.split('\n')
-                            preview_lines = [line for line in lines[:5] if line.strip().startswith('[')]
-                            preview = '\n'.join(preview_lines[:3])
-                            
-                            candidates.append({
-                                'source': 'NetEase',
-                                'artist': artist_names,
-                                'title': song_name,
-                                'preview': preview,
-                                'full_lyrics': lyric_content,
-                                'score': score
-                            })
-                        else:
-                            print(f"  ✗ No lyrics available")
-                    else:
-                        print(f"  ✗ Lyrics request failed (status: {lyric_response.status_code if lyric_response else 'None'})")
-                except Exception as e:
-                    print(f"  ✗ Error: {e}")
-                    continue
+        except ValueError as e:
+            print(f"  ✗ {what} returned invalid JSON")
+            raise SourceUnavailable(f"{what} returned invalid JSON") from e
+        if not isinstance(data, dict):
+            print(f"  ✗ {what} returned unexpected JSON")
+            raise SourceUnavailable(f"{what} returned unexpected JSON")
         
-        except Exception as e:
-            print(f"NetEase error: {e}")
+        error = self._api_error(data)
+        if error:
+            print(f"  ✗ {what} refused: {error}")
+            raise SourceUnavailable(f"{what} refused: {error}")
+        return data
+    
+    def _lyrics_from_response(self, lyric_response: Optional[requests.Response]) -> Optional[str]:
+        data = self._json_or_unavailable(lyric_response, f"{self.SOURCE_NAME} lyrics request")
+        lyric_content = self._parse_lyrics(data)
+        if lyric_content and lyric_content.strip():
+            print(f"  ✓ Found lyrics")
+            return lyric_content
+        
+        print(f"  ✗ No lyrics available")
+        return None
+    
+    def fetch_candidates(self, hits: List[Dict], force_refresh: bool = False) -> List[Dict]:
+        """
+        Fetch lyrics for the given hits and build candidate dicts, keeping hit order.
+        Up to FETCH_WORKERS lyric requests run in parallel.
+        """
+        usable = []
+        for hit in hits:
+            if hit['score'] < self.MIN_SCORE:
+                print(f"Skipping song with score < {self.MIN_SCORE}: {hit['score']}")
+                continue
+            usable.append(hit)
+        
+        if not usable:
+            return []
+        
+        def fetch(hit):
+            try:
+                print(f"Trying: {hit['artist']} - {hit['title']} (score: {hit['score']})")
+                return self.fetch_lyrics(hit, force_refresh=force_refresh)
+            except SourceUnavailable as e:
+                return e
+            except Exception as e:
+                print(f"  ✗ Error: {e}")
+                return None
         
+        workers = max(1, min(self.FETCH_WORKERS, len(usable)))
+        if workers == 1:
+            results = [fetch(hit) for hit in usable]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(fetch, usable))
+        
+        return self._candidates_from_results(usable, results)
+    
+    def _candidates_from_results(self, hits: List[Dict], results: List) -> List[Dict]:
+        """
+        Candidates for the hits whose lyrics were fetched. results holds the
+        lyrics, None or a SourceUnavailable per hit; if nothing was found and
+        a request failed, that failure is raised instead of returning [].
+        """
+        candidates = [
+            self.make_candidate(hit, lyric_content)
+            for hit, lyric_content in zip(hits, results) if isinstance(lyric_content, str) and lyric_content
+        ]
+        if not candidates:
+            for result in results:
+                if isinstance(result, SourceUnavailable):
+                    raise result
         return candidates
-
-
-class KuGouSource(LRCSource):
-    """KuGou Music LRC source"""
     
-    def get_lyrics(self, artist: str, title: str) -> Optional[str]:
+    async def async_search(self, artist: str, title: str, client, force_refresh: bool = False) -> List[Dict]:
+        """Async variant of search(); client is a core.async_engine.AsyncHttpClient"""
+        artist_norm, title_norm = self._prepare_search(artist, title)
         try:
-            # Normalize search terms
-            artist_norm = self._normalize_search_term(artist)
-            title_norm = self._normalize_search_term(title)
-            
-            print(f"\n=== KuGou Music API ===")
-            print(f"Original metadata: ARTIST='{artist}' | TITLE='{title}'")
-            print(f"Normalized search: '{artist_norm} {title_norm}'")
-            
-            # Search for songs first
-            search_url = "https://songsearch.kugou.com/song_search_v2"
-            params = {
-                'keyword': f"{artist_norm} {title_norm}",
-                'page': 1,
-                'pagesize': 20
-            }
-            
-            print(f"Search URL: {search_url}")
-            print(f"Search params: {params}")
-            
-            response = self._safe_request('GET', search_url, params=params)
-            if not response or response.status_code != 200:
-                print(f"✗ KuGou search failed (status: {response.status_code if response else 'None'})")
-                return None
-            
-            data = response.json()
-            if not data.get('data') or not data['data'].get('lists'):
-                print(f"✗ No songs found in KuGou results")
-                return None
-            
-            songs = data['data']['lists']
-            if not songs:
+            search_url, params = self._search_request(artist_norm, title_norm)
+            response = await client.request(self, 'GET', search_url, params=params, force_refresh=force_refresh)
+            hits = self._hits_from_response(response, artist_norm, title_norm)
+            if hits:
+                await client.cache_response(self, 'GET', search_url, params, response)
+            return hits
+        except SourceUnavailable:
+            raise
+        except Exception as e:
+            print(f"{self.SOURCE_NAME} search error: {e}")
+            raise SourceUnavailable(f"{self.SOURCE_NAME} search error: {e}") from e
+    
+    async def async_fetch_lyrics(self, hit: Dict, client, force_refresh: bool = False) -> Optional[str]:
+        """Async variant of fetch_lyrics()"""
+        if not hit.get('ref'):
+            print(f"  ✗ No song reference for: {hit.get('artist')} - {hit.get('title')}")
+            return None
+        
+        lyric_url, lyric_params = self._lyric_request(hit)
+        lyric_response = await client.request(self, 'GET', lyric_url, params=lyric_params,
+                                              force_refresh=force_refresh)
+        lyric_content = self._lyrics_from_response(lyric_response)
+        if lyric_content:
+            await client.cache_response(self, 'GET', lyric_url, lyric_params, lyric_response)
+        return lyric_content
+    
+    async def async_fetch_candidates(self, hits: List[Dict], client, force_refresh: bool = False) -> List[Dict]:
+        """Async variant of fetch_candidates(); lyric requests run concurrently, order is kept"""
+        async def fetch(hit):
+            try:
+                return await self.async_fetch_lyrics(hit, client, force_refresh=force_refresh)
+            except SourceUnavailable as e:
+                return e
+            except Exception as e:
+                print(f"  ✗ Error: {e}")
                 return None
-            
-            # Score and sort songs
-            scored_songs = []
-            artist_norm_lower = artist_norm.lower()
-            title_norm_lower = title_norm.lower()
-            
-            for song in songs:
-                song_name = song.get('SongName', '').lower()
-                song_artist = song.get('SingerName', '').lower()
-                
-                score = 0
-                
-                # Exact matches
-                if title_norm_lower == song_name:
-                    score += 20
-                elif title_norm_lower in song_name or song_name in title_norm_lower:
-                    score += 10
-                
-                if artist_norm_lower == song_artist:
-                    score += 20
-                elif artist_norm_lower in song_artist or song_artist in artist_norm_lower:
-                    score += 10
-                
-                # Penalize unwanted versions
-                penalty_keywords = ['伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental']
-                for keyword in penalty_keywords:
-                    if keyword in song_name:
-                        score -= 5
-                
-                scored_songs.append((score, song))
-            
-            scored_songs.sort(key=lambda x: x[0], reverse=True)
-            
-            # Print all scored songs for debugging
-            print(f"\nFound {len(scored_songs)} songs, top 5 scores:")
-            for i, (score, song) in enumerate(scored_songs[:5]):
-                song_name = song.get('SongName', '')
-                song_artist = song.get('SingerName', '')
-                print(f"  {i+1}. [{score:3d}] {song_artist} - {song_name}")
-            
-            # Try top matches
-            print(f"\nAttempting to get lyrics from top matches:")
-            for score, song in scored_songs[:5]:
-                if score < 5:
-                    continue
-                
-                try:
-                    file_hash = song.get('FileHash') or song.get('Hash')
-                    if not file_hash:
-                        continue
-                    
-                    song_name = song.get('SongName', '')
-                    song_artist = song.get('SingerName', '')
-                    print(f"  Trying: {song_artist} - {song_name} (score: {score})")
-                    
-                    # Get lyrics using hash
-                    lyric_url = "https://www.kugou.com/yy/index.php"
-                    lyric_params = {
-                        'r': 'play/getdata',
-                        'hash': file_hash
-                    }
-                    
-                    print(f"    Lyrics API: {lyric_url}?r={lyric_params['r']}&hash={file_hash[:8]}...")
-                    lyric_response = self._safe_request('GET', lyric_url, params=lyric_params)
-                    if lyric_response and lyric_response.status_code == 200:
-                        lyric_data = lyric_response.json()
-                        if lyric_data.get('data') and lyric_data['data'].get('lyrics'):
-                            content = lyric_data['data']['lyrics']
-                            if content.strip().startswith('['):
-                                print(f"    ✓ SUCCESS: Found KuGou lyrics for: {song_artist} - {song_name}")
-                                return content
-                            else:
-                                print(f"    ✗ Not in LRC format")
-                        else:
-                            print(f"    ✗ No lyrics available")
-                except Exception as e:
-                    print(f"    ✗ Error: {e}")
-                    continue
         
+        usable = [hit for hit in hits if hit['score'] >= self.MIN_SCORE]
+        results = await asyncio.gather(*(fetch(hit) for hit in usable))
+        return self._candidates_from_results(usable, results)
+    
+    async def async_get_lyrics_candidates(self, artist: str, title: str, client,
+                                          force_refresh: bool = False) -> List[Dict]:
+        """Async variant of get_lyrics_candidates()"""
+        try:
+            hits = await self.async_search(artist, title, client, force_refresh=force_refresh)
+            return await self.async_fetch_candidates(hits[:self.CANDIDATE_LIMIT], client,
+                                                     force_refresh=force_refresh)
+        except SourceUnavailable:
+            raise
         except Exception as e:
-            print(f"KuGou error: {e}")
+            print(f"{self.SOURCE_NAME} error: {e}")
+            raise SourceUnavailable(f"{self.SOURCE_NAME} error: {e}") from e
+    
+    @staticmethod
+    def make_candidate(hit: Dict, lyric_content: str) -> Dict:
+        """Build a candidate dict from a search hit and its lyrics"""
+        # Extract preview (first 3 lines with timestamps)
+        lines = lyric_content.split('\n')
+        preview_lines = [line for line in lines[:5] if line.strip().startswith('[')]
+        preview = '\n'.join(preview_lines[:3])
         
+        return {
+            'source': hit['source'],
+            'artist': hit['artist'],
+            'title': hit['title'],
+            'preview': preview,
+            'full_lyrics': lyric_content,
+            'score': hit['score'],
+            'match_score': hit.get('match_score', 0),
+        }
+    
+    @staticmethod
+    def match_score(artist_norm: str, title_norm: str, hit_artist: str, hit_title: str) -> int:
+        """
+        Score a search hit on a 0-100 scale shared by all sources,
+        so hits from different sources can be ranked against each other.
+        Each source's own 'score' stays on its native scale.
+        """
+        artist_q = artist_norm.lower()
+        title_q = title_norm.lower()
+        hit_artist = (hit_artist or '').lower()
+        hit_title = (hit_title or '').lower()
+        
+        score = 0
+        
+        if title_q and title_q == hit_title:
+            score += 50
+        elif title_q and hit_title and (title_q in hit_title or hit_title in title_q):
+            score += 30
+        elif title_q and title_q in f"{hit_title} {hit_artist}":
+            score += 15
+        
+        if artist_q and artist_q == hit_artist:
+            score += 50
+        elif artist_q and hit_artist and (artist_q in hit_artist or hit_artist in artist_q):
+            score += 30
+        elif artist_q and artist_q in hit_title:
+            score += 15
+        
+        for keyword in MATCH_PENALTY_KEYWORDS:
+            if keyword in hit_title and keyword not in title_q:
+                score -= 15
+        
+        return max(0, min(100, score))
+    
+    def _search_request(self, artist_norm: str, title_norm: str) -> Tuple[str, Dict]:
+        """Return (url, params) for the search endpoint"""
+        raise NotImplementedError
+    
+    def _parse_search(self, data: Dict, artist_norm: str, title_norm: str) -> List[Dict]:
+        """Turn a search response into hits with artist, title, score and ref"""
+        raise NotImplementedError
+    
+    def _lyric_request(self, hit: Dict) -> Tuple[str, Dict]:
+        """Return (url, params) for the lyric endpoint of a hit"""
+        raise NotImplementedError
+    
+    def _parse_lyrics(self, data: Dict) -> Optional[str]:
+        """Extract LRC text from a lyric response"""
+        raise NotImplementedError
+    
+    def _api_error(self, data: Dict) -> Optional[str]:
+        """
+        Error reported inside a 200 response body (rate limiting, anti-crawl
+        checks), or None. Such answers say nothing about the song.
+        """
         return None
+
+
+class NetEaseSource(LRCSource):
+    """NetEase Music LRC source"""
     
-    def get_lyrics_candidates(self, artist: str, title: str) -> List[Dict]:
-        """Get multiple lyrics candidates from KuGou Music"""
-        candidates = []
-        try:
-            # Normalize search terms
-            artist_norm = self._normalize_search_term(artist)
-            title_norm = self._normalize_search_term(title)
-            
-            print(f"\n=== KuGou Music API (Candidates) ===")
-            print(f"Searching for: {artist_norm} {title_norm}")
-            
-            # Search for songs
-            search_url = "https://songsearch.kugou.com/song_search_v2"
-            params = {
-                'keyword': f"{artist_norm} {title_norm}",
-                'page': 1,
-                'pagesize': 20
-            }
-            
-            response = self._safe_request('GET', search_url, params=params)
-            if not response or response.status_code != 200:
-                print(f"✗ KuGou search failed (status: {response.status_code if response else 'None'})")
-                return candidates
-            
-            data = response.json()
-            if not data.get('data') or not data['data'].get('lists'):
-                print(f"✗ No songs found in KuGou results")
-                return candidates
-            
-            songs = data['data']['lists']
-            if not songs:
-                print(f"✗ Empty results list")
-                return candidates
-            
-            print(f"Found {len(songs)} songs in search results")
-            
-            # Score and sort songs
-            scored_songs = []
-            artist_norm_lower = artist_norm.lower()
-            title_norm_lower = title_norm.lower()
-            
-            for song in songs:
-                song_name = song.get('SongName', '').lower()
-                song_artist = song.get('SingerName', '').lower()
-                
-                score = 0
-                
-                if title_norm_lower == song_name:
-                    score += 20
-                elif title_norm_lower in song_name or song_name in title_norm_lower:
-                    score += 10
-                
-                if artist_norm_lower == song_artist:
-                    score += 20
-                elif artist_norm_lower in song_artist or song_artist in artist_norm_lower:
-                    score += 10
-                
-                penalty_keywords = ['伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental']
-                for keyword in penalty_keywords:
-                    if keyword in song_name:
-                        score -= 5
-                
-                scored_songs.append((score, song))
-            
-            scored_songs.sort(key=lambda x: x[0], reverse=True)
-            
-            print(f"Top scores: {[score for score, _ in scored_songs[:5]]}")
-            
-            # Try top 10 best matches
-            for score, song in scored_songs[:10]:
-                if score < 5:
-                    print(f"Skipping song with score < 5: {score}")
-                    continue
-                
-                try:
-                    file_hash = song.get('FileHash') or song.get('Hash')
-                    if not file_hash:
-                        print(f"No hash found for song")
-                        continue
-                    
-                    song_name = song.get('SongName', '')
-                    song_artist = song.get('SingerName', '')
-                    
-                    print(f"Trying: {song_artist} - {song_name} (score: {score})")
-                    
-                    # Get lyrics
-                    lyric_url = "https://www.kugou.com/yy/index.php"
-                    lyric_params = {
-                        'r': 'play/getdata',
-                        'hash': file_hash
-                    }
-                    
-                    lyric_response = self._safe_request('GET', lyric_url, params=lyric_params)
-                    if lyric_response and lyric_response.status_code == 200:
-                        lyric_data = lyric_response.json()
-                        if lyric_data.get('data') and lyric_data['data'].get('lyrics'):
-                            content = lyric_data['data']['lyrics']
-                            if content.strip().startswith('['):
-                                print(f"  ✓ Found lyrics")
-                                # Extract preview
-                                lines = content.split('\n')
-                                preview_lines = [line for line in lines[:5] if line.strip().startswith('[')]
-                                preview = '\n'.join(preview_lines[:3])
-                                
-                                candidates.append({
-                                    'source': 'KuGou',
-                                    'artist': song_artist,
-                                    'title': song_name,
-                                    'preview': preview,
-                                    'full_lyrics': content,
-                                    'score': score
-                                })
-                            else:
-                                print(f"  ✗ Not in LRC format")
-                        else:
-                            print(f"  ✗ No lyrics available")
-                    else:
-                        print(f"  ✗ Lyrics request failed (status: {lyric_response.status_code if lyric_response else 'None'})")
-                except Exception as e:
-                    print(f"  ✗ Error: {e}")
-                    continue
+    SOURCE_NAME = 'NetEase'
+    CANDIDATE_LIMIT = 15
+    LYRICS_ATTEMPTS = 8
+    
+    def _search_request(self, artist_norm: str, title_norm: str) -> Tuple[str, Dict]:
+        search_url = "https://music.163.com/api/v1/search/get"
+        params = {
+            's': f"{artist_norm} {title_norm}",
+            'type': 1,
+            'limit': 20
+        }
+        return search_url, params
+    
+    def _parse_search(self, data: Dict, artist_norm: str, title_norm: str) -> List[Dict]:
+        songs = data.get('result', {}).get('songs') or []
+        hits = []
         
-        except Exception as e:
-            print(f"KuGou error: {e}")
+        artist_norm_lower = artist_norm.lower()
+        title_norm_lower = title_norm.lower()
         
-        return candidates
+        for song in songs:
+            song_name = song.get('name', '').lower()
+            song_artists = song.get('artists', [])
+            song_artist_names = ' '.join([a.get('name', '').lower() for a in song_artists])
+            
+            song_full_text = f"{song_name} {song_artist_names}".lower()
+            
+            # Calculate match score
+            score = 0
+            
+            if title_norm_lower == song_name:
+                score += 20
+            elif title_norm_lower in song_name or song_name in title_norm_lower:
+                score += 10
+            elif title_norm_lower in song_full_text:
+                score += 5
+            
+            if artist_norm_lower == song_artist_names:
+                score += 30
+            elif artist_norm_lower in song_artist_names:
+                score += 15
+            elif artist_norm_lower in song_full_text:
+                score += 8
+            else:
+                score -= 10
+            
+            if '原唱' in song_name or '原版' in song_name:
+                if artist_norm_lower not in song_artist_names:
+                    score -= 5
+                else:
+                    score += 3
+            
+            penalty_keywords = ['翻唱', '伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental', 'karaoke', '卡拉OK', '钢琴版', '吉他版']
+            for keyword in penalty_keywords:
+                if keyword in song_name:
+                    score -= 8
+            
+            hits.append({
+                'artist': ', '.join([a.get('name', '') for a in song_artists]),
+                'title': song.get('name', ''),
+                'score': score,
+                'ref': song.get('id'),
+            })
+        
+        return hits
+    
+    def _lyric_request(self, hit: Dict) -> Tuple[str, Dict]:
+        return "https://music.163.com/api/song/lyric", {'id': hit['ref'], 'lv': 1}
+    
+    def _parse_lyrics(self, data: Dict) -> Optional[str]:
+        return data.get('lrc', {}).get('lyric', '') or None
+    
+    def _api_error(self, data: Dict) -> Optional[str]:
+        # e.g. {"code": -460, "message": "Cheating"} when the crawler check trips
+        code = data.get('code')
+        if code is not None and code != 200:
+            return f"code {code} {data.get('message') or data.get('msg') or ''}".strip()
+        return None
+
+
+class KuGouSource(LRCSource):
+    """KuGou Music LRC source"""
+    
+    SOURCE_NAME = 'KuGou'
+    
+    def _search_request(self, artist_norm: str, title_norm: str) -> Tuple[str, Dict]:
+        search_url = "https://songsearch.kugou.com/song_search_v2"
+        params = {
+            'keyword': f"{artist_norm} {title_norm}",
+            'page': 1,
+            'pagesize': 20
+        }
+        return search_url, params
+    
+    def _parse_search(self, data: Dict, artist_norm: str, title_norm: str) -> List[Dict]:
+        if not data.get('data') or not data['data'].get('lists'):
+            return []
+        
+        hits = []
+        artist_norm_lower = artist_norm.lower()
+        title_norm_lower = title_norm.lower()
+        
+        for song in data['data']['lists']:
+            song_name = song.get('SongName', '').lower()
+            song_artist = song.get('SingerName', '').lower()
+            
+            score = 0
+            
+            if title_norm_lower == song_name:
+                score += 20
+            elif title_norm_lower in song_name or song_name in title_norm_lower:
+                score += 10
+            
+            if artist_norm_lower == song_artist:
+                score += 20
+            elif artist_norm_lower in song_artist or song_artist in artist_norm_lower:
+                score += 10
+            
+            penalty_keywords = ['伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental']
+            for keyword in penalty_keywords:
+                if keyword in song_name:
+                    score -= 5
+            
+            hits.append({
+                'artist': song.get('SingerName', ''),
+                'title': song.get('SongName', ''),
+                'score': score,
+                'ref': song.get('FileHash') or song.get('Hash'),
+            })
+        
+        return hits
+    
+    def _lyric_request(self, hit: Dict) -> Tuple[str, Dict]:
+        lyric_url = "https://www.kugou.com/yy/index.php"
+        lyric_params = {
+            'r': 'play/getdata',
+            'hash': hit['ref']
+        }
+        return lyric_url, lyric_params
+    
+    def _parse_lyrics(self, data: Dict) -> Optional[str]:
+        if not data.get('data') or not data['data'].get('lyrics'):
+            return None
+        
+        content = data['data']['lyrics']
+        if not content.strip().startswith('['):
+            print(f"  ✗ Not in LRC format")
+            return None
+        return content
+    
+    def _api_error(self, data: Dict) -> Optional[str]:
+        # Both endpoints answer {"status": 0, "error": ...} on failure
+        if data.get('status') == 0:
+            return f"status 0 {data.get('error') or data.get('err_code') or ''}".strip()
+        return None
 
 
 class TencentQQSource(LRCSource):
     """Tencent QQ Music LRC source"""
     
-    def get_lyrics(self, artist: str, title: str) -> Optional[str]:
-        try:
-            # Normalize search terms
-            artist_norm = self._normalize_search_term(artist)
-            title_norm = self._normalize_search_term(title)
-            
-            print(f"\n=== QQ Music API ===")
-            print(f"Original metadata: ARTIST='{artist}' | TITLE='{title}'")
-            print(f"Normalized search: '{artist_norm} {title_norm}'")
-            
-            # Using the JSON format endpoint
-            search_url = "https://c.y.qq.com/soso/fcgi-bin/client_search_cp"
-            
-            params = {
-                'aggr': 1,
-                'cr': 1,
-                'flag_qc': 0,
-                'p': 1,
-                'n': 20,
-                'w': f"{artist_norm} {title_norm}",
-                'g_tk': 5381,
-                'format': 'json'
-            }
-            
-            print(f"Search URL: {search_url}")
-            print(f"Search params: {params}")
-            
-            response = self._safe_request('GET', search_url, params=params)
-            if not response or response.status_code != 200:
-                print(f"✗ QQ Music search failed (status: {response.status_code if response else 'None'})")
-                return None
-            
-            data = response.json()
-            
-            if not data.get('data', {}).get('song', {}).get('list'):
-                print(f"✗ No songs found in QQ Music results")
-                return None
-            
-            songs = data['data']['song']['list']
-            if not songs:
-                return None
-            
-            # Score and sort songs
-            scored_songs = []
-            artist_norm_lower = artist_norm.lower()
-            title_norm_lower = title_norm.lower()
-            
-            for song in songs:
-                song_name = song.get('songname', '').lower()
-                song_artists = song.get('singer', [])
-                
-                # Build artist string
-                if isinstance(song_artists, list):
-                    song_artist = ' '.join([s.get('name', '').lower() for s in song_artists])
-                else:
-                    song_artist = str(song_artists).lower()
-                
-                score = 0
-                
-                # Exact matches
-                if title_norm_lower == song_name:
-                    score += 20
-                elif title_norm_lower in song_name or song_name in title_norm_lower:
-                    score += 10
-                
-                if artist_norm_lower == song_artist:
-                    score += 20
-                elif artist_norm_lower in song_artist or song_artist in artist_norm_lower:
-                    score += 10
-                
-                # Penalize unwanted versions
-                penalty_keywords = ['伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental']
-                for keyword in penalty_keywords:
-                    if keyword in song_name:
-                        score -= 5
-                
-                scored_songs.append((score, song))
-            
-            scored_songs.sort(key=lambda x: x[0], reverse=True)
-            
-            # Print all scored songs for debugging
-            print(f"\nFound {len(scored_songs)} songs, top 5 scores:")
-            for i, (score, song) in enumerate(scored_songs[:5]):
-                song_name = song.get('songname', '')
-                song_artists = song.get('singer', [])
-                if isinstance(song_artists, list):
-                    artist_str = ', '.join([s.get('name', '') for s in song_artists])
-                else:
-                    artist_str = str(song_artists)
-                print(f"  {i+1}. [{score:3d}] {artist_str} - {song_name}")
-            
-            # Try top matches
-            print(f"\nAttempting to get lyrics from top matches:")
-            for score, song in scored_songs[:5]:
-                if score < 5:
-                    continue
-                
-                song_mid = song.get('songmid')
-                if not song_mid:
-                    continue
-                
-                try:
-                    song_name = song.get('songname', '')
-                    song_artists = song.get('singer', [])
-                    if isinstance(song_artists, list):
-                        artist_str = ', '.join([s.get('name', '') for s in song_artists])
-                    else:
-                        artist_str = str(song_artists)
-                    
-                    print(f"  Trying: {artist_str} - {song_name} (score: {score})")
-                    
-                    # Get lyrics
-                    lyric_url = f"https://c.y.qq.com/lyric/fcgi-bin/fcg_query_lyric_new.fcg"
-                    lyric_params = {
-                        'songmid': song_mid,
-                        'g_tk': 5381,
-                        'format': 'json'
-                    }
-                    
-                    print(f"    Lyrics API: {lyric_url}?songmid={song_mid}")
-                    lyric_response = self._safe_request('GET', lyric_url, params=lyric_params)
-                    if lyric_response and lyric_response.status_code == 200:
-                        lyric_data = lyric_response.json()
-                        if lyric_data.get('lyric'):
-                            try:
-                                decoded = base64.b64decode(lyric_data['lyric']).decode('utf-8')
-                                if decoded.strip():
-                                    print(f"    ✓ SUCCESS: Found QQ Music lyrics for: {artist_str} - {song_name}")
-                                    return decoded
-                            except:
-                                if lyric_data.get('lyric').strip():
-                                    print(f"    ✓ SUCCESS: Found QQ Music lyrics for: {artist_str} - {song_name}")
-                                    return lyric_data.get('lyric')
-                        else:
-                            print(f"    ✗ No lyrics available")
-                except Exception as e:
-                    print(f"    ✗ Error: {e}")
-                    continue
+    SOURCE_NAME = 'QQ Music'
+    
+    def _search_request(self, artist_norm: str, title_norm: str) -> Tuple[str, Dict]:
+        # Using the JSON format endpoint
+        search_url = "https://c.y.qq.com/soso/fcgi-bin/client_search_cp"
+        params = {
+            'aggr': 1,
+            'cr': 1,
+            'flag_qc': 0,
+            'p': 1,
+            'n': 20,
+            'w': f"{artist_norm} {title_norm}",
+            'g_tk': 5381,
+            'format': 'json'
+        }
+        return search_url, params
+    
+    def _parse_search(self, data: Dict, artist_norm: str, title_norm: str) -> List[Dict]:
+        songs = data.get('data', {}).get('song', {}).get('list') or []
+        hits = []
         
-        except Exception as e:
-            print(f"Tencent QQ error: {e}")
+        artist_norm_lower = artist_norm.lower()
+        title_norm_lower = title_norm.lower()
         
-        return None
+        for song in songs:
+            song_name = song.get('songname', '').lower()
+            song_artists = song.get('singer', [])
+            
+            if isinstance(song_artists, list):
+                song_artist = ' '.join([s.get('name', '').lower() for s in song_artists])
+                artist_str = ', '.join([s.get('name', '') for s in song_artists])
+            else:
+                song_artist = str(song_artists).lower()
+                artist_str = str(song_artists)
+            
+            score = 0
+            
+            if title_norm_lower == song_name:
+                score += 20
+            elif title_norm_lower in song_name or song_name in title_norm_lower:
+                score += 10
+            
+            if artist_norm_lower == song_artist:
+                score += 20
+            elif artist_norm_lower in song_artist or song_artist in artist_norm_lower:
+                score += 10
+            
+            penalty_keywords = ['伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental']
+            for keyword in penalty_keywords:
+                if keyword in song_name:
+                    score -= 5
+            
+            hits.append({
+                'artist': artist_str,
+                'title': song.get('songname', ''),
+                'score': score,
+                'ref': song.get('songmid'),
+            })
+        
+        return hits
     
-    def get_lyrics_candidates(self, artist: str, title: str) -> List[Dict]:
-        """Get multiple lyrics candidates from QQ Music"""
-        candidates = []
-        try:
-            # Normalize search terms
-            artist_norm = self._normalize_search_term(artist)
-            title_norm = self._normalize_search_term(title)
-            
-            print(f"\n=== QQ Music API (Candidates) ===")
-            print(f"Searching for: {artist_norm} {title_norm}")
-            
-            # Using the JSON format endpoint
-            search_url = "https://c.y.qq.com/soso/fcgi-bin/client_search_cp"
-            
-            params = {
-                'aggr': 1,
-                'cr': 1,
-                'flag_qc': 0,
-                'p': 1,
-                'n': 20,
-                'w': f"{artist_norm} {title_norm}",
-                'g_tk': 5381,
-                'format': 'json'
-            }
-            
-            response = self._safe_request('GET', search_url, params=params)
-            if not response or response.status_code != 200:
-                print(f"✗ QQ Music search failed (status: {response.status_code if response else 'None'})")
-                return candidates
-            
-            data = response.json()
-            
-            if not data.get('data', {}).get('song', {}).get('list'):
-                print(f"✗ No songs found in QQ Music results")
-                return candidates
-            
-            songs = data['data']['song']['list']
-            if not songs:
-                print(f"✗ Empty results list")
-                return candidates
-            
-            print(f"Found {len(songs)} songs in search results")
-            
-            # Score and sort songs
-            scored_songs = []
-            artist_norm_lower = artist_norm.lower()
-            title_norm_lower = title_norm.lower()
-            
-            for song in songs:
-                song_name = song.get('songname', '').lower()
-                song_artists = song.get('singer', [])
-                
-                if isinstance(song_artists, list):
-                    song_artist = ' '.join([s.get('name', '').lower() for s in song_artists])
-                else:
-                    song_artist = str(song_artists).lower()
-                
-                score = 0
-                
-                if title_norm_lower == song_name:
-                    score += 20
-                elif title_norm_lower in song_name or song_name in title_norm_lower:
-                    score += 10
-                
-                if artist_norm_lower == song_artist:
-                    score += 20
-                elif artist_norm_lower in song_artist or song_artist in artist_norm_lower:
-                    score += 10
-                
-                penalty_keywords = ['伴奏', '纯音乐', 'cover', 'remix', 'live', 'instrumental']
-                for keyword in penalty_keywords:
-                    if keyword in song_name:
-                        score -= 5
-                
-                scored_songs.append((score, song))
-            
-            scored_songs.sort(key=lambda x: x[0], reverse=True)
-            
-            print(f"Top scores: {[score for score, _ in scored_songs[:5]]}")
-            
-            # Try top 10 best matches
-            for score, song in scored_songs[:10]:
-                if score < 5:
-                    print(f"Skipping song with score < 5: {score}")
-                    continue
-                
-                song_mid = song.get('songmid')
-                if not song_mid:
-                    print(f"No songmid found for song")
-                    continue
-                
-                try:
-                    song_name = song.get('songname', '')
-                    song_artists = song.get('singer', [])
-                    if isinstance(song_artists, list):
-                        artist_str = ', '.join([s.get('name', '') for s in song_artists])
-                    else:
-                        artist_str = str(song_artists)
-                    
-                    print(f"Trying: {artist_str} - {song_name} (score: {score})")
-                    
-                    # Get lyrics
-                    lyric_url = f"https://c.y.qq.com/lyric/fcgi-bin/fcg_query_lyric_new.fcg"
-                    lyric_params = {
-                        'songmid': song_mid,
-                        'g_tk': 5381,
-                        'format': 'json'
-                    }
-                    
-                    lyric_response = self._safe_request('GET', lyric_url, params=lyric_params)
-                    if lyric_response and lyric_response.status_code == 200:
-                        lyric_data = lyric_response.json()
-                        if lyric_data.get('lyric'):
-                            try:
-                                decoded = base64.b64decode(lyric_data['lyric']).decode('utf-8')
-                                if decoded.strip():
-                                    print(f"  ✓ Found lyrics")
-                                    lines = decoded.split('\n')
-                                    preview_lines = [line for line in lines[:5] if line.strip().startswith('[')]
-                                    preview = '\n'.join(preview_lines[:3])
-                                    
-                                    candidates.append({
-                                        'source': 'QQ Music',
-                                        'artist': artist_str,
-                                        'title': song_name,
-                                        'preview': preview,
-                                        'full_lyrics': decoded,
-                                        'score': score
-                                    })
-                                else:
-                                    print(f"  ✗ Decoded lyrics empty")
-                            except Exception as e:
-                                print(f"  ✗ Failed to decode base64: {e}")
-                                if lyric_data.get('lyric').strip():
-                                    lines = lyric_data.get('lyric').split('\n')
-                                    preview_lines = [line for line in lines[:5] if line.strip().startswith('[')]
-                                    preview = '\n'.join(preview_lines[:3])
-                                    
-                                    candidates.append({
-                                        'source': 'QQ Music',
-                                        'artist': artist_str,
-                                        'title': song_name,
-                                        'preview': preview,
-                                        'full_lyrics': lyric_data.get('lyric'),
-                                        'score': score
-                                    })
-                        else:
-                            print(f"  ✗ No lyrics available")
-                    else:
-                        print(f"  ✗ Lyrics request failed (status: {lyric_response.status_code if lyric_response else 'None'})")
-                except Exception as e:
-                    print(f"  ✗ Error: {e}")
-                    continue
+    def _lyric_request(self, hit: Dict) -> Tuple[str, Dict]:
+        lyric_url = "https://c.y.qq.com/lyric/fcgi-bin/fcg_query_lyric_new.fcg"
+        lyric_params = {
+            'songmid': hit['ref'],
+            'g_tk': 5381,
+            'format': 'json'
+        }
+        return lyric_url, lyric_params
+    
+    def _parse_lyrics(self, data: Dict) -> Optional[str]:
+        if not data.get('lyric'):
+            return None
         
+        try:
+            decoded = base64.b64decode(data['lyric']).decode('utf-8')
+            if decoded.strip():
+                return decoded
+            print(f"  ✗ Decoded lyrics empty")
+            return None
         except Exception as e:
-            print(f"QQ Music error: {e}")
-        
-        return candidates
+            print(f"  ✗ Failed to decode base64: {e}")
+            return data['lyric'] if data['lyric'].strip() else None
 
 
 class GeniusSource(LRCSource):
     """Genius.com LRC source - English songs"""
     
-    def get_lyrics(self, artist: str, title: str) -> Optional[str]:
+    def get_lyrics(self, artist: str, title: str, force_refresh: bool = False) -> Optional[str]:
         try:
             # Genius requires authentication, so we use a limited approach
             search_url = f"https://genius.com/api/search/multi?per_page=5&q={quote(title)}"
@@ -931,7 +775,7 @@ class GeniusSource(LRCSource):
 class LyricistSource(LRCSource):
     """Lyricist.com as fallback source"""
     
-    def get_lyrics(self, artist: str, title: str) -> Optional[str]:
+    def get_lyrics(self, artist: str, title: str, force_refresh: bool = False) -> Optional[str]:
         try:
             # Simple lyricist search
             search_url = "https://www.lyricist.com/search"
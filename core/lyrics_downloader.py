@@ -3,9 +3,19 @@ Lyrics downloader from multiple sources
 """
 
 import os
+import threading
 import time
-from typing import Optional, Dict, List
-from core.lrc_sources import ALL_SOURCES
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Optional, Dict, List, Callable, Iterator, Tuple
+from core.lrc_sources import ALL_SOURCES, SourceUnavailable
+from core.http_cache import ResponseCache
+from core.negative_cache import NegativeCache, ANY_SOURCE, get_shared_negative_cache
+
+# Default number of lyric bodies fetched in two-phase resolution
+DEFAULT_TOP_K = 3
+
+# Minimum match_score (0-100) for a race result to win outright
+RACE_MIN_MATCH = 70
 
 class LyricsDownloader:
     """
@@ -13,12 +23,35 @@ class LyricsDownloader:
     Primary sources: NetEase, QQ Music, KuGou
     """
     
-    def __init__(self):
-        self.sources = [source_class() for source_class in ALL_SOURCES]
+    def __init__(self, concurrent: bool = False, top_k: Optional[int] = None,
+                 response_cache: Optional[ResponseCache] = None, use_cache: bool = True,
+                 negative_cache: Optional[NegativeCache] = None, use_negative_cache: bool = True):
+        """
+        concurrent: query all sources in parallel when collecting candidates
+        instead of one after another
+        top_k: if set, get_all_lyrics_candidates uses two-phase resolution
+        and fetches lyrics for only this many hits across all sources
+        response_cache: HTTP cache shared by all sources (default: shared disk cache);
+        use_cache=False disables it
+        negative_cache: record of queries that found nothing (default: shared disk cache);
+        use_negative_cache=False disables it
+        """
+        self.sources = [source_class(response_cache=response_cache, use_cache=use_cache)
+                        for source_class in ALL_SOURCES]
+        self.concurrent = concurrent
+        self.top_k = top_k
+        if not use_negative_cache:
+            self.negative_cache = None
+        else:
+            self.negative_cache = negative_cache if negative_cache is not None else get_shared_negative_cache()
     
-    def download_lyrics(self, metadata: Dict, output_path: str) -> bool:
+    def download_lyrics(self, metadata: Dict, output_path: str, force_refresh: bool = False,
+                        race: bool = False, hedge_delay: Optional[float] = None) -> bool:
         """
         Download lyrics for a song based on metadata
+        force_refresh ignores previously recorded misses and cached responses
+        race queries all sources at once and keeps the first confident result
+        (see race_lyrics) instead of trying sources one by one
         """
         if not metadata:
             return False
@@ -29,28 +62,60 @@ class LyricsDownloader:
         if not artist or not title:
             return False
         
+        if race:
+            try:
+                winner = self.race_lyrics(metadata, hedge_delay=hedge_delay, force_refresh=force_refresh)
+            except TimeoutError:
+                return False
+            if not winner:
+                return False
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(winner['full_lyrics'])
+            return True
+        
+        if self._known_miss(artist, title, ANY_SOURCE, force_refresh):
+            print(f"Skipping '{artist} - {title}': no lyrics found on a previous run")
+            return False
+        
         # Try multiple sources
-        for idx, source in enumerate(self.sources):
+        sources = self._sources_to_query(artist, title, force_refresh)
+        all_answered = True
+        for source in sources:
             try:
-                lrc_content = source.get_lyrics(artist, title)
+                lrc_content = source.get_lyrics(artist, title, force_refresh=force_refresh)
                 if lrc_content and lrc_content.strip():
                     with open(output_path, 'w', encoding='utf-8') as f:
                         f.write(lrc_content)
+                    self._record_found(artist, title)
                     return True
+                self._record_miss(artist, title, source.SOURCE_NAME)
+            except SourceUnavailable as e:
+                all_answered = False
+                print(f"{source.SOURCE_NAME} unavailable for '{artist} - {title}': {e}")
             except Exception as e:
+                all_answered = False
                 print(f"Error downloading from {source.__class__.__name__} for '{artist} - {title}': {e}")
-            
-            # Add delay between source attempts to avoid rate limiting
-            if idx < len(self.sources) - 1:
-                time.sleep(1.0)
         
+        # A failed request is not a miss: only remember it when every source answered
+        if all_answered:
+            self._record_miss(artist, title, ANY_SOURCE)
         return False
     
-    def get_all_lyrics_candidates(self, metadata: Dict) -> List[Dict]:
+    def get_all_lyrics_candidates(self, metadata: Dict, concurrent: Optional[bool] = None,
+                                  force_refresh: bool = False) -> List[Dict]:
         """
         Get lyrics candidates from all sources
         Returns a list of dicts with: source, artist, title, preview, full_lyrics
+        
+        concurrent overrides the downloader-wide setting for this call.
+        When the downloader was created with top_k, this resolves in two
+        phases (see resolve_top_candidates) instead of fetching every hit.
+        force_refresh ignores previously recorded misses and cached responses.
         """
+        if self.top_k:
+            return self.resolve_top_candidates(metadata, self.top_k, concurrent=concurrent,
+                                               force_refresh=force_refresh)
+        
         if not metadata:
             return []
         
@@ -60,21 +125,266 @@ class LyricsDownloader:
         if not artist or not title:
             return []
         
-        all_candidates = []
+        if self._known_miss(artist, title, ANY_SOURCE, force_refresh):
+            print(f"Skipping '{artist} - {title}': no lyrics found on a previous run")
+            return []
         
-        # Collect candidates from all sources
-        for idx, source in enumerate(self.sources):
-            try:
-                candidates = source.get_lyrics_candidates(artist, title)
+        all_candidates = []
+        sources = self._sources_to_query(artist, title, force_refresh)
+        answered = 0
+        for source, candidates in self._run_on_sources(
+                lambda source: source.get_lyrics_candidates(artist, title, force_refresh=force_refresh),
+                concurrent, sources):
+            answered += 1
+            if candidates:
                 all_candidates.extend(candidates)
-            except Exception as e:
-                print(f"Error getting candidates from {source.__class__.__name__} for '{artist} - {title}': {e}")
-            
-            # Add delay between source attempts
-            if idx < len(self.sources) - 1:
-                time.sleep(1.0)
+            else:
+                self._record_miss(artist, title, source.SOURCE_NAME)
+        
+        if all_candidates:
+            self._record_found(artist, title)
+        elif answered == len(sources):
+            self._record_miss(artist, title, ANY_SOURCE)
         
         # Sort by score (descending)
         all_candidates.sort(key=lambda x: x.get('score', 0), reverse=True)
         
         return all_candidates
+    
+    def resolve_top_candidates(self, metadata: Dict, top_k: int = DEFAULT_TOP_K,
+                               concurrent: Optional[bool] = None, force_refresh: bool = False) -> List[Dict]:
+        """
+        Two-phase resolution: search every source first, rank all hits on
+        the shared match_score scale, then fetch lyrics only for the best
+        top_k hits overall. Hits whose lyrics turn out to be unavailable are
+        replaced by the next best, up to 2 * top_k lyric requests in total.
+        """
+        if not metadata or top_k <= 0:
+            return []
+        
+        artist = metadata.get('artist', '').strip()
+        title = metadata.get('title', '').strip()
+        
+        if not artist or not title:
+            return []
+        
+        if self._known_miss(artist, title, ANY_SOURCE, force_refresh):
+            print(f"Skipping '{artist} - {title}': no lyrics found on a previous run")
+            return []
+        
+        # Phase 1: searches only
+        sources = self._sources_to_query(artist, title, force_refresh)
+        answered = list(self._run_on_sources(
+            lambda source: source.search(artist, title, force_refresh=force_refresh), concurrent, sources))
+        ranked = self._rank_hits(artist, title, answered)
+        
+        # Phase 2: lyric bodies for the global best only
+        candidates = []
+        max_fetches = top_k * 2
+        for fetches, (source, hit) in enumerate(ranked):
+            if len(candidates) >= top_k or fetches >= max_fetches:
+                break
+            
+            try:
+                print(f"Trying [{hit['source']}]: {hit['artist']} - {hit['title']} (match: {hit['match_score']})")
+                lyric_content = source.fetch_lyrics(hit, force_refresh=force_refresh)
+                if lyric_content:
+                    candidates.append(source.make_candidate(hit, lyric_content))
+            except SourceUnavailable:
+                continue
+            except Exception as e:
+                print(f"Error fetching lyrics from {source.__class__.__name__} for '{artist} - {title}': {e}")
+        
+        if candidates:
+            self._record_found(artist, title)
+        elif not ranked and len(answered) == len(sources):
+            self._record_miss(artist, title, ANY_SOURCE)
+        
+        return candidates
+    
+    def _rank_hits(self, artist: str, title: str, results: List[Tuple[object, List[Dict]]]) -> List[Tuple[object, Dict]]:
+        """
+        Phase 1 of two-phase resolution: (source, hit) pairs worth fetching
+        from the (source, hits) of every source that answered, best match
+        first. Sources with nothing usable are recorded as misses.
+        """
+        ranked = []
+        for source, hits in results:
+            usable = [hit for hit in hits if hit['score'] >= source.MIN_SCORE and hit.get('ref')]
+            if not usable:
+                self._record_miss(artist, title, source.SOURCE_NAME)
+            ranked.extend((source, hit) for hit in usable)
+        
+        ranked.sort(key=lambda pair: (pair[1]['match_score'], pair[1]['score']), reverse=True)
+        return ranked
+    
+    def race_lyrics(self, metadata: Dict, min_match: int = RACE_MIN_MATCH,
+                    hedge_delay: Optional[float] = None, timeout: Optional[float] = None,
+                    force_refresh: bool = False) -> Optional[Dict]:
+        """
+        Race the sources and return the first candidate whose match_score
+        reaches min_match, or None if no source produces one.
+        
+        All sources start at once. With hedge_delay (seconds), only the
+        primary source (first in ALL_SOURCES order) starts; the others
+        start if it has not produced a winner within that time. Once a
+        winner is found the remaining sources stop before their next lyric
+        request and their results are discarded.
+        Raises TimeoutError if timeout seconds pass without a winner.
+        """
+        if not metadata:
+            return None
+        
+        artist = metadata.get('artist', '').strip()
+        title = metadata.get('title', '').strip()
+        
+        if not artist or not title:
+            return None
+        
+        if self._known_miss(artist, title, ANY_SOURCE, force_refresh):
+            print(f"Skipping '{artist} - {title}': no lyrics found on a previous run")
+            return None
+        
+        sources = self._sources_to_query(artist, title, force_refresh)
+        if not sources:
+            return None
+        
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+        hedge_at = start + hedge_delay if hedge_delay else None
+        cancel = threading.Event()
+        waiting = list(sources)
+        running = {}
+        any_hits = False
+        all_answered = True
+        
+        executor = ThreadPoolExecutor(max_workers=len(sources))
+        try:
+            def launch(count):
+                for source in waiting[:count]:
+                    running[executor.submit(self._race_source, source, artist, title, min_match, cancel,
+                                             force_refresh)] = source
+                del waiting[:count]
+            
+            launch(1 if hedge_at else len(waiting))
+            
+            while running or waiting:
+                now = time.monotonic()
+                # Hedge: start the rest once the primary is late or already done
+                if waiting and (not running or (hedge_at is not None and now >= hedge_at)):
+                    launch(len(waiting))
+                
+                if deadline is not None and now >= deadline:
+                    print(f"Race for '{artist} - {title}' timed out after {timeout}s")
+                    raise TimeoutError(f"no confident lyrics for '{artist} - {title}' within {timeout}s")
+                
+                wake_times = [t for t in (deadline, hedge_at if waiting else None) if t is not None]
+                wait_for = max(0.0, min(wake_times) - now) if wake_times else None
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    source = running.pop(future)
+                    try:
+                        winner, hit_count = future.result()
+                    except Exception as e:
+                        all_answered = False
+                        print(f"Error racing {source.__class__.__name__} for '{artist} - {title}': {e}")
+                        continue
+                    
+                    any_hits = any_hits or hit_count > 0
+                    if winner:
+                        print(f"Race won by {source.SOURCE_NAME} after {time.monotonic() - start:.2f}s "
+                              f"(match: {winner['match_score']})")
+                        self._record_found(artist, title)
+                        return winner
+        finally:
+            cancel.set()
+            executor.shutdown(wait=False)
+        
+        if not any_hits and all_answered:
+            self._record_miss(artist, title, ANY_SOURCE)
+        return None
+    
+    @staticmethod
+    def _race_source(source, artist: str, title: str, min_match: int, cancel: threading.Event,
+                     force_refresh: bool = False) -> Tuple[Optional[Dict], int]:
+        """
+        One racer: search, then fetch lyrics for confident hits, best match
+        first, until one has lyrics. Returns (candidate or None, hit count).
+        """
+        hits = source.search(artist, title, force_refresh=force_refresh)
+        confident = [
+            hit for hit in hits[:source.CANDIDATE_LIMIT]
+            if hit['match_score'] >= min_match and hit['score'] >= source.MIN_SCORE and hit.get('ref')
+        ]
+        confident.sort(key=lambda hit: (hit['match_score'], hit['score']), reverse=True)
+        
+        for hit in confident:
+            if cancel.is_set():
+                break
+            try:
+                lyric_content = source.fetch_lyrics(hit, force_refresh=force_refresh)
+            except SourceUnavailable:
+                continue
+            except Exception as e:
+                # One bad body should not cost this source its remaining hits
+                print(f"Error fetching lyrics from {source.__class__.__name__} for '{artist} - {title}': {e}")
+                continue
+            if lyric_content and not cancel.is_set():
+                return source.make_candidate(hit, lyric_content), len(hits)
+        
+        return None, len(hits)
+    
+    def _run_on_sources(self, action: Callable, concurrent: Optional[bool] = None,
+                        sources: Optional[List] = None) -> Iterator[Tuple[object, object]]:
+        """
+        Call action(source) for every source and yield (source, result) as
+        each one finishes. Errors (including SourceUnavailable) are logged
+        and that source is skipped.
+        """
+        if concurrent is None:
+            concurrent = self.concurrent
+        if sources is None:
+            sources = self.sources
+        
+        # Pacing is handled per host by the sources' rate limiter
+        if not concurrent:
+            for source in sources:
+                try:
+                    yield source, action(source)
+                except Exception as e:
+                    print(f"Error querying {source.__class__.__name__}: {e}")
+            return
+        
+        with ThreadPoolExecutor(max_workers=len(sources) or 1) as executor:
+            futures = {executor.submit(action, source): source for source in sources}
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    yield source, future.result()
+                except Exception as e:
+                    print(f"Error querying {source.__class__.__name__}: {e}")
+    
+    def _sources_to_query(self, artist: str, title: str, force_refresh: bool) -> List:
+        """Sources that have not recently come back empty for this query"""
+        sources = [
+            source for source in self.sources
+            if not self._known_miss(artist, title, source.SOURCE_NAME, force_refresh)
+        ]
+        skipped = len(self.sources) - len(sources)
+        if skipped:
+            print(f"Skipping {skipped} source(s) with a recent miss for '{artist} - {title}'")
+        return sources
+    
+    def _known_miss(self, artist: str, title: str, source: str, force_refresh: bool) -> bool:
+        if force_refresh or self.negative_cache is None:
+            return False
+        return self.negative_cache.is_miss(artist, title, source)
+    
+    def _record_miss(self, artist: str, title: str, source: str) -> None:
+        if self.negative_cache is not None:
+            self.negative_cache.record_miss(artist, title, source)
+    
+    def _record_found(self, artist: str, title: str) -> None:
+        if self.negative_cache is not None:
+            self.negative_cache.clear_miss(artist, title)
@@ -0,0 +1,196 @@
+"""
+Single-pass metadata analysis: one mutagen parse per file yields both the
+clean artist/title used for lyrics search and the list of tag problems
+"""
+
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+from mutagen.flac import FLAC
+from mutagen.id3 import ID3, ID3NoHeaderError
+from mutagen.wave import WAVE
+from core.parallel import bounded_map
+
+ISSUES_OK = '正常'
+
+# Tag keys tried in order for each field; ID3 frames first (MP3 and WAV),
+# then the names used by Vorbis comments and non-standard taggers
+FIELD_KEYS = {
+    'artist': ('TPE1', 'ARTIST', 'artist'),
+    'title': ('TIT2', 'TITLE', 'title'),
+}
+FIELD_LABELS = {'artist': '艺术家', 'title': '歌曲名'}
+
+# (pattern, message) checked against the raw text of every field present.
+# {field} is the field label, {match!r} the first offending text.
+ISSUE_RULES = (
+    (r'\x00', '{field}包含空字符'),
+    (r'[\x01-\x08\x0b\x0c\x0e-\x1f\x7f]', '包含不可见字符: {match!r}'),
+    (r'[\ud800-\udfff]', '编码问题'),
+    (r'^\s|\s$', '{field}有多余空格'),
+)
+
+def _compile_rules(rules):
+    """All rules as one alternation, so each text is scanned once"""
+    combined = '|'.join(f'(?P<r{i}>{pattern})' for i, (pattern, _) in enumerate(rules))
+    return re.compile(combined), {f'r{i}': message for i, (_, message) in enumerate(rules)}
+
+_RULES_RE, _RULE_MESSAGES = _compile_rules(ISSUE_RULES)
+
+def _id3_tags(file_path):
+    # Only the tag is needed, so skip MP3()'s search for the first audio frame
+    try:
+        return ID3(file_path)
+    except ID3NoHeaderError:
+        return None
+
+_TAG_READERS = {
+    '.mp3': _id3_tags,
+    '.flac': lambda file_path: FLAC(file_path).tags,
+    '.wav': lambda file_path: WAVE(file_path).tags,
+}
+
+def clean_metadata_string(text):
+    """Clean and normalize metadata string"""
+    if not text:
+        return None
+
+    try:
+        # Convert to string if needed
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', errors='replace')
+        else:
+            text = str(text)
+
+        # Remove null characters and other problematic characters
+        text = text.replace('\x00', '').strip()
+
+        # Remove multiple consecutive spaces
+        text = ' '.join(text.split())
+
+        return text if text else None
+    except Exception:
+        return None
+
+def _first_value(value):
+    return value[0] if isinstance(value, list) and value else value
+
+def read_tags(file_path: str) -> Optional[Dict]:
+    """
+    Parse a file's tags once with mutagen (may raise).
+    Returns None for unsupported formats, otherwise a dict with
+    'format', 'keys' (tag keys, None when the file has no tags) and
+    'fields': {'artist'/'title': (tag key, raw value) or None}.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    reader = _TAG_READERS.get(ext)
+    if reader is None:
+        return None
+
+    tags = reader(file_path)
+    fields = {}
+    for field, keys in FIELD_KEYS.items():
+        fields[field] = None
+        if tags:
+            for key in keys:
+                if key in tags:
+                    fields[field] = (key, _first_value(tags[key]))
+                    break
+    return {
+        'format': ext[1:],
+        'keys': list(tags.keys()) if tags else None,
+        'fields': fields,
+    }
+
+def tags_to_metadata(tags: Optional[Dict]) -> Optional[Dict]:
+    """Clean {'artist', 'title', 'format'} from read_tags output, or None"""
+    if not tags:
+        return None
+    values = {}
+    for field, entry in tags['fields'].items():
+        values[field] = clean_metadata_string(entry[1]) if entry else None
+    if values['artist'] and values['title']:
+        return {'artist': values['artist'], 'title': values['title'], 'format': tags['format']}
+    return None
+
+def _field_issues(field: str, raw) -> List[str]:
+    label = FIELD_LABELS[field]
+    issues = []
+    if isinstance(raw, bytes):
+        issues.append(f"{label}为字节类型")
+    text = str(raw)
+    if not clean_metadata_string(raw):
+        issues.append(f"{label}为空")
+
+    hits = {}
+    for match in _RULES_RE.finditer(text):
+        hits.setdefault(match.lastgroup, match.group())
+    for name, message in _RULE_MESSAGES.items():
+        if name in hits:
+            issues.append(message.format(field=label, match=hits[name]))
+    return issues
+
+def analyze_file(file_path: str) -> Dict:
+    """
+    Analyse one file with a single parse. Never raises; returns
+    'file', 'format', 'metadata' (same as MusicProcessor.extract_metadata),
+    'artist' and 'title' (raw text, '' when missing), 'issues' (list of
+    messages, empty when the tags are fine), 'raw_data' and 'error'.
+    """
+    result = {
+        'file': file_path,
+        'format': os.path.splitext(file_path)[1][1:].lower(),
+        'metadata': None,
+        'artist': '',
+        'title': '',
+        'issues': [],
+        'raw_data': '',
+        'error': None,
+    }
+
+    try:
+        tags = read_tags(file_path)
+    except Exception as e:
+        result['error'] = f"{e.__class__.__name__}: {e}"
+        result['issues'] = [f"分析错误: {e}"]
+        return result
+    if tags is None:
+        result['issues'] = ["不支持的格式"]
+        return result
+
+    issues = []
+    raw_data = []
+    if tags['keys'] is None:
+        issues.append("没有元数据标签")
+        raw_data.append("No tags found")
+    else:
+        raw_data.append(f"Tags: {tags['keys']}")
+        for field, entry in tags['fields'].items():
+            if entry is None:
+                issues.append(f"缺少{FIELD_LABELS[field]}标签")
+                continue
+            key, raw = entry
+            result[field] = str(raw)
+            raw_data.append(f"{key}: {raw!r}")
+            issues.extend(_field_issues(field, raw))
+
+    result['metadata'] = tags_to_metadata(tags)
+    # Rules like 编码问题 are not field specific; report them once
+    result['issues'] = list(dict.fromkeys(issues))
+    result['raw_data'] = ' | '.join(raw_data)
+    return result
+
+def format_issues(issues: List[str]) -> str:
+    """Issue list as shown in the review table and check tool"""
+    return '; '.join(issues) if issues else ISSUES_OK
+
+def analyze_batch(file_paths: Iterable[str], ordered: bool = True, max_workers: Optional[int] = None,
+                  use_processes: bool = False) -> Iterator[Dict]:
+    """
+    analyze_file over many files on a worker pool, consuming file_paths
+    lazily with a bounded number in flight. ordered=False yields results
+    as they complete; use_processes=True parses on a process pool.
+    """
+    for _, result in bounded_map(analyze_file, file_paths, ordered=ordered,
+                                 max_workers=max_workers, use_processes=use_processes):
+        yield result
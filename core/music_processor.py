@@ -3,54 +3,137 @@ Music file processor for extracting metadata from audio files
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from mutagen.mp3 import MP3
-from mutagen.flac import FLAC
-from mutagen.wave import WAVE
+from core.metadata_analysis import read_tags, tags_to_metadata, clean_metadata_string as _clean_metadata_string
+from core.parallel import bounded_map
+from core.scan_rules import DEFAULT_SCAN_RULES
+from core.tag_reader import read_tag_fields, UnsupportedTagLayout
 
 SUPPORTED_FORMATS = {'.mp3', '.wav', '.flac'}
 
-def _clean_metadata_string(text):
-    """Clean and normalize metadata string"""
-    if not text:
-        return None
-    
+# Directory listing orders for iter_music_files
+ORDER_NAME = 'name'
+ORDER_NATIVE = 'native'
+
+def _read_metadata_job(music_file):
+    """Worker for extract_metadata_batch; module level so process pools can pickle it"""
     try:
-        # Convert to string if needed
-        if isinstance(text, bytes):
-            text = text.decode('utf-8', errors='replace')
-        else:
-            text = str(text)
-        
-        # Remove null characters and other problematic characters
-        text = text.replace('\x00', '').strip()
-        
-        # Remove multiple consecutive spaces
-        text = ' '.join(text.split())
-        
-        return text if text else None
-    except Exception:
-        return None
+        return music_file, MusicProcessor.read_metadata(music_file), None
+    except Exception as e:
+        return music_file, None, f"{e.__class__.__name__}: {e}"
+
+def _scan_directory(path, depth, order, rules):
+    """
+    List one directory using DirEntry's cached type info.
+    Returns (music files, [(subdirectory, depth, identity)]); identity is
+    only filled in when symlinked directories are followed.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return [], []
+    
+    if order == ORDER_NAME:
+        entries.sort(key=lambda entry: entry.name)
+    elif callable(order):
+        entries = list(order(entries))
+    
+    files = []
+    subdirs = []
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=rules.follow_symlinks):
+                if rules.allows_dir(entry.name, depth + 1):
+                    identity = _dir_identity(entry.path) if rules.follow_symlinks else None
+                    subdirs.append((entry.path, depth + 1, identity))
+            elif (os.path.splitext(entry.name)[1].lower() in SUPPORTED_FORMATS
+                  and rules.allows_file(entry.name) and entry.is_file()):
+                files.append(entry.path)
+        except OSError:
+            continue
+    return files, subdirs
+
+def _dir_identity(path):
+    """(device, inode) of a directory, used to avoid symlink loops"""
+    st = os.stat(path)
+    return st.st_dev, st.st_ino
+
+def _iter_parallel(folder_path, order, rules, max_workers, visited):
+    """Breadth-first walk listing directories on a thread pool"""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_scan_directory, folder_path, 0, order, rules)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    for subdir, depth, identity in subdirs:
+                        if identity is not None:
+                            if identity in visited:
+                                continue
+                            visited.add(identity)
+                        pending.add(executor.submit(_scan_directory, subdir, depth, order, rules))
+                    yield from files
+        finally:
+            for future in pending:
+                future.cancel()
 
 class MusicProcessor:
     @staticmethod
-    def get_music_files(folder_path, recursive=True):
+    def get_music_files(folder_path, recursive=True, rules=None):
         """
         Get all supported music files from a folder
         """
-        music_files = []
-        if recursive:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if os.path.splitext(file)[1].lower() in SUPPORTED_FORMATS:
-                        music_files.append(os.path.join(root, file))
-        else:
-            for file in os.listdir(folder_path):
-                filepath = os.path.join(folder_path, file)
-                if os.path.isfile(filepath) and os.path.splitext(file)[1].lower() in SUPPORTED_FORMATS:
-                    music_files.append(filepath)
+        return sorted(MusicProcessor.iter_music_files(folder_path, recursive, rules=rules))
+    
+    @staticmethod
+    def iter_music_files(folder_path, recursive=True, order=ORDER_NAME, max_workers=1, rules=None):
+        """
+        Yield supported music files as they are found, without waiting for
+        the whole tree to be listed. Unreadable directories are skipped.
+        
+        rules is a ScanRules (default DEFAULT_SCAN_RULES: no hidden, trash or
+        NAS metadata folders); excluded directories are never listed.
+        
+        order controls the listing order inside each directory: ORDER_NAME,
+        ORDER_NATIVE (whatever the filesystem returns, cheapest), or a
+        callable that takes a list of os.DirEntry and returns them reordered.
+        Files of a directory are yielded before its subdirectories.
+        
+        max_workers > 1 lists sibling directories on a thread pool, which
+        helps on network shares; directories are then yielded in completion
+        order rather than depth-first.
+        """
+        if rules is None:
+            rules = DEFAULT_SCAN_RULES
+        if not recursive:
+            yield from _scan_directory(folder_path, 0, order, rules)[0]
+            return
         
-        return sorted(music_files)
+        visited = set()
+        if rules.follow_symlinks:
+            try:
+                visited.add(_dir_identity(folder_path))
+            except OSError:
+                return
+        
+        if max_workers > 1:
+            yield from _iter_parallel(folder_path, order, rules, max_workers, visited)
+            return
+        
+        stack = [(folder_path, 0)]
+        while stack:
+            path, depth = stack.pop()
+            files, subdirs = _scan_directory(path, depth, order, rules)
+            yield from files
+            for subdir, sub_depth, identity in reversed(subdirs):
+                if identity is not None:
+                    if identity in visited:
+                        continue
+                    visited.add(identity)
+                stack.append((subdir, sub_depth))
     
     @staticmethod
     def extract_metadata(music_file):
@@ -59,83 +142,61 @@ class MusicProcessor:
         Returns dict with 'artist' and 'title' keys, or None if failed
         """
         try:
-            ext = os.path.splitext(music_file)[1].lower()
-            
-            if ext == '.mp3':
-                audio = MP3(music_file)
-                # Try different ID3 tag formats
-                artist = None
-                title = None
-                
-                if audio.tags:
-                    # Try TPE1 (lead performer) first
-                    if 'TPE1' in audio.tags:
-                        artist = _clean_metadata_string(audio.tags['TPE1'])
-                    # Fallback to ARTIST
-                    elif 'ARTIST' in audio.tags:
-                        artist = _clean_metadata_string(audio.tags['ARTIST'])
-                    
-                    # Try TIT2 (title) first
-                    if 'TIT2' in audio.tags:
-                        title = _clean_metadata_string(audio.tags['TIT2'])
-                    # Fallback to TITLE
-                    elif 'TITLE' in audio.tags:
-                        title = _clean_metadata_string(audio.tags['TITLE'])
-                
-                if artist and title:
-                    return {
-                        'artist': artist,
-                        'title': title,
-                        'format': 'mp3'
-                    }
-            
-            elif ext == '.flac':
-                audio = FLAC(music_file)
-                artist = None
-                title = None
-                
-                if 'artist' in audio:
-                    raw_artist = audio['artist'][0] if isinstance(audio['artist'], list) else audio['artist']
-                    artist = _clean_metadata_string(raw_artist)
-                
-                if 'title' in audio:
-                    raw_title = audio['title'][0] if isinstance(audio['title'], list) else audio['title']
-                    title = _clean_metadata_string(raw_title)
-                
-                if artist and title:
-                    return {
-                        'artist': artist,
-                        'title': title,
-                        'format': 'flac'
-                    }
-            
-            elif ext == '.wav':
-                audio = WAVE(music_file)
-                artist = None
-                title = None
-                
-                if audio.tags:
-                    if 'artist' in audio.tags:
-                        raw_artist = audio.tags['artist'][0] if isinstance(audio.tags['artist'], list) else audio.tags['artist']
-                        artist = _clean_metadata_string(raw_artist)
-                    
-                    if 'title' in audio.tags:
-                        raw_title = audio.tags['title'][0] if isinstance(audio.tags['title'], list) else audio.tags['title']
-                        title = _clean_metadata_string(raw_title)
-                
-                if artist and title:
-                    return {
-                        'artist': artist,
-                        'title': title,
-                        'format': 'wav'
-                    }
-            
-            return None
-            
+            return MusicProcessor.read_metadata(music_file)
         except Exception as e:
             print(f"Error extracting metadata from {music_file}: {e}")
             return None
     
+    @staticmethod
+    def read_metadata(music_file):
+        """
+        Same as extract_metadata, but lets read/parse errors propagate.
+        
+        Only the tag region is read; files whose tags the fast reader
+        cannot handle fall back to a full mutagen parse.
+        """
+        ext = os.path.splitext(music_file)[1].lower()
+        if ext not in SUPPORTED_FORMATS:
+            return None
+        
+        try:
+            fields = read_tag_fields(music_file)
+        except UnsupportedTagLayout:
+            return MusicProcessor._extract_metadata_full(music_file)
+        
+        artist = _clean_metadata_string(fields.get('artist'))
+        title = _clean_metadata_string(fields.get('title'))
+        
+        if artist and title:
+            return {
+                'artist': artist,
+                'title': title,
+                'format': ext[1:]
+            }
+        
+        return None
+    
+    @staticmethod
+    def extract_metadata_batch(music_files, ordered=True, max_workers=None, use_processes=False):
+        """
+        Extract metadata for many files on a worker pool.
+        Yields (music_file, metadata, error) tuples: error is None on success,
+        otherwise a message and metadata is None. music_files may be any
+        iterable; it is consumed lazily with a bounded number of files in flight.
+        
+        ordered=True yields in input order; ordered=False yields each file
+        as soon as it completes. Threads (default) suit network mounts where
+        I/O dominates; use_processes=True suits local disks where parsing does.
+        """
+        for _, result in bounded_map(_read_metadata_job, music_files, ordered=ordered,
+                                     max_workers=max_workers, use_processes=use_processes):
+            yield result
+    
+    @staticmethod
+    def _extract_metadata_full(music_file):
+        """Extract metadata with full mutagen parsing (slow path, may raise)"""
+        return tags_to_metadata(read_tags(music_file))
+    
     @staticmethod
     def get_lrc_path(music_file):
         """
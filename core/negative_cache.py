@@ -0,0 +1,121 @@
+"""
+Persistent cache of lookups that found no lyrics
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+from core.http_cache import default_cache_dir
+
+# Misses are retried after a week; catalogues do gain lyrics over time
+DEFAULT_EXPIRY = 7 * 24 * 3600
+
+# Source name used for "every source came back empty"
+ANY_SOURCE = '*'
+
+class NegativeCache:
+    """
+    Remembers "no lyrics found" per normalized artist/title query, both for
+    individual sources and for the query as a whole, so later runs can skip
+    lookups that are known to fail until the entry expires.
+    """
+    
+    def __init__(self, path: Optional[str] = None, expiry: int = DEFAULT_EXPIRY):
+        if path is None:
+            path = os.path.join(default_cache_dir(), 'negative_cache.sqlite3')
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        
+        self.path = path
+        self.expiry = expiry
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS misses ('
+                ' query TEXT NOT NULL,'
+                ' source TEXT NOT NULL,'
+                ' recorded REAL NOT NULL,'
+                ' PRIMARY KEY (query, source))'
+            )
+    
+    @staticmethod
+    def make_key(artist: str, title: str) -> str:
+        """Normalize artist/title so trivially different spellings share an entry"""
+        def normalize(text):
+            text = unicodedata.normalize('NFKC', text or '').replace('\x00', '')
+            return ' '.join(text.lower().split())
+        return f"{normalize(artist)}\x1f{normalize(title)}"
+    
+    def is_miss(self, artist: str, title: str, source: str = ANY_SOURCE) -> bool:
+        """True if this query (for this source) recently found nothing"""
+        key = self.make_key(artist, title)
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT recorded FROM misses WHERE query = ? AND source = ?', (key, source)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Negative cache read error: {e}")
+            return False
+        return row is not None and time.time() - row[0] < self.expiry
+    
+    def record_miss(self, artist: str, title: str, source: str = ANY_SOURCE) -> None:
+        """Remember that this query (for this source) found nothing"""
+        key = self.make_key(artist, title)
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO misses (query, source, recorded) VALUES (?, ?, ?)',
+                    (key, source, time.time())
+                )
+        except sqlite3.Error as e:
+            print(f"Negative cache write error: {e}")
+    
+    def clear_miss(self, artist: str, title: str) -> None:
+        """Forget every recorded miss for this query, e.g. after a successful lookup"""
+        key = self.make_key(artist, title)
+        try:
+            with self._lock, self._conn:
+                self._conn.execute('DELETE FROM misses WHERE query = ?', (key,))
+        except sqlite3.Error as e:
+            print(f"Negative cache write error: {e}")
+    
+    def purge_expired(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM misses WHERE recorded <= ?', (time.time() - self.expiry,))
+    
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM misses')
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_negative_cache() -> Optional[NegativeCache]:
+    """
+    Process-wide negative cache used by LyricsDownloader by default.
+    Set LRC_NEGATIVE_CACHE=0 to disable.
+    """
+    global _shared_cache
+    if os.environ.get('LRC_NEGATIVE_CACHE', '1') == '0':
+        return None
+    
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = NegativeCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Negative cache disabled: {e}")
+                return None
+        return _shared_cache
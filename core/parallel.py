@@ -0,0 +1,68 @@
+"""
+Bounded worker-pool helpers shared by the batch APIs
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+def default_workers(use_processes: bool = False) -> int:
+    """Pool size for I/O-bound threads or CPU-bound processes"""
+    cpus = os.cpu_count() or 1
+    return cpus if use_processes else min(32, cpus * 4)
+
+def bounded_map(fn: Callable[[T], R], items: Iterable[T], ordered: bool = True,
+                max_workers: Optional[int] = None, use_processes: bool = False) -> Iterator[Tuple[T, R]]:
+    """
+    Run fn over items on a pool and yield (item, result) pairs.
+    items is consumed lazily with at most 4 * max_workers in flight, so
+    generators over huge libraries stream through in constant memory.
+    ordered=True yields in input order; ordered=False as each completes.
+    Exceptions raised by fn propagate when their result is reached.
+    With use_processes=True, fn must be a picklable module-level function.
+    Closing the generator early cancels work that has not started.
+    """
+    if max_workers is None:
+        max_workers = default_workers(use_processes)
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    window = max_workers * 4
+    iterator = iter(items)
+
+    with executor_class(max_workers=max_workers) as executor:
+        def submit(item):
+            future = executor.submit(fn, item)
+            future.item = item
+            return future
+
+        def submit_next():
+            for item in iterator:
+                return submit(item)
+            return None
+
+        initial = [submit(item) for item in islice(iterator, window)]
+        pending = deque(initial) if ordered else set(initial)
+        try:
+            if ordered:
+                while pending:
+                    future = pending.popleft()
+                    result = future.result()
+                    following = submit_next()
+                    if following is not None:
+                        pending.append(following)
+                    yield future.item, result
+            else:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        following = submit_next()
+                        if following is not None:
+                            pending.add(following)
+                        yield future.item, future.result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,86 @@
+"""
+Speculative lookup of lyrics candidates for tracks that come next in a batch
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List, Sequence
+
+# How many upcoming tracks to resolve ahead of the current one
+DEFAULT_LOOKAHEAD = 3
+# Lyrics text (in characters) that finished prefetches may hold before
+# no new prefetches are started
+DEFAULT_MEMORY_BUDGET = 8 * 1024 * 1024
+
+def _result_size(candidates) -> int:
+    return sum(len(c.get('full_lyrics') or '') for c in candidates or ())
+
+class CandidatePrefetcher:
+    """
+    Runs fetch(key) for upcoming keys on a small thread pool so results are
+    ready by the time the caller reaches them, e.g. while the user is still
+    looking at the selection dialog for the current track.
+
+    At most `lookahead` keys ahead are scheduled, and scheduling pauses
+    while finished-but-untaken results hold more than `memory_budget`
+    characters of lyrics. take() returns a prefetched result (waiting for
+    it if still running) or fetches inline.
+    """
+
+    def __init__(self, fetch: Callable[[str], List[Dict]], lookahead: int = DEFAULT_LOOKAHEAD,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET, max_workers: int = 2):
+        self._fetch = fetch
+        self.lookahead = lookahead
+        self.memory_budget = memory_budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures: Dict[str, Future] = {}
+        self._sizes: Dict[str, int] = {}
+        self._held = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def schedule(self, upcoming: Sequence[str]) -> None:
+        """Start fetching the first `lookahead` of the upcoming keys"""
+        for key in upcoming[:self.lookahead]:
+            with self._lock:
+                if key in self._futures:
+                    continue
+                if self._held >= self.memory_budget:
+                    return
+                future = self._executor.submit(self._fetch, key)
+                self._futures[key] = future
+            future.add_done_callback(lambda done, key=key: self._account(key, done))
+
+    def _account(self, key: str, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        size = _result_size(future.result())
+        with self._lock:
+            if self._futures.get(key) is future:
+                self._sizes[key] = size
+                self._held += size
+
+    def take(self, key: str) -> List[Dict]:
+        """Result for key: prefetched if available, otherwise fetched now"""
+        with self._lock:
+            future = self._futures.pop(key, None)
+            self._held -= self._sizes.pop(key, 0)
+        if future is None or future.cancelled():
+            return self._fetch(key)
+        self.hits += 1
+        return future.result()
+
+    def held_size(self) -> int:
+        """Characters of lyrics held by finished, untaken prefetches"""
+        with self._lock:
+            return self._held
+
+    def close(self) -> None:
+        """Drop queued prefetches; running ones finish in the background"""
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+            self._sizes.clear()
+            self._held = 0
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,128 @@
+"""
+Per-host token-bucket rate limiting for LRC source requests
+"""
+
+import os
+import threading
+import time
+from typing import Optional, Dict, Tuple
+from urllib.parse import urlsplit
+
+# requests per second, burst size
+DEFAULT_HOST_RATES = {
+    'music.163.com': (4.0, 4),
+    'songsearch.kugou.com': (4.0, 4),
+    'www.kugou.com': (4.0, 4),
+    'c.y.qq.com': (4.0, 4),
+}
+
+# Used for hosts not listed above
+DEFAULT_RATE = (2.0, 2)
+
+class TokenBucket:
+    """
+    Classic token bucket: refills at `rate` tokens per second up to
+    `capacity`. reserve() takes a token immediately and returns how long
+    the caller must wait before using it, so waiters are served in order.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens now; return seconds to wait before they are actually available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+    
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until tokens are available; returns the time spent waiting"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+class HostRateLimiter:
+    """One token bucket per host; every source request should pass through acquire()"""
+    
+    def __init__(self, rates: Optional[Dict[str, Tuple[float, float]]] = None,
+                 default_rate: Tuple[float, float] = DEFAULT_RATE):
+        self.rates = dict(DEFAULT_HOST_RATES if rates is None else rates)
+        self.default_rate = default_rate
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlsplit(url).hostname or url).lower()
+    
+    def set_rate(self, host: str, rate: float, burst: float) -> None:
+        """Change the limit for a host; takes effect immediately"""
+        host = host.lower()
+        with self._lock:
+            self.rates[host] = (rate, burst)
+            self._buckets[host] = TokenBucket(rate, burst)
+    
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = self.host_of(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self.rates.get(host, self.default_rate)
+                bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+            return bucket
+    
+    def reserve(self, url: str) -> float:
+        return self.bucket_for(url).reserve()
+    
+    def acquire(self, url: str) -> float:
+        return self.bucket_for(url).acquire()
+
+def parse_rate_spec(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse "host=rate[/burst],host=rate[/burst]" into a rates dict,
+    e.g. "music.163.com=5/10,c.y.qq.com=2"
+    """
+    rates = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, value = item.partition('=')
+        rate, _, burst = value.partition('/')
+        rate = float(rate)
+        rates[host.strip().lower()] = (rate, float(burst) if burst else max(1.0, rate))
+    return rates
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+def get_shared_rate_limiter() -> HostRateLimiter:
+    """
+    Process-wide limiter used by all sources by default.
+    LRC_RATE_LIMITS overrides per-host rates (see parse_rate_spec).
+    """
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = HostRateLimiter()
+            spec = os.environ.get('LRC_RATE_LIMITS')
+            if spec:
+                try:
+                    for host, (rate, burst) in parse_rate_spec(spec).items():
+                        _shared_limiter.set_rate(host, rate, burst)
+                except ValueError as e:
+                    print(f"Ignoring invalid LRC_RATE_LIMITS '{spec}': {e}")
+        return _shared_limiter
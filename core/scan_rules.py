@@ -0,0 +1,83 @@
+"""
+Include/exclude rules applied while walking a music library
+"""
+
+import fnmatch
+import re
+from typing import Iterable, Optional
+
+# Prefix marking a pattern as a regular expression instead of a glob
+REGEX_PREFIX = 're:'
+
+# Hidden folders (including .Trash*), NAS metadata/recycle bins and Windows system folders
+DEFAULT_EXCLUDED_DIRS = (
+    '.*',
+    '@eaDir',
+    '#recycle',
+    '#snapshot',
+    '$RECYCLE.BIN',
+    'System Volume Information',
+)
+
+# macOS AppleDouble files next to the real audio on non-HFS volumes
+DEFAULT_EXCLUDED_FILES = ('._*',)
+
+def compile_patterns(patterns: Optional[Iterable[str]]) -> Optional[re.Pattern]:
+    """
+    Combine glob patterns (and 're:'-prefixed regular expressions) into one
+    case-insensitive regex matched against a bare file or directory name.
+    Globs must match the whole name; regexes may match anywhere in it.
+    Returns None for an empty pattern list.
+    """
+    parts = []
+    for pattern in patterns or ():
+        if pattern.startswith(REGEX_PREFIX):
+            parts.append(f".*?(?:{pattern[len(REGEX_PREFIX):]})")
+        else:
+            parts.append(fnmatch.translate(pattern))
+    if not parts:
+        return None
+    return re.compile('|'.join(f"(?:{part})" for part in parts), re.IGNORECASE)
+
+class ScanRules:
+    """
+    Decides which directories the library walker enters and which files it
+    reports. Directory rules are checked before a directory is listed, so
+    excluded subtrees cost nothing.
+
+    include: file name patterns; when given, only matching files are reported
+    exclude: file name patterns to skip
+    exclude_dirs: directory name patterns never entered
+    max_depth: directory levels below the scanned folder to enter (None = unlimited)
+    follow_symlinks: enter symlinked directories (each real directory at most once)
+    """
+
+    def __init__(self, include: Optional[Iterable[str]] = None,
+                 exclude: Optional[Iterable[str]] = DEFAULT_EXCLUDED_FILES,
+                 exclude_dirs: Optional[Iterable[str]] = DEFAULT_EXCLUDED_DIRS,
+                 max_depth: Optional[int] = None,
+                 follow_symlinks: bool = False):
+        self._include = compile_patterns(include)
+        self._exclude = compile_patterns(exclude)
+        self._exclude_dirs = compile_patterns(exclude_dirs)
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+
+    @classmethod
+    def unfiltered(cls) -> 'ScanRules':
+        """Rules that enter every directory and report every supported file"""
+        return cls(exclude=None, exclude_dirs=None)
+
+    def allows_dir(self, name: str, depth: int) -> bool:
+        """Whether to enter a directory found at the given depth (1 = direct child)"""
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        return not (self._exclude_dirs and self._exclude_dirs.match(name))
+
+    def allows_file(self, name: str) -> bool:
+        """Whether to report a file with a supported extension"""
+        if self._exclude and self._exclude.match(name):
+            return False
+        return not self._include or bool(self._include.match(name))
+
+DEFAULT_SCAN_RULES = ScanRules()
@@ -0,0 +1,286 @@
+"""
+Fast tag-only reader for artist/title in MP3, FLAC and WAV files.
+
+Only the tag region is read (ID3v2 header and frames, the FLAC
+VORBIS_COMMENT block, the WAV 'id3 '/LIST chunks); frames and blocks we
+do not need are skipped with seek(), and audio data is never touched.
+Files using tag features this reader does not handle raise
+UnsupportedTagLayout so the caller can fall back to a full mutagen parse.
+"""
+
+import io
+import os
+import struct
+from typing import Optional, Dict, BinaryIO
+
+class UnsupportedTagLayout(Exception):
+    """The fast path cannot read this file's tags; use a full parse instead"""
+
+# ID3 frame ids for artist/title (v2.3/v2.4 and their v2.2 equivalents)
+_ID3_FIELDS = {
+    b'TPE1': 'artist', b'TP1': 'artist',
+    b'TIT2': 'title', b'TT2': 'title',
+}
+
+# RIFF INFO sub-chunks
+_INFO_FIELDS = {b'IART': 'artist', b'INAM': 'title'}
+
+# Guard against corrupt size fields sending us through huge reads
+_MAX_TAG_BYTES = 64 * 1024 * 1024
+
+def read_tag_fields(path: str) -> Dict[str, str]:
+    """
+    Return the raw 'artist'/'title' strings found in the file's tags (keys
+    are omitted when absent). Multiple values are joined with NUL, the same
+    way mutagen renders a multi-valued text frame.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, 'rb') as f:
+        if ext == '.mp3':
+            return _read_mp3(f)
+        if ext == '.flac':
+            return _read_flac(f)
+        if ext == '.wav':
+            return _read_wav(f)
+    raise UnsupportedTagLayout(f"unsupported extension: {ext}")
+
+def _synchsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def _unsynchronise(data: bytes) -> bytes:
+    return data.replace(b'\xff\x00', b'\xff')
+
+def _read_mp3(f: BinaryIO) -> Dict[str, str]:
+    fields = _read_id3v2(f)
+    if fields is None:
+        fields = _read_id3v1(f)
+    return fields or {}
+
+def _read_id3v2(f: BinaryIO) -> Optional[Dict[str, str]]:
+    """Parse an ID3v2 tag at the current position; None if there is no tag"""
+    start = f.tell()
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        f.seek(start)
+        return None
+    
+    major = header[3]
+    flags = header[5]
+    size = _synchsafe(header[6:10])
+    if major not in (2, 3, 4) or size > _MAX_TAG_BYTES:
+        raise UnsupportedTagLayout(f"ID3v2.{major} tag of {size} bytes")
+    if major == 2 and flags & 0x40:
+        raise UnsupportedTagLayout("compressed ID3v2.2 tag")
+    
+    tag_unsync = bool(flags & 0x80)
+    if tag_unsync and major < 4:
+        # v2.2/v2.3 unsynchronise the whole tag, frame headers included
+        body = _unsynchronise(f.read(size))
+        return _read_id3_frames(io.BytesIO(body), len(body), major, flags, False)
+    
+    return _read_id3_frames(f, size, major, flags, tag_unsync)
+
+def _read_id3_frames(f: BinaryIO, size: int, major: int, flags: int, tag_unsync: bool) -> Dict[str, str]:
+    base = f.tell()
+    end = base + size
+    
+    if flags & 0x40 and major >= 3:
+        ext_raw = f.read(4)
+        if major == 4:
+            # v2.4: synchsafe, includes the size field itself
+            f.seek(base + _synchsafe(ext_raw))
+        else:
+            f.seek(base + 4 + struct.unpack('>I', ext_raw)[0])
+    
+    header_len = 6 if major == 2 else 10
+    fields = {}
+    while f.tell() + header_len <= end and len(fields) < 2:
+        frame_header = f.read(header_len)
+        if len(frame_header) < header_len or frame_header[0] == 0:
+            break  # padding
+        
+        if major == 2:
+            frame_id = frame_header[:3]
+            frame_size = int.from_bytes(frame_header[3:6], 'big')
+            frame_flags = 0
+        else:
+            frame_id = frame_header[:4]
+            raw_size = frame_header[4:8]
+            frame_size = _synchsafe(raw_size) if major == 4 else struct.unpack('>I', raw_size)[0]
+            frame_flags = frame_header[9]
+        
+        if not frame_id.isalnum() or f.tell() + frame_size > end:
+            raise UnsupportedTagLayout(f"malformed ID3 frame {frame_id!r}")
+        
+        field = _ID3_FIELDS.get(frame_id)
+        if field is None or field in fields:
+            f.seek(frame_size, os.SEEK_CUR)
+            continue
+        
+        data = f.read(frame_size)
+        if major == 3:
+            if frame_flags & 0xc0:
+                raise UnsupportedTagLayout("compressed or encrypted ID3v2.3 frame")
+            if frame_flags & 0x20:
+                data = data[1:]  # group id
+        elif major == 4:
+            if frame_flags & 0x0c:
+                raise UnsupportedTagLayout("compressed or encrypted ID3v2.4 frame")
+            if frame_flags & 0x40:
+                data = data[1:]  # group id
+            if frame_flags & 0x02 or tag_unsync:
+                data = _unsynchronise(data)
+            if frame_flags & 0x01:
+                data = data[4:]  # data length indicator
+        
+        text = _decode_id3_text(data)
+        if text is not None:
+            fields[field] = text
+    
+    return fields
+
+def _decode_id3_text(data: bytes) -> Optional[str]:
+    """Decode a text frame body into its values joined by NUL"""
+    if not data:
+        return None
+    
+    encoding = data[0]
+    payload = data[1:]
+    if encoding in (1, 2):
+        codec = 'utf-16' if encoding == 1 else 'utf-16-be'
+        # NUL terminators are two bytes, aligned to the code unit
+        parts = []
+        current = 0
+        for i in range(0, len(payload) - 1, 2):
+            if payload[i:i + 2] == b'\x00\x00':
+                parts.append(payload[current:i])
+                current = i + 2
+        parts.append(payload[current:])
+    elif encoding in (0, 3):
+        codec = 'latin-1' if encoding == 0 else 'utf-8'
+        parts = payload.split(b'\x00')
+    else:
+        raise UnsupportedTagLayout(f"unknown ID3 text encoding {encoding}")
+    
+    while parts and not parts[-1]:
+        parts.pop()
+    
+    values = []
+    for part in parts:
+        if encoding == 1 and len(part) >= 2 and part[:2] not in (b'\xff\xfe', b'\xfe\xff'):
+            # Later values sometimes lack their own BOM; reuse little-endian
+            values.append(part.decode('utf-16-le', errors='replace'))
+        else:
+            values.append(part.decode(codec, errors='replace'))
+    return '\x00'.join(values)
+
+def _read_id3v1(f: BinaryIO) -> Dict[str, str]:
+    f.seek(0, os.SEEK_END)
+    if f.tell() < 128:
+        return {}
+    f.seek(-128, os.SEEK_END)
+    tag = f.read(128)
+    if tag[:3] != b'TAG':
+        return {}
+    
+    fields = {}
+    for field, raw in (('title', tag[3:33]), ('artist', tag[33:63])):
+        value = raw.split(b'\x00', 1)[0].decode('latin-1').rstrip()
+        if value:
+            fields[field] = value
+    return fields
+
+def _read_flac(f: BinaryIO) -> Dict[str, str]:
+    # Some taggers put an ID3v2 tag in front of FLAC; skip it like mutagen does
+    header = f.read(10)
+    if header[:3] == b'ID3':
+        f.seek(10 + _synchsafe(header[6:10]))
+    else:
+        f.seek(0)
+    
+    if f.read(4) != b'fLaC':
+        raise UnsupportedTagLayout("missing fLaC marker")
+    
+    while True:
+        block_header = f.read(4)
+        if len(block_header) < 4:
+            return {}
+        is_last = block_header[0] & 0x80
+        block_type = block_header[0] & 0x7f
+        block_size = int.from_bytes(block_header[1:4], 'big')
+        
+        if block_type == 4:
+            return _parse_vorbis_comment(f.read(block_size))
+        if is_last:
+            return {}
+        f.seek(block_size, os.SEEK_CUR)
+
+def _parse_vorbis_comment(data: bytes) -> Dict[str, str]:
+    try:
+        offset = 0
+        vendor_len = struct.unpack_from('<I', data, offset)[0]
+        offset += 4 + vendor_len
+        count = struct.unpack_from('<I', data, offset)[0]
+        offset += 4
+        
+        values = {'artist': [], 'title': []}
+        for _ in range(count):
+            length = struct.unpack_from('<I', data, offset)[0]
+            offset += 4
+            comment = data[offset:offset + length].decode('utf-8', errors='replace')
+            offset += length
+            key, sep, value = comment.partition('=')
+            key = key.lower()
+            if sep and key in values:
+                values[key].append(value)
+    except struct.error:
+        raise UnsupportedTagLayout("truncated VORBIS_COMMENT block")
+    
+    # mutagen callers use the first value of each key
+    return {key: vals[0] for key, vals in values.items() if vals}
+
+def _read_wav(f: BinaryIO) -> Dict[str, str]:
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        raise UnsupportedTagLayout("not a RIFF/WAVE file")
+    
+    id3_fields = None
+    info_fields = {}
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+        chunk_id = chunk_header[:4]
+        chunk_size = struct.unpack('<I', chunk_header[4:8])[0]
+        next_chunk = f.tell() + chunk_size + (chunk_size & 1)
+        
+        if chunk_id in (b'id3 ', b'ID3 ') and id3_fields is None:
+            id3_fields = _read_id3v2(f) or {}
+        elif chunk_id == b'LIST' and chunk_size >= 4 and f.read(4) == b'INFO':
+            info_fields = _read_riff_info(f, f.tell() + chunk_size - 4)
+        
+        f.seek(next_chunk)
+    
+    # ID3 wins where both exist, as it is the richer tag
+    fields = dict(info_fields)
+    fields.update(id3_fields or {})
+    return fields
+
+def _read_riff_info(f: BinaryIO, end: int) -> Dict[str, str]:
+    fields = {}
+    while f.tell() + 8 <= end:
+        sub_header = f.read(8)
+        sub_id = sub_header[:4]
+        sub_size = struct.unpack('<I', sub_header[4:8])[0]
+        field = _INFO_FIELDS.get(sub_id)
+        if field is None:
+            f.seek(sub_size + (sub_size & 1), os.SEEK_CUR)
+            continue
+        raw = f.read(sub_size).split(b'\x00', 1)[0]
+        if sub_size & 1:
+            f.seek(1, os.SEEK_CUR)
+        try:
+            fields[field] = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            fields[field] = raw.decode('latin-1')
+    return fields
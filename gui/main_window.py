@@ -3,26 +3,42 @@ Main GUI Window for LRC Lyrics Downloader
 """
 
 import os
+import queue
+import threading
+import time
 from pathlib import Path
 from typing import List, Optional
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QFileDialog, QTableWidget, QTableWidgetItem, QLabel, QProgressBar,
+    QFileDialog, QTableView, QLabel, QProgressBar,
     QMessageBox, QCheckBox, QSpinBox, QTabWidget, QGroupBox, QHeaderView,
     QDialog, QTextEdit, QComboBox, QListWidget, QListWidgetItem, QSplitter,
-    QScrollArea, QMenu
+    QScrollArea, QMenu, QDockWidget
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QEventLoop, QTimer, QSize
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize
 from PyQt6.QtGui import QIcon, QPixmap
 from core.music_processor import MusicProcessor
-from core.lyrics_downloader import LyricsDownloader
-from mutagen.mp3 import MP3
-from mutagen.flac import FLAC
-from mutagen.wave import WAVE
+from core.metadata_analysis import analyze_file, format_issues
+from core.parallel import bounded_map
+from core.lyrics_downloader import LyricsDownloader, DEFAULT_TOP_K
+from core.library_watcher import LibraryWatcher
+from core.auto_accept import AutoAcceptPolicy
+from core.prefetch import CandidatePrefetcher
+from gui.models import (
+    ResultsTableModel, MetadataTableModel, OUTCOME_STATUS,
+    STATUS_PROCESSING, STATUS_NEEDS_REVIEW, STATUS_NEW
+)
+from core.library_index import (
+    LibraryIndex, OUTCOME_DOWNLOADED, OUTCOME_NOT_FOUND, OUTCOME_SKIPPED,
+    OUTCOME_NO_METADATA, OUTCOME_ERROR
+)
 
 class LyricsSelectionDialog(QDialog):
     """Dialog for user to preview and select lyrics from multiple sources"""
     
+    # exec() result when the user stops the whole batch
+    CANCEL_BATCH = 2
+    
     def __init__(self, filename: str, candidates: List[dict], parent=None):
         super().__init__(parent)
         self.filename = filename
@@ -101,6 +117,10 @@ class LyricsSelectionDialog(QDialog):
         self.skip_btn.clicked.connect(self.reject)
         button_layout.addWidget(self.skip_btn)
         
+        self.cancel_batch_btn = QPushButton("Cancel Batch")
+        self.cancel_batch_btn.clicked.connect(lambda: self.done(self.CANCEL_BATCH))
+        button_layout.addWidget(self.cancel_batch_btn)
+        
         layout.addLayout(button_layout)
     
     def on_selection_changed(self) -> None:
@@ -117,92 +137,413 @@ class LyricsSelectionDialog(QDialog):
         """Get the full lyrics of the selected candidate"""
         return self.selected_lyrics
 
+class ReviewQueuePanel(QWidget):
+    """
+    Tracks waiting for the user to pick lyrics. The batch keeps running
+    while tracks sit here; the user works through them at any time.
+    """
+    resolved = pyqtSignal(str, str)  # music_file, outcome
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries: List[dict] = []  # music_file, lrc_path, candidates
+        self.init_ui()
+    
+    def init_ui(self) -> None:
+        layout = QVBoxLayout(self)
+        
+        self.count_label = QLabel("No tracks waiting for review")
+        layout.addWidget(self.count_label)
+        
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        
+        self.queue_list = QListWidget()
+        self.queue_list.currentRowChanged.connect(self.on_track_changed)
+        splitter.addWidget(self.queue_list)
+        
+        self.candidates_list = QListWidget()
+        self.candidates_list.currentRowChanged.connect(self.on_candidate_changed)
+        splitter.addWidget(self.candidates_list)
+        
+        self.preview_text = QTextEdit()
+        self.preview_text.setReadOnly(True)
+        splitter.addWidget(self.preview_text)
+        
+        splitter.setSizes([150, 150, 300])
+        layout.addWidget(splitter)
+        
+        button_layout = QHBoxLayout()
+        
+        self.save_btn = QPushButton("Download Selected")
+        self.save_btn.clicked.connect(self.save_selected)
+        button_layout.addWidget(self.save_btn)
+        
+        self.skip_btn = QPushButton("Skip This File")
+        self.skip_btn.clicked.connect(self.skip_current)
+        button_layout.addWidget(self.skip_btn)
+        
+        layout.addLayout(button_layout)
+        self.update_buttons()
+    
+    def add_track(self, music_file: str, lrc_path: str, candidates: List[dict]) -> None:
+        self.entries.append({'music_file': music_file, 'lrc_path': lrc_path, 'candidates': candidates})
+        self.queue_list.addItem(f"{os.path.basename(music_file)} ({len(candidates)} candidates)")
+        if self.queue_list.currentRow() < 0:
+            self.queue_list.setCurrentRow(0)
+        self.update_buttons()
+    
+    def count(self) -> int:
+        return len(self.entries)
+    
+    def update_buttons(self) -> None:
+        has_entry = self.queue_list.currentRow() >= 0
+        self.save_btn.setEnabled(has_entry and self.candidates_list.currentRow() >= 0)
+        self.skip_btn.setEnabled(has_entry)
+        if self.entries:
+            self.count_label.setText(f"{len(self.entries)} track(s) waiting for review")
+        else:
+            self.count_label.setText("No tracks waiting for review")
+    
+    def on_track_changed(self, row: int) -> None:
+        self.candidates_list.clear()
+        self.preview_text.clear()
+        if 0 <= row < len(self.entries):
+            for candidate in self.entries[row]['candidates']:
+                source = candidate.get('source', 'Unknown')
+                artist = candidate.get('artist', 'Unknown')
+                title = candidate.get('title', 'Unknown')
+                score = candidate.get('score', 0)
+                self.candidates_list.addItem(f"[{source}] {artist} - {title} (score: {score})")
+            if self.candidates_list.count() > 0:
+                self.candidates_list.setCurrentRow(0)
+        self.update_buttons()
+    
+    def on_candidate_changed(self, row: int) -> None:
+        track_row = self.queue_list.currentRow()
+        if 0 <= track_row < len(self.entries) and row >= 0:
+            candidate = self.entries[track_row]['candidates'][row]
+            self.preview_text.setPlainText(candidate.get('full_lyrics', ''))
+        self.update_buttons()
+    
+    def save_selected(self) -> None:
+        track_row = self.queue_list.currentRow()
+        candidate_row = self.candidates_list.currentRow()
+        if track_row < 0 or candidate_row < 0:
+            return
+        entry = self.entries[track_row]
+        lyrics = entry['candidates'][candidate_row].get('full_lyrics', '')
+        try:
+            with open(entry['lrc_path'], 'w', encoding='utf-8') as f:
+                f.write(lyrics)
+            outcome = OUTCOME_DOWNLOADED
+        except Exception as e:
+            print(f"Error saving lyrics for {entry['music_file']}: {e}")
+            QMessageBox.warning(self, "Save Failed", f"Could not save lyrics:\n{e}")
+            outcome = OUTCOME_ERROR
+        self._remove(track_row, outcome)
+    
+    def skip_current(self) -> None:
+        track_row = self.queue_list.currentRow()
+        if track_row >= 0:
+            self._remove(track_row, OUTCOME_SKIPPED)
+    
+    def _remove(self, row: int, outcome: str) -> None:
+        entry = self.entries.pop(row)
+        self.queue_list.takeItem(row)
+        self.resolved.emit(entry['music_file'], outcome)
+        self.update_buttons()
+
 class WorkerThread(QThread):
     progress_update = pyqtSignal(int, str)
     request_user_selection = pyqtSignal(str, list)  # filename, candidates
+    review_needed = pyqtSignal(str, str, list)  # music_file, lrc_path, candidates
+    status_changed = pyqtSignal(str, str)  # music_file, row status
     finished = pyqtSignal(list, list)
     
-    def __init__(self, music_files: List[str], skip_existing: bool, parent_window=None):
+    def __init__(self, music_files: List[str], skip_existing: bool, parent_window=None,
+                 library_index: Optional[LibraryIndex] = None,
+                 auto_accept: Optional[AutoAcceptPolicy] = None, queue_reviews: bool = False,
+                 top_k: Optional[int] = None):
         super().__init__()
         self.music_files = music_files
         self.skip_existing = skip_existing
-        self.downloader = LyricsDownloader()
+        self.library_index = library_index
+        self.auto_accept = auto_accept
+        self.queue_reviews = queue_reviews
+        # With top_k, fetch lyrics for only the best few search hits per track
+        self.downloader = LyricsDownloader(concurrent=True, top_k=top_k)
         self.parent_window = parent_window
-        self.user_selected_lyrics = None
-        self.user_action = None  # None means waiting for response
-        self.event_loop = QEventLoop()
+        # The GUI thread hands the dialog result back through this queue
+        self.selections: queue.Queue = queue.Queue(maxsize=1)
+        self.cancelled = threading.Event()
         
     def run(self) -> None:
         successful: List[str] = []
         failed: List[str] = []
+        # Resolve the next tracks while the user looks at the current one
+        self.prefetcher = CandidatePrefetcher(self._fetch_candidates)
         
-        total = len(self.music_files)
         for index, music_file in enumerate(self.music_files):
+            if self.cancelled.is_set():
+                break
+            self.prefetcher.schedule(self.music_files[index + 1:index + 1 + self.prefetcher.lookahead])
             try:
                 self.progress_update.emit(index + 1, f"Processing: {os.path.basename(music_file)}")
+                self.status_changed.emit(music_file, STATUS_PROCESSING)
                 
-                metadata = MusicProcessor.extract_metadata(music_file)
+                metadata = self._get_metadata(music_file)
                 if not metadata:
                     failed.append(os.path.basename(music_file))
+                    self._record_outcome(music_file, OUTCOME_NO_METADATA)
                     continue
                 
                 lrc_path = MusicProcessor.get_lrc_path(music_file)
                 if self.skip_existing and os.path.exists(lrc_path):
                     successful.append(os.path.basename(music_file))
+                    self._record_outcome(music_file, OUTCOME_SKIPPED)
                     continue
                 
                 # Get all lyrics candidates from all sources
-                candidates = self.downloader.get_all_lyrics_candidates(metadata)
+                candidates = self.prefetcher.take(music_file)
                 
-                if candidates:
-                    # Request user selection
-                    self.user_selected_lyrics = None
-                    self.user_action = None
-                    
-                    # Emit signal to show dialog
+                accepted = self.auto_accept.choose(candidates) if self.auto_accept and candidates else None
+                if accepted:
+                    print(f"Auto-accepted {accepted.get('source')} lyrics for {os.path.basename(music_file)} "
+                          f"(match {accepted.get('match_score', 0)})")
+                    self._save_lyrics(music_file, lrc_path, accepted['full_lyrics'], successful, failed)
+                elif candidates and self.queue_reviews:
+                    # Park the track in the review queue and keep going
+                    self.review_needed.emit(music_file, lrc_path, candidates)
+                elif candidates:
+                    # Ask the GUI thread and block until it answers (or cancels)
                     self.request_user_selection.emit(os.path.basename(music_file), candidates)
-                    
-                    # Wait for user response
-                    while self.user_action is None:
-                        self.msleep(100)
+                    selected_lyrics = self.selections.get()
+                    if self.cancelled.is_set():
+                        break
                     
                     # Save the selected lyrics if user chose one
-                    if self.user_selected_lyrics:
-                        try:
-                            with open(lrc_path, 'w', encoding='utf-8') as f:
-                                f.write(self.user_selected_lyrics)
-                            successful.append(os.path.basename(music_file))
-                        except Exception as e:
-                            print(f"Error saving lyrics for {music_file}: {e}")
-                            failed.append(os.path.basename(music_file))
+                    if selected_lyrics:
+                        self._save_lyrics(music_file, lrc_path, selected_lyrics, successful, failed)
                     else:
                         failed.append(os.path.basename(music_file))
+                        self._record_outcome(music_file, OUTCOME_SKIPPED)
                 else:
                     # Fall back to original method
                     if self.downloader.download_lyrics(metadata, lrc_path):
                         successful.append(os.path.basename(music_file))
+                        self._record_outcome(music_file, OUTCOME_DOWNLOADED)
                     else:
                         failed.append(os.path.basename(music_file))
+                        self._record_outcome(music_file, OUTCOME_NOT_FOUND)
                     
             except Exception as e:
                 print(f"Error processing {music_file}: {e}")
                 failed.append(os.path.basename(music_file))
+                self._record_outcome(music_file, OUTCOME_ERROR)
         
+        self.prefetcher.close()
         self.finished.emit(successful, failed)
     
+    def _fetch_candidates(self, music_file: str) -> List[dict]:
+        """Candidates for one track; runs on the prefetcher's threads too"""
+        if self.skip_existing and os.path.exists(MusicProcessor.get_lrc_path(music_file)):
+            return []
+        metadata = self._get_metadata(music_file)
+        if not metadata:
+            return []
+        return self.downloader.get_all_lyrics_candidates(metadata)
+    
+    def _save_lyrics(self, music_file: str, lrc_path: str, lyrics: str,
+                     successful: List[str], failed: List[str]) -> None:
+        try:
+            with open(lrc_path, 'w', encoding='utf-8') as f:
+                f.write(lyrics)
+            successful.append(os.path.basename(music_file))
+            self._record_outcome(music_file, OUTCOME_DOWNLOADED)
+        except Exception as e:
+            print(f"Error saving lyrics for {music_file}: {e}")
+            failed.append(os.path.basename(music_file))
+            self._record_outcome(music_file, OUTCOME_ERROR)
+    
+    def _get_metadata(self, music_file: str) -> Optional[dict]:
+        if self.library_index is not None:
+            return self.library_index.get_metadata(music_file)
+        return MusicProcessor.extract_metadata(music_file)
+    
+    def _record_outcome(self, music_file: str, outcome: str) -> None:
+        self.status_changed.emit(music_file, OUTCOME_STATUS.get(outcome, outcome))
+        if self.library_index is not None:
+            try:
+                self.library_index.record_outcome(music_file, outcome)
+            except Exception as e:
+                print(f"Error updating library index for {music_file}: {e}")
+    
     def set_user_selection(self, lyrics: Optional[str]):
-        """Called by main window when user selects lyrics"""
-        self.user_selected_lyrics = lyrics
-        self.user_action = 'done'  # Signal that we're done waiting
+        """Called by main window when user selects lyrics (None to skip)"""
+        try:
+            self.selections.put_nowait(lyrics)
+        except queue.Full:
+            pass
+    
+    def cancel(self) -> None:
+        """Stop after the current track; also releases a pending selection wait"""
+        self.cancelled.set()
+        try:
+            self.selections.put_nowait(None)
+        except queue.Full:
+            pass
+
+class MetadataLoaderThread(QThread):
+    """
+    Lists a folder and loads metadata for its music files off the GUI
+    thread, reporting rows in batches so the table fills in progressively.
+    Given music_files instead, it skips the scan and loads just those;
+    rows are then positions in that list.
+    """
+    files_found = pyqtSignal(list)
+    metadata_loaded = pyqtSignal(list)  # [(row, "Artist - Title")]
+    progress = pyqtSignal(int, int)  # loaded, total
+    
+    BATCH_SIZE = 200
+    
+    def __init__(self, folder: Optional[str], library_index: Optional[LibraryIndex] = None,
+                 music_files: Optional[List[str]] = None):
+        super().__init__()
+        self.folder = folder
+        self.library_index = library_index
+        self.music_files = music_files
+        self.cancelled = threading.Event()
+    
+    def run(self) -> None:
+        music_files = self.music_files
+        if music_files is None:
+            try:
+                if self.library_index is not None:
+                    music_files = self.library_index.scan(self.folder)
+                else:
+                    music_files = MusicProcessor.get_music_files(self.folder)
+            except Exception as e:
+                print(f"Error scanning {self.folder}: {e}")
+                music_files = []
+        if self.cancelled.is_set():
+            return
+        self.files_found.emit(music_files)
+        
+        total = len(music_files)
+        for start in range(0, total, self.BATCH_SIZE):
+            if self.cancelled.is_set():
+                return
+            chunk = music_files[start:start + self.BATCH_SIZE]
+            if self.library_index is not None:
+                all_metadata = self.library_index.load_metadata(chunk)
+            else:
+                all_metadata = {f: metadata for f, metadata, _ in MusicProcessor.extract_metadata_batch(chunk)}
+            
+            rows = []
+            for offset, music_file in enumerate(chunk):
+                metadata = all_metadata.get(music_file)
+                if metadata:
+                    rows.append((start + offset, f"{metadata.get('artist', 'Unknown')} - {metadata.get('title', 'Unknown')}"))
+            self.metadata_loaded.emit(rows)
+            self.progress.emit(start + len(chunk), total)
+    
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+class MetadataAnalysisThread(QThread):
+    """
+    Runs the single-pass metadata analysis for many files on a thread pool
+    and streams results back to the GUI in batches
+    """
+    results_ready = pyqtSignal(list)  # [(row, analyze_file result)]
+    progress = pyqtSignal(int, int)  # analysed, total
+    
+    BATCH_SIZE = 100
+    BATCH_INTERVAL = 0.2  # seconds
+    
+    def __init__(self, files: List[str], max_workers: Optional[int] = None):
+        super().__init__()
+        self.files = files
+        self.max_workers = max_workers or min(16, (os.cpu_count() or 1) * 2)
+        self.cancelled = threading.Event()
+    
+    def run(self) -> None:
+        total = len(self.files)
+        done_count = 0
+        batch = []
+        last_emit = time.monotonic()
+        
+        jobs = bounded_map(lambda job: analyze_file(job[1]), enumerate(self.files),
+                           ordered=False, max_workers=self.max_workers)
+        try:
+            for (row, _), analysis in jobs:
+                if self.cancelled.is_set():
+                    break
+                batch.append((row, analysis))
+                done_count += 1
+                
+                if len(batch) >= self.BATCH_SIZE or time.monotonic() - last_emit >= self.BATCH_INTERVAL:
+                    self.results_ready.emit(batch)
+                    self.progress.emit(done_count, total)
+                    batch = []
+                    last_emit = time.monotonic()
+        finally:
+            jobs.close()
+        
+        if batch:
+            self.results_ready.emit(batch)
+        self.progress.emit(done_count, total)
+    
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+class WatchThread(QThread):
+    """Runs a LibraryWatcher and reports new or modified music files"""
+    files_changed = pyqtSignal(list)
+    
+    def __init__(self, folder: str):
+        super().__init__()
+        self.watcher = LibraryWatcher([folder])
+    
+    def run(self) -> None:
+        try:
+            self.watcher.run(self.files_changed.emit)
+        except Exception as e:
+            print(f"Error watching folder: {e}")
+    
+    def stop(self) -> None:
+        self.watcher.stop()
+        self.wait()
 
 class MainWindow(QMainWindow):
     def __init__(self) -> None:
         super().__init__()
-        self.music_files: List[str] = []
+        self.results_model = ResultsTableModel(self)
+        self.metadata_model = MetadataTableModel(self)
         self.review_files: List[str] = []
         self.worker_thread: Optional[WorkerThread] = None
+        self.current_folder: Optional[str] = None
+        self.watch_thread: Optional[WatchThread] = None
+        self.watch_queue: List[str] = []
+        self.watch_run = False
+        self.loader_thread: Optional[MetadataLoaderThread] = None
+        self.retired_loaders: List[MetadataLoaderThread] = []
+        # Loaders filling in rows for files found by the folder watcher
+        self.watch_loaders: List[MetadataLoaderThread] = []
+        self.analysis_thread: Optional[MetadataAnalysisThread] = None
+        self.problematic_files = 0
+        try:
+            self.library_index: Optional[LibraryIndex] = LibraryIndex()
+        except Exception as e:
+            print(f"Library index unavailable, metadata will not be cached: {e}")
+            self.library_index = None
         self.init_ui()
         
+    @property
+    def music_files(self) -> List[str]:
+        """Files listed in the download table"""
+        return self.results_model.files
+    
     def init_ui(self) -> None:
         self.setWindowTitle("LRC Lyrics Downloader")
         self.setGeometry(100, 100, 1200, 700)
@@ -226,6 +567,13 @@ class MainWindow(QMainWindow):
         self.init_review_tab(review_tab)
         self.tab_widget.addTab(review_tab, "元数据检查")
         
+        # Review Queue Dock
+        self.review_panel = ReviewQueuePanel()
+        self.review_panel.resolved.connect(self.on_review_resolved)
+        self.review_dock = QDockWidget("Review Queue", self)
+        self.review_dock.setWidget(self.review_panel)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.review_dock)
+        
     def init_download_tab(self, tab_widget) -> None:
         layout = QVBoxLayout(tab_widget)
         
@@ -240,6 +588,22 @@ class MainWindow(QMainWindow):
         self.skip_existing_cb.setChecked(True)
         control_layout.addWidget(self.skip_existing_cb)
         
+        self.auto_accept_cb = QCheckBox("Auto-accept Confident Matches")
+        self.auto_accept_cb.setToolTip("Save lyrics without asking when one candidate is a clear match")
+        self.auto_accept_cb.setChecked(True)
+        control_layout.addWidget(self.auto_accept_cb)
+        
+        self.queue_reviews_cb = QCheckBox("Queue Ambiguous Tracks")
+        self.queue_reviews_cb.setToolTip("Send tracks that need a choice to the review queue instead of pausing the batch")
+        self.queue_reviews_cb.setChecked(True)
+        control_layout.addWidget(self.queue_reviews_cb)
+        
+        self.watch_cb = QCheckBox("Watch Folder")
+        self.watch_cb.setToolTip("Download lyrics automatically for music added to the folder")
+        self.watch_cb.setEnabled(False)
+        self.watch_cb.toggled.connect(self.on_watch_toggled)
+        control_layout.addWidget(self.watch_cb)
+        
         control_layout.addStretch()
         
         self.start_btn = QPushButton("Start Download")
@@ -247,6 +611,11 @@ class MainWindow(QMainWindow):
         self.start_btn.setEnabled(False)
         control_layout.addWidget(self.start_btn)
         
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_download)
+        self.cancel_btn.setEnabled(False)
+        control_layout.addWidget(self.cancel_btn)
+        
         layout.addLayout(control_layout)
         
         # Status Label
@@ -259,10 +628,13 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.progress_bar)
         
         # Results Table
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(3)
-        self.results_table.setHorizontalHeaderLabels(["Filename", "Status", "Artist - Title"])
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.results_table.verticalHeader().setDefaultSectionSize(22)
         self.results_table.horizontalHeader().setStretchLastSection(True)
+        self.results_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.results_table.customContextMenuRequested.connect(self.on_table_right_click)
         layout.addWidget(self.results_table)
         
         # Summary Label
@@ -286,22 +658,28 @@ class MainWindow(QMainWindow):
         self.analyze_btn.setEnabled(False)
         review_control_layout.addWidget(self.analyze_btn)
         
+        self.cancel_analysis_btn = QPushButton("取消")
+        self.cancel_analysis_btn.clicked.connect(self.cancel_analysis)
+        self.cancel_analysis_btn.setEnabled(False)
+        review_control_layout.addWidget(self.cancel_analysis_btn)
+        
         layout.addLayout(review_control_layout)
         
         # Status Label for Review
         self.review_status_label = QLabel("请选择要检查的音乐文件")
         layout.addWidget(self.review_status_label)
         
+        self.review_progress_bar = QProgressBar()
+        self.review_progress_bar.setVisible(False)
+        layout.addWidget(self.review_progress_bar)
+        
         # Metadata Review Table
-        self.metadata_table = QTableWidget()
-        self.metadata_table.setColumnCount(6)
-        self.metadata_table.setHorizontalHeaderLabels([
-            "文件名", "格式", "艺术家", "歌曲名", "问题", "原始数据"
-        ])
+        self.metadata_table = QTableView()
+        self.metadata_table.setModel(self.metadata_model)
         
         # Set column widths
         header = self.metadata_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)  # 文件名
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)  # 文件名
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)  # 格式
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)  # 艺术家
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)  # 歌曲名
@@ -320,57 +698,168 @@ class MainWindow(QMainWindow):
     def select_folder(self) -> None:
         folder = QFileDialog.getExistingDirectory(self, "Select Music Folder")
         if folder:
-            self.music_files = MusicProcessor.get_music_files(folder)
-            self.status_label.setText(f"Found {len(self.music_files)} music files")
-            self.start_btn.setEnabled(len(self.music_files) > 0)
-            self.populate_table()
-            
-    def populate_table(self) -> None:
-        self.results_table.setRowCount(len(self.music_files))
-        for idx, music_file in enumerate(self.music_files):
-            filename_item = QTableWidgetItem(os.path.basename(music_file))
-            status_item = QTableWidgetItem("Pending")
-            metadata = MusicProcessor.extract_metadata(music_file)
-            info_text = ""
-            if metadata:
-                info_text = f"{metadata.get('artist', 'Unknown')} - {metadata.get('title', 'Unknown')}"
-            info_item = QTableWidgetItem(info_text)
-            
-            self.results_table.setItem(idx, 0, filename_item)
-            self.results_table.setItem(idx, 1, status_item)
-            self.results_table.setItem(idx, 2, info_item)
-        
-        # Enable right-click context menu
-        self.results_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.results_table.customContextMenuRequested.connect(self.on_table_right_click)
+            self.current_folder = folder
+            self.watch_cb.setEnabled(True)
+            if self.watch_thread is not None:
+                self.stop_watching()
+                self.start_watching()
+            self.load_folder(folder)
+    
+    def load_folder(self, folder: str) -> None:
+        """Scan and load metadata in the background; replaces any load in progress"""
+        if self.loader_thread is not None:
+            # Keep a reference until the cancelled thread has actually stopped
+            old_loader = self.loader_thread
+            old_loader.cancel()
+            self.retired_loaders.append(old_loader)
+            old_loader.finished.connect(lambda: self.retired_loaders.remove(old_loader))
+        self.results_model.set_files([])
+        self.start_btn.setEnabled(False)
+        self.status_label.setText(f"Scanning {folder}...")
+        
+        loader = MetadataLoaderThread(folder, self.library_index)
+        # Signals from a superseded loader may still be queued; drop them
+        loader.files_found.connect(lambda files: self.on_files_found(loader, files))
+        loader.metadata_loaded.connect(lambda rows: self.on_metadata_loaded(loader, rows))
+        loader.progress.connect(lambda loaded, total: self.on_metadata_progress(loader, loaded, total))
+        self.loader_thread = loader
+        loader.start()
+    
+    def on_files_found(self, loader: MetadataLoaderThread, music_files: List[str]) -> None:
+        if loader is not self.loader_thread:
+            return
+        self.results_model.set_files(music_files)
+        self.status_label.setText(f"Found {len(self.music_files)} music files")
+        self.start_btn.setEnabled(len(self.music_files) > 0)
+        if music_files:
+            self.progress_bar.setMaximum(len(music_files))
+            self.progress_bar.setValue(0)
+            self.progress_bar.setVisible(True)
+    
+    def on_metadata_loaded(self, loader: MetadataLoaderThread, rows: list) -> None:
+        if loader is not self.loader_thread:
+            return
+        self.results_model.set_info(rows)
+    
+    def on_metadata_progress(self, loader: MetadataLoaderThread, loaded: int, total: int) -> None:
+        if loader is not self.loader_thread:
+            return
+        if self.worker_thread is None or not self.worker_thread.isRunning():
+            self.progress_bar.setValue(loaded)
+            self.status_label.setText(f"Found {total} music files (metadata {loaded}/{total})")
+            if loaded >= total:
+                self.progress_bar.setVisible(False)
+                self.status_label.setText(f"Found {total} music files")
+    
+    def is_loading(self) -> bool:
+        return self.loader_thread is not None and self.loader_thread.isRunning()
             
     def start_download(self) -> None:
         if not self.music_files:
             QMessageBox.warning(self, "Warning", "No music files selected")
             return
         
+        self.watch_run = False
+        self.run_worker(list(self.music_files))
+    
+    def run_worker(self, music_files: List[str]) -> None:
         self.select_folder_btn.setEnabled(False)
         self.start_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
         self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(len(self.music_files))
-        
-        self.worker_thread = WorkerThread(self.music_files, self.skip_existing_cb.isChecked(), self)
+        self.progress_bar.setMaximum(len(music_files))
+        
+        auto_accept = AutoAcceptPolicy() if self.auto_accept_cb.isChecked() else None
+        queue_reviews = self.queue_reviews_cb.isChecked()
+        # Nobody picks from the full list when ambiguous tracks go to the queue
+        top_k = DEFAULT_TOP_K if queue_reviews else None
+        self.worker_thread = WorkerThread(music_files, self.skip_existing_cb.isChecked(), self,
+                                          library_index=self.library_index, auto_accept=auto_accept,
+                                          queue_reviews=queue_reviews, top_k=top_k)
+        self.worker_thread.review_needed.connect(self.on_review_needed)
+        self.worker_thread.status_changed.connect(self.results_model.set_status)
         self.worker_thread.progress_update.connect(self.update_progress)
         self.worker_thread.request_user_selection.connect(self.on_user_selection_needed)
         self.worker_thread.finished.connect(self.on_download_finished)
         self.worker_thread.start()
         
+    def cancel_download(self) -> None:
+        if self.worker_thread is not None and self.worker_thread.isRunning():
+            self.worker_thread.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("Cancelling after the current file...")
+    
     def update_progress(self, current: int, message: str) -> None:
         self.progress_bar.setValue(current)
         self.status_label.setText(message)
     
+    def on_watch_toggled(self, checked: bool) -> None:
+        if checked:
+            self.start_watching()
+        else:
+            self.stop_watching()
+    
+    def start_watching(self) -> None:
+        if self.current_folder is None or self.watch_thread is not None:
+            return
+        self.watch_thread = WatchThread(self.current_folder)
+        self.watch_thread.files_changed.connect(self.on_watched_files_changed)
+        self.watch_thread.start()
+    
+    def stop_watching(self) -> None:
+        if self.watch_thread is not None:
+            self.watch_thread.stop()
+            self.watch_thread = None
+    
+    def on_watched_files_changed(self, music_files: List[str]) -> None:
+        """Add new files to the table and download lyrics for them"""
+        new_files = [f for f in music_files if self.results_model.row_of(f) is None]
+        if new_files:
+            self.results_model.append_files(new_files, STATUS_NEW)
+            self.status_label.setText(f"Found {len(self.music_files)} music files")
+            self.load_watched_metadata(new_files)
+        
+        self.watch_queue.extend(f for f in music_files if f not in self.watch_queue)
+        if self.worker_thread is None or not self.worker_thread.isRunning():
+            self.run_watch_queue()
+    
+    def load_watched_metadata(self, music_files: List[str]) -> None:
+        """Fill in "Artist - Title" for watched files without parsing tags on the GUI thread"""
+        loader = MetadataLoaderThread(None, self.library_index, music_files)
+        loader.metadata_loaded.connect(lambda rows: self.on_watched_metadata_loaded(music_files, rows))
+        loader.finished.connect(lambda: self.watch_loaders.remove(loader))
+        self.watch_loaders.append(loader)
+        loader.start()
+    
+    def on_watched_metadata_loaded(self, music_files: List[str], rows: list) -> None:
+        # Rows are positions in music_files; match by path since the table may have been reloaded
+        for row, text in rows:
+            self.results_model.set_info_for(music_files[row], text)
+    
+    def run_watch_queue(self) -> None:
+        music_files, self.watch_queue = self.watch_queue, []
+        self.watch_run = True
+        self.run_worker(music_files)
+    
+    def closeEvent(self, event) -> None:
+        self.stop_watching()
+        if self.analysis_thread is not None:
+            self.analysis_thread.cancel()
+            self.analysis_thread.wait()
+        for loader in [self.loader_thread] + self.watch_loaders:
+            if loader is not None:
+                loader.cancel()
+                loader.wait()
+        super().closeEvent(event)
+    
     def on_table_right_click(self, position) -> None:
         """Handle right-click on table to delete row"""
-        item = self.results_table.itemAt(position)
-        if item is None:
+        index = self.results_table.indexAt(position)
+        if not index.isValid() or self.is_loading():
+            # Rows are addressed by index while metadata is still loading
             return
         
-        row = item.row()
+        row = index.row()
         context_menu = QMenu(self)
         delete_action = context_menu.addAction("Delete")
         action = context_menu.exec(self.results_table.mapToGlobal(position))
@@ -378,45 +867,78 @@ class MainWindow(QMainWindow):
         if action == delete_action:
             # Remove from music_files list and table
             if row < len(self.music_files):
-                del self.music_files[row]
-                self.results_table.removeRow(row)
+                self.results_model.remove_row(row)
                 self.status_label.setText(f"Found {len(self.music_files)} music files")
                 self.start_btn.setEnabled(len(self.music_files) > 0)
     
+    def on_review_needed(self, music_file: str, lrc_path: str, candidates: List[dict]) -> None:
+        self.review_panel.add_track(music_file, lrc_path, candidates)
+        self.results_model.set_status(music_file, STATUS_NEEDS_REVIEW)
+        self.review_dock.show()
+    
+    def on_review_resolved(self, music_file: str, outcome: str) -> None:
+        self.results_model.set_status(music_file, OUTCOME_STATUS.get(outcome, outcome))
+        if self.library_index is not None:
+            try:
+                self.library_index.record_outcome(music_file, outcome)
+            except Exception as e:
+                print(f"Error updating library index for {music_file}: {e}")
+    
     def on_user_selection_needed(self, filename: str, candidates: List[dict]) -> None:
         """Show dialog for user to select lyrics"""
+        worker = self.worker_thread
+        # The request may have been queued before Cancel was pressed; cancel()
+        # already released the worker, so there is nothing to ask
+        if worker is None or worker.cancelled.is_set():
+            return
         dialog = LyricsSelectionDialog(filename, candidates, self)
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            selected_lyrics = dialog.get_selected_lyrics()
-            self.worker_thread.set_user_selection(selected_lyrics)
+        result = dialog.exec()
+        if result == LyricsSelectionDialog.CANCEL_BATCH:
+            self.cancel_download()
+        elif result == QDialog.DialogCode.Accepted:
+            worker.set_user_selection(dialog.get_selected_lyrics())
         else:
-            self.worker_thread.set_user_selection(None)
+            worker.set_user_selection(None)
         
     def on_download_finished(self, successful: List[str], failed: List[str]) -> None:
         self.progress_bar.setVisible(False)
         self.select_folder_btn.setEnabled(True)
         self.start_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
         
         success_count = len(successful)
         failed_count = len(failed)
-        
-        self.summary_label.setText(
-            f"Completed! Success: {success_count}, Failed: {failed_count}"
-        )
-        
-        if failed:
-            failed_msg = "\n".join(failed)
-            QMessageBox.information(
-                self,
-                "Download Complete",
-                f"Success: {success_count}\nFailed: {failed_count}\n\nFailed files:\n{failed_msg}"
-            )
-        else:
-            QMessageBox.information(
-                self,
-                "Download Complete",
-                f"All {success_count} files processed successfully!"
-            )
+        cancelled = self.worker_thread is not None and self.worker_thread.cancelled.is_set()
+        
+        summary = f"{'Cancelled' if cancelled else 'Completed'}! Success: {success_count}, Failed: {failed_count}"
+        if self.review_panel.count():
+            summary += f", Awaiting review: {self.review_panel.count()}"
+        self.summary_label.setText(summary)
+        
+        # Cancelled runs and runs started by the folder watcher only update the summary
+        if not self.watch_run and not cancelled:
+            if failed:
+                failed_msg = "\n".join(failed)
+                QMessageBox.information(
+                    self,
+                    "Download Complete",
+                    f"Success: {success_count}\nFailed: {failed_count}\n\nFailed files:\n{failed_msg}"
+                )
+            elif self.review_panel.count():
+                QMessageBox.information(
+                    self,
+                    "Download Complete",
+                    f"{success_count} files processed, {self.review_panel.count()} waiting in the review queue"
+                )
+            else:
+                QMessageBox.information(
+                    self,
+                    "Download Complete",
+                    f"All {success_count} files processed successfully!"
+                )
+        
+        if self.watch_queue:
+            self.run_watch_queue()
     
     def select_files_for_review(self) -> None:
         files, _ = QFileDialog.getOpenFileNames(
@@ -432,224 +954,57 @@ class MainWindow(QMainWindow):
             self.populate_metadata_table()
     
     def populate_metadata_table(self) -> None:
-        self.metadata_table.setRowCount(len(self.review_files))
-        
-        for idx, file_path in enumerate(self.review_files):
-            filename = os.path.basename(file_path)
-            ext = os.path.splitext(filename)[1].lower()
-            
-            # Default values
-            format_text = ext[1:].upper()  # Remove dot and convert to upper
-            artist_text = ""
-            title_text = ""
-            issues_text = "待分析"
-            raw_data_text = "待分析"
-            
-            # Set basic info
-            self.metadata_table.setItem(idx, 0, QTableWidgetItem(filename))
-            self.metadata_table.setItem(idx, 1, QTableWidgetItem(format_text))
-            self.metadata_table.setItem(idx, 2, QTableWidgetItem(artist_text))
-            self.metadata_table.setItem(idx, 3, QTableWidgetItem(title_text))
-            self.metadata_table.setItem(idx, 4, QTableWidgetItem(issues_text))
-            self.metadata_table.setItem(idx, 5, QTableWidgetItem(raw_data_text))
+        self.metadata_model.set_files(self.review_files)
     
     def analyze_metadata(self) -> None:
-        if not self.review_files:
+        if not self.review_files or self.analysis_thread is not None:
             return
         
-        total_files = len(self.review_files)
-        problematic_files = 0
+        self.problematic_files = 0
+        self.select_files_btn.setEnabled(False)
+        self.analyze_btn.setEnabled(False)
+        self.cancel_analysis_btn.setEnabled(True)
+        self.review_progress_bar.setMaximum(len(self.review_files))
+        self.review_progress_bar.setValue(0)
+        self.review_progress_bar.setVisible(True)
+        self.review_summary_label.setText("")
+        
+        self.analysis_thread = MetadataAnalysisThread(list(self.review_files))
+        self.analysis_thread.results_ready.connect(self.on_analysis_results)
+        self.analysis_thread.progress.connect(self.on_analysis_progress)
+        self.analysis_thread.finished.connect(self.on_analysis_finished)
+        self.analysis_thread.start()
+    
+    def cancel_analysis(self) -> None:
+        if self.analysis_thread is not None:
+            self.analysis_thread.cancel()
+            self.cancel_analysis_btn.setEnabled(False)
+    
+    def on_analysis_results(self, results: list) -> None:
+        for row, analysis in results:
+            self.metadata_model.set_result(row, analysis['artist'], analysis['title'],
+                                           format_issues(analysis['issues']), analysis['raw_data'])
+            if analysis['issues']:
+                self.problematic_files += 1
+    
+    def on_analysis_progress(self, analysed: int, total: int) -> None:
+        self.review_progress_bar.setValue(analysed)
+        self.review_status_label.setText(f"正在分析: {analysed}/{total}")
+    
+    def on_analysis_finished(self) -> None:
+        analysed = self.review_progress_bar.value()
+        cancelled = self.analysis_thread.cancelled.is_set()
+        self.analysis_thread = None
         
-        for idx, file_path in enumerate(self.review_files):
-            try:
-                filename = os.path.basename(file_path)
-                ext = os.path.splitext(filename)[1].lower()
-                
-                # Get detailed metadata analysis
-                analysis = self._detailed_metadata_analysis(file_path)
-                
-                # Update table with analysis results
-                self.metadata_table.setItem(idx, 2, QTableWidgetItem(analysis['artist']))
-                self.metadata_table.setItem(idx, 3, QTableWidgetItem(analysis['title']))
-                self.metadata_table.setItem(idx, 4, QTableWidgetItem(analysis['issues']))
-                self.metadata_table.setItem(idx, 5, QTableWidgetItem(analysis['raw_data']))
-                
-                if analysis['issues']:
-                    problematic_files += 1
-                    
-            except Exception as e:
-                self.metadata_table.setItem(idx, 2, QTableWidgetItem("错误"))
-                self.metadata_table.setItem(idx, 3, QTableWidgetItem("错误"))
-                self.metadata_table.setItem(idx, 4, QTableWidgetItem(f"分析失败: {str(e)}"))
-                self.metadata_table.setItem(idx, 5, QTableWidgetItem(""))
-                problematic_files += 1
+        self.review_progress_bar.setVisible(False)
+        self.select_files_btn.setEnabled(True)
+        self.analyze_btn.setEnabled(True)
+        self.cancel_analysis_btn.setEnabled(False)
+        self.review_status_label.setText(f"已选择 {len(self.review_files)} 个文件")
         
         # Update summary
-        good_files = total_files - problematic_files
+        good_files = analysed - self.problematic_files
+        prefix = f"已取消 (已分析 {analysed}/{len(self.review_files)})" if cancelled else "分析完成"
         self.review_summary_label.setText(
-            f"分析完成！正常: {good_files}, 有问题: {problematic_files}"
+            f"{prefix}！正常: {good_files}, 有问题: {self.problematic_files}"
         )
-    
-    def _detailed_metadata_analysis(self, file_path):
-        """Detailed metadata analysis to identify specific issues"""
-        filename = os.path.basename(file_path)
-        ext = os.path.splitext(filename)[1].lower()
-        
-        result = {
-            'artist': '',
-            'title': '',
-            'issues': '',
-            'raw_data': ''
-        }
-        
-        try:
-            issues = []
-            raw_data_parts = []
-            
-            if ext == '.mp3':
-                audio = MP3(file_path)
-                if audio.tags:
-                    raw_data_parts.append(f"Tags: {list(audio.tags.keys())}")
-                    
-                    # Check artist tags
-                    artist_raw = None
-                    if 'TPE1' in audio.tags:
-                        artist_raw = audio.tags['TPE1']
-                        raw_data_parts.append(f"TPE1: {repr(artist_raw)}")
-                    elif 'ARTIST' in audio.tags:
-                        artist_raw = audio.tags['ARTIST']
-                        raw_data_parts.append(f"ARTIST: {repr(artist_raw)}")
-                    
-                    # Check title tags
-                    title_raw = None
-                    if 'TIT2' in audio.tags:
-                        title_raw = audio.tags['TIT2']
-                        raw_data_parts.append(f"TIT2: {repr(title_raw)}")
-                    elif 'TITLE' in audio.tags:
-                        title_raw = audio.tags['TITLE']
-                        raw_data_parts.append(f"TITLE: {repr(title_raw)}")
-                    
-                    # Analyze artist
-                    if artist_raw:
-                        result['artist'] = str(artist_raw)
-                        if isinstance(artist_raw, bytes):
-                            issues.append("艺术家为字节类型")
-                        if '\x00' in str(artist_raw):
-                            issues.append("艺术家包含空字符")
-                        if not str(artist_raw).strip():
-                            issues.append("艺术家为空")
-                    else:
-                        issues.append("缺少艺术家标签")
-                    
-                    # Analyze title
-                    if title_raw:
-                        result['title'] = str(title_raw)
-                        if isinstance(title_raw, bytes):
-                            issues.append("歌曲名为字节类型")
-                        if '\x00' in str(title_raw):
-                            issues.append("歌曲名包含空字符")
-                        if not str(title_raw).strip():
-                            issues.append("歌曲名为空")
-                    else:
-                        issues.append("缺少歌曲名标签")
-                else:
-                    issues.append("没有元数据标签")
-                    raw_data_parts.append("No tags found")
-                    
-            elif ext == '.flac':
-                audio = FLAC(file_path)
-                raw_data_parts.append(f"Tags: {list(audio.keys())}")
-                
-                if 'artist' in audio:
-                    artist_raw = audio['artist'][0] if isinstance(audio['artist'], list) else audio['artist']
-                    result['artist'] = str(artist_raw)
-                    raw_data_parts.append(f"ARTIST: {repr(artist_raw)}")
-                    
-                    if isinstance(artist_raw, bytes):
-                        issues.append("艺术家为字节类型")
-                    if '\x00' in str(artist_raw):
-                        issues.append("艺术家包含空字符")
-                    if not str(artist_raw).strip():
-                        issues.append("艺术家为空")
-                else:
-                    issues.append("缺少艺术家标签")
-                
-                if 'title' in audio:
-                    title_raw = audio['title'][0] if isinstance(audio['title'], list) else audio['title']
-                    result['title'] = str(title_raw)
-                    raw_data_parts.append(f"TITLE: {repr(title_raw)}")
-                    
-                    if isinstance(title_raw, bytes):
-                        issues.append("歌曲名为字节类型")
-                    if '\x00' in str(title_raw):
-                        issues.append("歌曲名包含空字符")
-                    if not str(title_raw).strip():
-                        issues.append("歌曲名为空")
-                else:
-                    issues.append("缺少歌曲名标签")
-                    
-            elif ext == '.wav':
-                audio = WAVE(file_path)
-                if audio.tags:
-                    raw_data_parts.append(f"Tags: {list(audio.tags.keys())}")
-                    
-                    if 'artist' in audio.tags:
-                        artist_raw = audio.tags['artist'][0] if isinstance(audio.tags['artist'], list) else audio.tags['artist']
-                        result['artist'] = str(artist_raw)
-                        raw_data_parts.append(f"ARTIST: {repr(artist_raw)}")
-                        
-                        if isinstance(artist_raw, bytes):
-                            issues.append("艺术家为字节类型")
-                        if '\x00' in str(artist_raw):
-                            issues.append("艺术家包含空字符")
-                        if not str(artist_raw).strip():
-                            issues.append("艺术家为空")
-                    else:
-                        issues.append("缺少艺术家标签")
-                    
-                    if 'title' in audio.tags:
-                        title_raw = audio.tags['title'][0] if isinstance(audio.tags['title'], list) else audio.tags['title']
-                        result['title'] = str(title_raw)
-                        raw_data_parts.append(f"TITLE: {repr(title_raw)}")
-                        
-                        if isinstance(title_raw, bytes):
-                            issues.append("歌曲名为字节类型")
-                        if '\x00' in str(title_raw):
-                            issues.append("歌曲名包含空字符")
-                        if not str(title_raw).strip():
-                            issues.append("歌曲名为空")
-                    else:
-                        issues.append("缺少歌曲名标签")
-                else:
-                    issues.append("没有元数据标签")
-                    raw_data_parts.append("No tags found")
-            
-            # Check for common issues
-            if result['artist'] and result['title']:
-                # Check for encoding issues
-                try:
-                    result['artist'].encode('utf-8')
-                    result['title'].encode('utf-8')
-                except UnicodeEncodeError:
-                    issues.append("编码问题")
-                
-                # Check for excessive whitespace
-                if result['artist'] != result['artist'].strip():
-                    issues.append("艺术家有多余空格")
-                if result['title'] != result['title'].strip():
-                    issues.append("歌曲名有多余空格")
-                
-                # Check for special characters that might cause issues
-                problematic_chars = ['\x00', '\x01', '\x02', '\x03', '\x04', '\x05']
-                for char in problematic_chars:
-                    if char in result['artist'] or char in result['title']:
-                        issues.append(f"包含不可见字符: {repr(char)}")
-            
-            result['issues'] = '; '.join(issues) if issues else '正常'
-            result['raw_data'] = ' | '.join(raw_data_parts)
-            
-        except Exception as e:
-            result['issues'] = f"分析错误: {str(e)}"
-            result['raw_data'] = ""
-        
-        return result
@@ -0,0 +1,196 @@
+"""
+Table models for the main window views
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from core.library_index import (
+    OUTCOME_DOWNLOADED, OUTCOME_NOT_FOUND, OUTCOME_SKIPPED,
+    OUTCOME_NO_METADATA, OUTCOME_ERROR, OUTCOME_TIMEOUT
+)
+
+# Row states of the download table; stored per row as an index into STATUS_LABELS
+STATUS_PENDING = 'Pending'
+STATUS_PROCESSING = 'Processing'
+STATUS_NEEDS_REVIEW = 'Needs Review'
+STATUS_NEW = 'New'
+STATUS_LABELS = (
+    STATUS_PENDING, STATUS_PROCESSING, 'Downloaded', 'Not Found', 'Skipped',
+    'No Metadata', 'Error', 'Timeout', STATUS_NEEDS_REVIEW, STATUS_NEW,
+)
+_STATUS_CODES = {label: code for code, label in enumerate(STATUS_LABELS)}
+
+# Library index outcome -> row status
+OUTCOME_STATUS = {
+    OUTCOME_DOWNLOADED: 'Downloaded',
+    OUTCOME_NOT_FOUND: 'Not Found',
+    OUTCOME_SKIPPED: 'Skipped',
+    OUTCOME_NO_METADATA: 'No Metadata',
+    OUTCOME_ERROR: 'Error',
+    OUTCOME_TIMEOUT: 'Timeout',
+}
+
+class BatchedTableModel(QAbstractTableModel):
+    """
+    Base for the table models: row changes are collected and announced
+    with one dataChanged per FLUSH_INTERVAL_MS instead of one per cell
+    """
+    HEADERS: Sequence[str] = ()
+    FLUSH_INTERVAL_MS = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._dirty: Optional[Tuple[int, int]] = None
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def mark_dirty(self, first: int, last: Optional[int] = None) -> None:
+        last = first if last is None else last
+        if self._dirty is None:
+            self._dirty = (first, last)
+        else:
+            self._dirty = (min(self._dirty[0], first), max(self._dirty[1], last))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Emit the pending dataChanged now"""
+        if self._dirty is None:
+            return
+        first, last = self._dirty
+        self._dirty = None
+        last = min(last, self.rowCount() - 1)
+        if first <= last:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, self.columnCount() - 1))
+
+    def _reset_dirty(self) -> None:
+        self._dirty = None
+        self._flush_timer.stop()
+
+class ResultsTableModel(BatchedTableModel):
+    """Download table: file name, live status and artist/title per music file"""
+    HEADERS = ("Filename", "Status", "Artist - Title")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.files: List[str] = []
+        self._status = bytearray()
+        self._info: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.files)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return os.path.basename(self.files[row])
+            if column == 1:
+                return STATUS_LABELS[self._status[row]]
+            return self._info[row] or ""
+        if role == Qt.ItemDataRole.ToolTipRole and column == 0:
+            return self.files[row]
+        return None
+
+    def set_files(self, music_files: List[str]) -> None:
+        self.beginResetModel()
+        self._reset_dirty()
+        self.files = list(music_files)
+        self._status = bytearray(len(self.files))
+        self._info = [None] * len(self.files)
+        self._rows = {f: row for row, f in enumerate(self.files)}
+        self.endResetModel()
+
+    def append_files(self, music_files: List[str], status: str = STATUS_PENDING) -> None:
+        if not music_files:
+            return
+        first = len(self.files)
+        self.beginInsertRows(QModelIndex(), first, first + len(music_files) - 1)
+        for offset, music_file in enumerate(music_files):
+            self._rows[music_file] = first + offset
+        self.files.extend(music_files)
+        self._status.extend([_STATUS_CODES[status]] * len(music_files))
+        self._info.extend([None] * len(music_files))
+        self.endInsertRows()
+
+    def remove_row(self, row: int) -> None:
+        self.flush()
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.files[row]
+        del self._status[row]
+        del self._info[row]
+        self._rows = {f: r for r, f in enumerate(self.files)}
+        self.endRemoveRows()
+
+    def row_of(self, music_file: str) -> Optional[int]:
+        return self._rows.get(music_file)
+
+    def set_info(self, rows: List[Tuple[int, str]]) -> None:
+        """Set "Artist - Title" for many rows at once"""
+        if not rows:
+            return
+        for row, text in rows:
+            self._info[row] = text
+        self.mark_dirty(min(r for r, _ in rows), max(r for r, _ in rows))
+
+    def set_info_for(self, music_file: str, text: str) -> None:
+        row = self.row_of(music_file)
+        if row is not None:
+            self.set_info([(row, text)])
+
+    def set_status(self, music_file: str, status: str) -> None:
+        row = self.row_of(music_file)
+        if row is not None:
+            self._status[row] = _STATUS_CODES.get(status, _STATUS_CODES['Error'])
+            self.mark_dirty(row)
+
+class MetadataTableModel(BatchedTableModel):
+    """Metadata review table: one row per selected file, filled in by analysis"""
+    HEADERS = ("文件名", "格式", "艺术家", "歌曲名", "问题", "原始数据")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.files: List[str] = []
+        # artist, title, issues, raw data; None until analysed
+        self._results: List[Optional[Tuple[str, str, str, str]]] = []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.files)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        row, column = index.row(), index.column()
+        if column == 0:
+            return os.path.basename(self.files[row]) if role == Qt.ItemDataRole.DisplayRole else self.files[row]
+        if column == 1:
+            return os.path.splitext(self.files[row])[1][1:].upper()
+        result = self._results[row]
+        if result is None:
+            return "待分析" if column >= 4 else ""
+        return result[column - 2]
+
+    def set_files(self, files: List[str]) -> None:
+        self.beginResetModel()
+        self._reset_dirty()
+        self.files = list(files)
+        self._results = [None] * len(self.files)
+        self.endResetModel()
+
+    def set_result(self, row: int, artist: str, title: str, issues: str, raw_data: str) -> None:
+        self._results[row] = (artist, title, issues, raw_data)
+        self.mark_dirty(row)
@@ -6,15 +6,22 @@ setup(
     description="Automatic LRC lyrics downloader for macOS with batch processing",
     author="Zony",
     packages=find_packages(),
+    py_modules=['main', 'cli_batch'],
     install_requires=[
         'PyQt6>=6.4.0',
         'mutagen>=1.45.0',
         'requests>=2.28.0',
         'unidecode>=1.3.0',
     ],
+    extras_require={
+        # Multiplexes async lookups on one thread; without it the async
+        # engine falls back to a thread pool
+        'async': ['aiohttp>=3.8'],
+    },
     entry_points={
         'console_scripts': [
             'lrc-downloader=main:main',
+            'lrc-batch=cli_batch:main',
         ],
     },
     python_requires='>=3.7',
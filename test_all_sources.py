@@ -3,7 +3,7 @@
 Test all sources individually for 周杰伦 - 青花瓷
 """
 
-from core.lrc_sources import NetEaseSource, KuGouSource, TencentQQSource
+from core.lrc_sources import NetEaseSource, KuGouSource, TencentQQSource, SourceUnavailable
 
 def test_source(source_name, source_class):
     print("\n" + "="*80)
@@ -11,7 +11,11 @@ def test_source(source_name, source_class):
     print("="*80)
     
     source = source_class()
-    result = source.get_lyrics('周杰伦', '青花瓷')
+    try:
+        result = source.get_lyrics('周杰伦', '青花瓷')
+    except SourceUnavailable as e:
+        print(f"\n✗ Source unavailable: {e}")
+        return False
     
     if result:
         lines = result.split('\n')
@@ -0,0 +1,194 @@
+"""
+Tests for the async source API and async_engine module (offline)
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from core import async_engine
+from core.async_engine import AsyncHttpClient, AsyncLookupEngine
+from core.http_cache import ResponseCache
+from core.lrc_sources import LRCSource, NetEaseSource
+from core.lyrics_downloader import LyricsDownloader
+from core.negative_cache import NegativeCache
+
+def make_response(data) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(data).encode('utf-8')
+    return response
+
+class FakeClient:
+    """Stands in for AsyncHttpClient with canned NetEase responses"""
+    
+    def __init__(self):
+        self.urls = []
+    
+    async def request(self, source, method, url, params=None, force_refresh=False):
+        self.urls.append(url)
+        await asyncio.sleep(0)
+        if 'search' in url:
+            return make_response({'result': {'songs': [
+                {'name': 'Song', 'id': 1, 'artists': [{'name': 'Artist'}]},
+                {'name': 'Song (Live)', 'id': 2, 'artists': [{'name': 'Artist'}]},
+                {'name': 'Other', 'id': 3, 'artists': [{'name': 'Someone'}]},
+            ]}})
+        return make_response({'lrc': {'lyric': f"[00:00.00]song {params['id']}"}})
+    
+    async def cache_response(self, source, method, url, params, response):
+        pass
+
+def test_async_get_lyrics_candidates():
+    """Test the async source API end to end against a fake transport"""
+    source = NetEaseSource(use_cache=False)
+    client = FakeClient()
+    
+    candidates = asyncio.run(source.async_get_lyrics_candidates('Artist', 'Song', client))
+    
+    assert [c['full_lyrics'] for c in candidates] == ['[00:00.00]song 1', '[00:00.00]song 2']
+    assert candidates[0]['source'] == 'NetEase'
+    # One search plus lyric requests only for hits above MIN_SCORE
+    assert len(client.urls) == 3
+    print("✓ async candidates test passed")
+
+class AsyncFakeSource(LRCSource):
+    """Async source stand-in: canned hits per title, counts lyric fetches"""
+    
+    def __init__(self, name, hits_by_title, delays=None):
+        super().__init__(use_cache=False)
+        self.SOURCE_NAME = name
+        self.hits_by_title = hits_by_title
+        self.delays = delays or {}
+        self.searches = 0
+        self.fetched = []
+    
+    async def async_search(self, artist, title, client, force_refresh=False):
+        self.searches += 1
+        await asyncio.sleep(self.delays.get(title, 0))
+        return [dict(hit, source=self.SOURCE_NAME, artist=artist, title=title)
+                for hit in self.hits_by_title.get(title, [])]
+    
+    async def async_fetch_lyrics(self, hit, client, force_refresh=False):
+        self.fetched.append(hit['ref'])
+        return None if hit['ref'].startswith('missing') else f"[00:00.00]{hit['ref']}"
+
+def make_hit(ref, match_score, score=40):
+    return {'ref': ref, 'match_score': match_score, 'score': score}
+
+def make_engine(sources, negative_cache=None, **kwargs):
+    downloader = LyricsDownloader(use_cache=False, negative_cache=negative_cache,
+                                  use_negative_cache=negative_cache is not None)
+    downloader.sources = sources
+    return AsyncLookupEngine(downloader, **kwargs)
+
+def test_engine_run_preserves_input_order():
+    """Test that the blocking driver returns one result list per input, in order"""
+    source = AsyncFakeSource('Slow', {'first': [make_hit('first', 90)], 'second': [make_hit('second', 90)]},
+                             delays={'first': 0.05})
+    engine = make_engine([source], concurrency=4)
+    results = engine.run([
+        {'artist': 'A', 'title': 'first'},
+        {'artist': 'A', 'title': 'second'},
+        {'artist': '', 'title': 'skipped'},
+    ])
+    
+    assert [[c['full_lyrics'] for c in r] for r in results] == [['[00:00.00]first'], ['[00:00.00]second'], []]
+    print("✓ async engine ordering test passed")
+
+def test_engine_fetches_top_k_and_uses_negative_cache():
+    """Test that the engine searches first, fetches only the global top_k, and skips known misses"""
+    a = AsyncFakeSource('A', {'Song': [make_hit('a1', 100), make_hit('missing-a', 95),
+                                       make_hit('a3', 40), make_hit('a4', 30)]})
+    b = AsyncFakeSource('B', {'Song': [make_hit('b1', 90), make_hit('b2', 20)]})
+    cache = NegativeCache(':memory:')
+    engine = make_engine([a, b], negative_cache=cache, top_k=2)
+    
+    candidates = engine.run([{'artist': 'X', 'title': 'Song'}])[0]
+    assert [c['full_lyrics'] for c in candidates] == ['[00:00.00]a1', '[00:00.00]b1']
+    # missing-a had no lyrics and was replaced by the next best hit; nothing else was fetched
+    assert sorted(a.fetched + b.fetched) == ['a1', 'b1', 'missing-a']
+    
+    engine.run([{'artist': 'X', 'title': 'Nothing'}])
+    assert cache.is_miss('X', 'Nothing')
+    searches = a.searches
+    assert engine.run([{'artist': 'X', 'title': 'Nothing'}]) == [[]]
+    assert a.searches == searches
+    cache.close()
+    print("✓ async engine top-k and negative cache test passed")
+
+class StubAiohttpSession:
+    """Stands in for aiohttp.ClientSession; answers NetEase search/lyric URLs"""
+    
+    def __init__(self, **kwargs):
+        self.requests = []
+    
+    def request(self, method, url, params=None, headers=None, ssl=None):
+        self.requests.append((url, dict(params or {})))
+        if 'search' in url:
+            body = {'result': {'songs': [{'name': 'Song', 'id': 1, 'artists': [{'name': 'Artist'}]}]}}
+        else:
+            body = {'lrc': {'lyric': f"[00:00.00]song {params['id']}"}}
+        return StubAiohttpResponse(json.dumps(body).encode('utf-8'), url)
+    
+    async def close(self):
+        pass
+
+class StubAiohttpResponse:
+    def __init__(self, body, url):
+        self.status = 200
+        self.headers = {'Content-Type': 'application/json'}
+        self.charset = 'utf-8'
+        self.url = url
+        self._body = body
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+    
+    async def read(self):
+        return self._body
+
+def test_aiohttp_transport_with_cache():
+    """Test the aiohttp path: responses are converted, counted and cached"""
+    if async_engine.aiohttp is None:
+        print("- aiohttp not installed, skipping")
+        return
+    
+    with tempfile.TemporaryDirectory() as tmpdir, \
+            mock.patch.object(async_engine.aiohttp, 'ClientSession', StubAiohttpSession), \
+            mock.patch.object(async_engine.aiohttp, 'TCPConnector', lambda **kwargs: None):
+        cache = ResponseCache(os.path.join(tmpdir, 'cache.sqlite3'))
+        source = NetEaseSource(response_cache=cache)
+        
+        async def lookup_twice():
+            async with AsyncHttpClient(concurrency=4) as client:
+                first = await source.async_get_lyrics_candidates('Artist', 'Song', client)
+                second = await source.async_get_lyrics_candidates('Artist', 'Song', client)
+                return first, second, client._session.requests
+        
+        first, second, sent = asyncio.run(lookup_twice())
+        
+    assert [c['full_lyrics'] for c in first] == ['[00:00.00]song 1']
+    assert second == first
+    # The second lookup was answered by the cache
+    assert len(sent) == 2
+    stats = source.stats.snapshot()
+    assert stats['requests'] == 2 and stats['cache_hits'] == 2 and stats['bytes'] > 0
+    print("✓ aiohttp transport test passed")
+
+if __name__ == '__main__':
+    test_async_get_lyrics_candidates()
+    test_engine_run_preserves_input_order()
+    test_engine_fetches_top_k_and_uses_negative_cache()
+    test_aiohttp_transport_with_cache()
+    print("\n✅ All tests passed!")
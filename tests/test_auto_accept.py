@@ -0,0 +1,51 @@
+"""
+Tests for auto_accept module
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.auto_accept import AutoAcceptPolicy, lyric_similarity
+
+SONG = "[00:01.00]第一行歌词\n[00:05.00]第二行歌词\n[00:09.00]第三行歌词"
+SONG_RETIMED = "[ti:x]\n[00:01.50]第一行歌词\n[00:05.50]第二行歌词\n[00:09.50]第三行歌词"
+OTHER_SONG = "[00:01.00]完全不同\n[00:05.00]另一首歌"
+
+def _candidate(source, match_score, lyrics):
+    return {'source': source, 'match_score': match_score, 'score': match_score, 'full_lyrics': lyrics}
+
+def test_lyric_similarity_ignores_timestamps():
+    """Test that retimed copies of the same lyrics agree"""
+    assert lyric_similarity(SONG, SONG_RETIMED) == 1.0
+    assert lyric_similarity(SONG, OTHER_SONG) == 0.0
+    assert lyric_similarity(SONG, '') == 0.0
+    print("✓ Lyric similarity test passed")
+
+def test_policy_decisions():
+    """Test score threshold, margin and cross-source agreement"""
+    policy = AutoAcceptPolicy(min_match=90, min_margin=15)
+    
+    clear_winner = [_candidate('QQ', 100, SONG), _candidate('NetEase', 60, OTHER_SONG)]
+    assert policy.choose(clear_winner) is clear_winner[0]
+    
+    assert policy.choose([_candidate('QQ', 80, SONG)]) is None
+    
+    close_rival = [_candidate('QQ', 100, SONG), _candidate('NetEase', 95, OTHER_SONG)]
+    assert policy.choose(close_rival) is None
+    
+    agreeing = [_candidate('NetEase', 95, OTHER_SONG), _candidate('QQ', 100, SONG),
+                _candidate('KuGou', 90, SONG_RETIMED)]
+    assert policy.choose(agreeing)['source'] == 'QQ'
+    
+    tied = [_candidate('QQ', 100, SONG), _candidate('KuGou', 100, SONG_RETIMED),
+            _candidate('NetEase', 100, OTHER_SONG)]
+    assert policy.choose(tied) is None
+    assert policy.choose([]) is None
+    print("✓ Auto-accept policy test passed")
+
+if __name__ == '__main__':
+    test_lyric_similarity_ignores_timestamps()
+    test_policy_decisions()
+    print("\n✅ All tests passed!")
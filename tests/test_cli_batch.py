@@ -0,0 +1,139 @@
+"""
+Tests for the headless batch CLI (offline, using fake sources)
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cli_batch import run_batch, run_batch_async
+from tests.test_async_engine import AsyncFakeSource, make_hit, make_engine
+from tests.test_lyrics_downloader import RaceSource, make_downloader
+
+def async_source(scores):
+    """Async source with one hit per track, match score picked by title"""
+    return AsyncFakeSource('Async', {title: [make_hit(title, score)] for title, score in scores.items()})
+
+def test_run_batch_json_lines():
+    """Test one JSON line per file with downloaded/skipped/no_metadata/timeout statuses"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = {name: os.path.join(tmpdir, name) for name in ('a.mp3', 'b.mp3', 'c.mp3')}
+        for path in paths.values():
+            open(path, 'w').close()
+        with open(os.path.join(tmpdir, 'b.lrc'), 'w') as f:
+            f.write('[00:00.00]existing')
+        
+        class StubIndex:
+            outcomes = {}
+            def get_metadata(self, music_file):
+                if music_file.endswith('c.mp3'):
+                    return None
+                return {'artist': 'Artist', 'title': os.path.basename(music_file)}
+            def record_outcome(self, music_file, outcome):
+                self.outcomes[os.path.basename(music_file)] = outcome
+        
+        index = StubIndex()
+        out = io.StringIO()
+        downloader = make_downloader([RaceSource('Fast', 0.01, 90)], concurrent=True)
+        counts = run_batch(paths.values(), downloader, out, workers=2, index=index)
+        
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        by_name = {os.path.basename(line['file']): line for line in lines}
+        assert len(lines) == 3
+        assert by_name['a.mp3']['status'] == 'downloaded'
+        assert by_name['a.mp3']['source'] == 'Fast' and by_name['a.mp3']['match_score'] == 90
+        assert by_name['b.mp3']['status'] == 'skipped'
+        assert by_name['c.mp3']['status'] == 'no_metadata'
+        assert counts == {'downloaded': 1, 'skipped': 1, 'no_metadata': 1}
+        assert index.outcomes['a.mp3'] == 'downloaded'
+        with open(os.path.join(tmpdir, 'a.lrc'), encoding='utf-8') as f:
+            assert f.read() == '[00:00.00]Fast'
+        
+        # --refresh reaches the sources
+        refreshing = RaceSource('Fast', 0.01, 90)
+        run_batch([paths['a.mp3']], make_downloader([refreshing], concurrent=True), io.StringIO(),
+                  skip_existing=False, index=index, force_refresh=True)
+        assert refreshing.refreshed
+        
+        out = io.StringIO()
+        slow = make_downloader([RaceSource('Slow', 1.0, 90)], concurrent=True)
+        run_batch([paths['a.mp3']], slow, out, skip_existing=False, deadline=0.1, index=index)
+        assert json.loads(out.getvalue())['status'] == 'timeout'
+    print("✓ run_batch JSON lines test passed")
+
+def test_run_batch_top_k():
+    """Test that --top-k resolves in two phases and keeps the best match rather than the fastest"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'a.mp3')
+        open(path, 'w').close()
+        
+        class StubIndex:
+            def get_metadata(self, music_file):
+                return {'artist': 'Artist', 'title': 'Song'}
+            def record_outcome(self, music_file, outcome):
+                pass
+        
+        sources = [RaceSource('Fast', 0.0, 75), RaceSource('Better', 0.05, 95)]
+        out = io.StringIO()
+        counts = run_batch([path], make_downloader(sources, concurrent=True), out, index=StubIndex(), top_k=2)
+        line = json.loads(out.getvalue())
+        assert counts == {'downloaded': 1}
+        assert line['source'] == 'Better' and line['match_score'] == 95
+        
+        # The deadline still applies to two-phase lookups
+        out = io.StringIO()
+        slow = make_downloader([RaceSource('Slow', 1.0, 95)], concurrent=True)
+        run_batch([path], slow, out, skip_existing=False, deadline=0.1, index=StubIndex(), top_k=2)
+        assert json.loads(out.getvalue())['status'] == 'timeout'
+    print("✓ run_batch top-k test passed")
+
+def test_run_batch_async():
+    """Test that the async engine mode writes the same JSON lines and LRC files"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        names = ('a.mp3', 'b.mp3', 'c.mp3', 'd.mp3')
+        paths = [os.path.join(tmpdir, name) for name in names]
+        for path in paths:
+            open(path, 'w').close()
+        with open(os.path.join(tmpdir, 'b.lrc'), 'w') as f:
+            f.write('[00:00.00]existing')
+        
+        class StubIndex:
+            def get_metadata(self, music_file):
+                return {'artist': 'Artist', 'title': os.path.basename(music_file)}
+            def record_outcome(self, music_file, outcome):
+                pass
+        
+        # d.mp3 only has a weak match, below --min-match
+        engine = make_engine([async_source({'a.mp3': 95, 'c.mp3': 80, 'd.mp3': 30})], concurrency=2)
+        out = io.StringIO()
+        counts = run_batch_async(iter(paths), engine, out, index=StubIndex())
+        
+        by_name = {os.path.basename(line['file']): line
+                   for line in map(json.loads, out.getvalue().splitlines())}
+        assert by_name['a.mp3']['status'] == 'downloaded' and by_name['a.mp3']['match_score'] == 95
+        assert by_name['b.mp3']['status'] == 'skipped'
+        assert by_name['c.mp3']['source'] == 'Async'
+        assert by_name['d.mp3']['status'] == 'not_found'
+        assert counts == {'downloaded': 2, 'skipped': 1, 'not_found': 1}
+        with open(os.path.join(tmpdir, 'c.lrc'), encoding='utf-8') as f:
+            assert f.read() == '[00:00.00]c.mp3'
+        assert not os.path.exists(os.path.join(tmpdir, 'd.lrc'))
+        
+        # --deadline also holds in async mode
+        slow = AsyncFakeSource('Slow', {'a.mp3': [make_hit('a.mp3', 95)]}, delays={'a.mp3': 1.0})
+        out = io.StringIO()
+        counts = run_batch_async([paths[0]], make_engine([slow]), out, skip_existing=False,
+                                 deadline=0.1, index=StubIndex())
+        assert counts == {'timeout': 1}
+        assert json.loads(out.getvalue())['status'] == 'timeout'
+    print("✓ run_batch_async test passed")
+
+if __name__ == '__main__':
+    test_run_batch_json_lines()
+    test_run_batch_top_k()
+    test_run_batch_async()
+    print("\n✅ All tests passed!")
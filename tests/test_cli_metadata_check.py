@@ -0,0 +1,63 @@
+"""
+Tests for the metadata check CLI: directory discovery and record output
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cli_metadata_check import iter_input_files, run_check
+from tests.test_tag_reader import _write_flac
+
+def _make_library(tmpdir):
+    os.makedirs(os.path.join(tmpdir, 'album'))
+    _write_flac(os.path.join(tmpdir, 'good.flac'), 'Artist', 'Title')
+    _write_flac(os.path.join(tmpdir, 'album', 'spaces.flac'), ' Artist', 'Title')
+    with open(os.path.join(tmpdir, 'album', 'broken.flac'), 'wb') as f:
+        f.write(b'not a flac file')
+    open(os.path.join(tmpdir, 'album', 'notes.txt'), 'w').close()
+
+def test_iter_input_files():
+    """Test that folders are walked, files passed through and missing paths collected"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_library(tmpdir)
+        missing = []
+        single = os.path.join(tmpdir, 'good.flac')
+        files = list(iter_input_files([tmpdir, single, os.path.join(tmpdir, 'nope.mp3')], missing=missing))
+        assert sorted(os.path.basename(f) for f in files) == ['broken.flac', 'good.flac', 'good.flac', 'spaces.flac']
+        assert missing == [os.path.join(tmpdir, 'nope.mp3')]
+        assert len(list(iter_input_files([tmpdir], recursive=False))) == 1
+    print("✓ iter_input_files test passed")
+
+def test_run_check_jsonl_and_csv():
+    """Test one record per file and the aggregate summary"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _make_library(tmpdir)
+
+        out = io.StringIO()
+        summary = run_check(iter_input_files([tmpdir]), out, output_format='jsonl', workers=2)
+        records = {os.path.basename(r['file']): r for r in map(json.loads, out.getvalue().splitlines())}
+        assert set(records) == {'good.flac', 'spaces.flac', 'broken.flac'}
+        assert records['good.flac']['ok'] and records['good.flac']['issues'] == []
+        assert records['spaces.flac']['issues'] == ['艺术家有多余空格']
+        assert records['broken.flac']['error']
+        assert summary['total'] == 3 and summary['ok'] == 1
+        assert summary['problems'] == 2 and summary['errors'] == 1
+        assert summary['issues'] == {'艺术家有多余空格': 1, '分析错误': 1}
+
+        out = io.StringIO()
+        run_check(iter_input_files([tmpdir]), out, output_format='csv', workers=2, issues_only=True)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert sorted(os.path.basename(r['file']) for r in rows) == ['broken.flac', 'spaces.flac']
+        assert all(r['ok'] == 'False' for r in rows)
+    print("✓ run_check jsonl/csv test passed")
+
+if __name__ == '__main__':
+    test_iter_input_files()
+    test_run_check_jsonl_and_csv()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,39 @@
+"""
+Tests for the folder watch CLI (offline, using fake sources)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cli_watch import process_files
+from tests.test_lyrics_downloader import RaceSource, make_downloader
+
+def test_process_files_saves_best_of_top_k():
+    """Test that watched files are resolved in two phases and the best match is saved"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, name) for name in ('a.mp3', 'b.mp3')]
+        for path in paths:
+            open(path, 'w').close()
+        
+        class StubIndex:
+            outcomes = {}
+            def load_metadata(self, music_files):
+                return {f: {'artist': 'Artist', 'title': 'Song'} for f in music_files if f.endswith('a.mp3')}
+            def record_outcome(self, music_file, outcome):
+                self.outcomes[os.path.basename(music_file)] = outcome
+        
+        sources = [RaceSource('Weak', 0.0, 40), RaceSource('Strong', 0.0, 90), RaceSource('Fair', 0.0, 60)]
+        index = StubIndex()
+        process_files(paths, make_downloader(sources, concurrent=True), index, top_k=1)
+        
+        assert index.outcomes == {'a.mp3': 'downloaded', 'b.mp3': 'no_metadata'}
+        with open(os.path.join(tmpdir, 'a.lrc'), encoding='utf-8') as f:
+            assert f.read() == '[00:00.00]Strong'
+    print("✓ watch process_files top-k test passed")
+
+if __name__ == '__main__':
+    test_process_files_saves_best_of_top_k()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,65 @@
+"""
+Tests for the GUI table models (skipped when PyQt6 is not installed)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from PyQt6.QtCore import QCoreApplication
+    from gui.models import ResultsTableModel, MetadataTableModel, OUTCOME_STATUS
+    from core.library_index import OUTCOME_DOWNLOADED
+except ImportError:
+    QCoreApplication = None
+
+def _app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+def test_results_model_batches_updates():
+    """Test rows, live status and coalesced dataChanged signals"""
+    if QCoreApplication is None:
+        print("- PyQt6 not installed, skipping")
+        return
+    _app()
+    model = ResultsTableModel()
+    files = [f"/music/{i:05}.mp3" for i in range(1000)]
+    model.set_files(files)
+    assert model.rowCount() == 1000
+    assert model.data(model.index(7, 0)) == '00007.mp3'
+    assert model.data(model.index(7, 1)) == 'Pending'
+    
+    changes = []
+    model.dataChanged.connect(lambda first, last: changes.append((first.row(), last.row())))
+    model.set_info([(10, 'A - B'), (500, 'C - D')])
+    model.set_status(files[20], OUTCOME_STATUS[OUTCOME_DOWNLOADED])
+    assert changes == []
+    model.flush()
+    assert changes == [(10, 500)]
+    assert model.data(model.index(20, 1)) == 'Downloaded'
+    assert model.data(model.index(500, 2)) == 'C - D'
+    
+    model.append_files(['/music/new.mp3'], 'New')
+    model.remove_row(0)
+    assert model.row_of('/music/new.mp3') == 999
+    assert model.data(model.index(999, 1)) == 'New'
+    print("✓ Results model test passed")
+
+def test_metadata_model():
+    """Test lazy columns and analysis results"""
+    if QCoreApplication is None:
+        print("- PyQt6 not installed, skipping")
+        return
+    _app()
+    model = MetadataTableModel()
+    model.set_files(['/music/a.flac'])
+    assert [model.data(model.index(0, c)) for c in range(6)] == ['a.flac', 'FLAC', '', '', '待分析', '待分析']
+    model.set_result(0, 'Artist', 'Title', '正常', 'raw')
+    assert model.data(model.index(0, 4)) == '正常'
+    print("✓ Metadata model test passed")
+
+if __name__ == '__main__':
+    test_results_model_batches_updates()
+    test_metadata_model()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,132 @@
+"""
+Tests for http_cache module
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import requests
+
+from core.http_cache import ResponseCache
+from core.lrc_sources import NetEaseSource, SourceUnavailable
+
+SEARCH_URL = 'https://music.163.com/api/v1/search/get'
+
+def make_response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+def test_make_key_normalization():
+    """Test that parameter order and URL query placement do not change the key"""
+    a = ResponseCache.make_key('get', 'https://Music.163.com/api/song/lyric?lv=1', {'id': 5})
+    b = ResponseCache.make_key('GET', 'https://music.163.com/api/song/lyric', {'id': '5', 'lv': 1})
+    assert a == b
+    print("✓ make_key normalization test passed")
+
+def test_roundtrip_and_expiry():
+    """Test that responses are returned from cache until their TTL runs out"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = ResponseCache(os.path.join(tmpdir, 'cache.sqlite3'), ttls={SEARCH_URL: 1})
+        cache.put('GET', SEARCH_URL, {'s': 'a b'}, make_response(b'{"ok": 1}'))
+        
+        cached = cache.get('GET', SEARCH_URL, {'s': 'a b'})
+        assert cached is not None
+        assert cached.status_code == 200
+        assert cached.json() == {'ok': 1}
+        assert cache.get('GET', SEARCH_URL, {'s': 'other'}) is None
+        
+        time.sleep(1.1)
+        assert cache.get('GET', SEARCH_URL, {'s': 'a b'}) is None
+        cache.close()
+    print("✓ roundtrip and expiry test passed")
+
+def test_uncached_endpoint_is_ignored():
+    """Test that endpoints without a TTL are never stored"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = ResponseCache(os.path.join(tmpdir, 'cache.sqlite3'), ttls={SEARCH_URL: 60})
+        cache.put('GET', 'https://example.com/x', None, make_response(b'{}'))
+        assert cache.total_bytes() == 0
+        cache.close()
+    print("✓ uncached endpoint test passed")
+
+def test_lru_eviction():
+    """Test that the least recently used entries are evicted past max_bytes"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = ResponseCache(os.path.join(tmpdir, 'cache.sqlite3'), ttls={SEARCH_URL: 60}, max_bytes=250)
+        for i in range(3):
+            cache.put('GET', SEARCH_URL, {'s': i}, make_response(b'x' * 100))
+            time.sleep(0.01)
+            # Keep the first entry warm
+            cache.get('GET', SEARCH_URL, {'s': 0})
+        
+        assert cache.total_bytes() <= 250
+        assert cache.get('GET', SEARCH_URL, {'s': 0}) is not None
+        assert cache.get('GET', SEARCH_URL, {'s': 1}) is None
+        assert cache.get('GET', SEARCH_URL, {'s': 2}) is not None
+        cache.close()
+    print("✓ LRU eviction test passed")
+
+def test_only_useful_answers_are_cached():
+    """Test that anti-crawl errors and empty answers are not stored, real hits and lyrics are"""
+    class ScriptedSource(NetEaseSource):
+        def __init__(self, cache, bodies):
+            super().__init__(response_cache=cache)
+            self.bodies = list(bodies)
+        
+        def _send_request(self, method, url, **kwargs):
+            return make_response(json.dumps(self.bodies.pop(0)).encode('utf-8'))
+    
+    song = {'name': 'Song', 'id': 7, 'artists': [{'name': 'Artist'}]}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = ResponseCache(os.path.join(tmpdir, 'cache.sqlite3'))
+        source = ScriptedSource(cache, [
+            {'code': -460, 'message': 'Cheating'},
+            {'result': {'songs': []}, 'code': 200},
+            {'result': {'songs': [song]}, 'code': 200},
+            {'nolyric': True, 'code': 200},
+            {'lrc': {'lyric': '[00:00.00]words'}, 'code': 200},
+            {'result': {'songs': []}, 'code': 200},
+        ])
+        
+        try:
+            source.search('Artist', 'Song')
+            assert False, "anti-crawl answer should be a failure, not an empty result"
+        except SourceUnavailable:
+            pass
+        assert cache.total_bytes() == 0
+        assert source.search('Artist', 'Song') == []
+        assert cache.total_bytes() == 0
+        
+        hits = source.search('Artist', 'Song')
+        assert hits[0]['ref'] == 7
+        assert source.fetch_lyrics(hits[0]) is None
+        assert source.fetch_lyrics(hits[0]) == '[00:00.00]words'
+        
+        # Both useful answers now come from the cache
+        assert source.search('Artist', 'Song')[0]['ref'] == 7
+        assert source.fetch_lyrics(hits[0]) == '[00:00.00]words'
+        assert source.stats.snapshot()['cache_hits'] == 2
+        
+        # A forced refresh asks the network even though the answer is cached
+        assert source.search('Artist', 'Song', force_refresh=True) == []
+        assert source.stats.snapshot()['requests'] == 6
+        cache.close()
+    print("✓ cache validation test passed")
+
+if __name__ == '__main__':
+    test_make_key_normalization()
+    test_roundtrip_and_expiry()
+    test_uncached_endpoint_is_ignored()
+    test_lru_eviction()
+    test_only_useful_answers_are_cached()
+    print("\n✅ All tests passed!")
@@ -10,10 +10,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.music_processor import MusicProcessor
 from core.lyrics_downloader import LyricsDownloader
 from core.lrc_sources import ALL_SOURCES, NetEaseSource
+import time
 
 def test_lyrics_downloader_initialization():
     """Test that LyricsDownloader can be initialized"""
-    downloader = LyricsDownloader()
+    downloader = LyricsDownloader(use_cache=False, use_negative_cache=False)
     assert downloader is not None
     assert len(downloader.sources) > 0
     print(f"✓ LyricsDownloader initialized with {len(downloader.sources)} sources")
@@ -21,7 +22,7 @@ def test_lyrics_downloader_initialization():
 def test_lrc_source_instantiation():
     """Test that all LRC sources can be instantiated"""
     for source_class in ALL_SOURCES:
-        source = source_class()
+        source = source_class(use_cache=False)
         assert source is not None
         print(f"✓ {source_class.__name__} instantiated successfully")
 
@@ -33,7 +34,7 @@ def test_metadata_validation():
         'format': 'mp3'
     }
     
-    downloader = LyricsDownloader()
+    downloader = LyricsDownloader(use_cache=False, use_negative_cache=False)
     # The download_lyrics method should handle this gracefully
     # (it will fail to download but shouldn't crash)
     result = downloader.download_lyrics(valid_metadata, '/tmp/test.lrc')
@@ -48,13 +49,36 @@ def test_incomplete_metadata():
         # Missing title
     }
     
-    downloader = LyricsDownloader()
+    downloader = LyricsDownloader(use_cache=False, use_negative_cache=False)
     result = downloader.download_lyrics(incomplete_metadata, '/tmp/test.lrc')
     
     assert result is False
     print("✓ Incomplete metadata correctly rejected")
 
+def test_fetch_candidates_parallel_keeps_score_order():
+    """Test that lyric bodies are fetched in parallel but returned in hit order"""
+    class SlowLyricsSource(NetEaseSource):
+        def fetch_lyrics(self, hit, force_refresh=False):
+            # Best hit answers last
+            time.sleep(0.3 if hit['ref'] == 1 else 0.1)
+            return f"[00:00.00]{hit['ref']}"
+    
+    source = SlowLyricsSource(use_cache=False)
+    hits = [
+        {'source': 'NetEase', 'artist': 'A', 'title': 'T', 'score': 50 - ref, 'ref': ref}
+        for ref in range(1, 5)
+    ]
+    
+    start = time.monotonic()
+    candidates = source.fetch_candidates(hits)
+    elapsed = time.monotonic() - start
+    
+    assert [c['full_lyrics'] for c in candidates] == [f"[00:00.00]{ref}" for ref in range(1, 5)]
+    assert elapsed < 0.5
+    print("✓ Parallel candidate fetch keeps score order")
+
 if __name__ == '__main__':
+    test_fetch_candidates_parallel_keeps_score_order()
     test_lyrics_downloader_initialization()
     test_lrc_source_instantiation()
     test_metadata_validation()
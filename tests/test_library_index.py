@@ -0,0 +1,66 @@
+"""
+Tests for library_index module
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.library_index import LibraryIndex, OUTCOME_DOWNLOADED
+from core.music_processor import MusicProcessor
+
+class CountingExtractor:
+    """Replaces MusicProcessor.read_metadata and counts parses"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, music_file):
+        self.calls.append(os.path.basename(music_file))
+        return {'artist': 'Artist', 'title': os.path.basename(music_file), 'format': 'mp3'}
+
+def test_only_changed_files_are_reparsed():
+    """Test that metadata is cached until a file's size or mtime changes"""
+    original = MusicProcessor.read_metadata
+    extractor = CountingExtractor()
+    MusicProcessor.read_metadata = staticmethod(extractor)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = LibraryIndex(os.path.join(tmpdir, 'index.sqlite3'))
+            music_dir = os.path.join(tmpdir, 'music')
+            os.makedirs(music_dir)
+            for name in ('a.mp3', 'b.mp3'):
+                with open(os.path.join(music_dir, name), 'w') as f:
+                    f.write('x')
+            
+            files = index.scan(music_dir)
+            first = index.load_metadata(files)
+            assert first[files[0]]['title'] == 'a.mp3'
+            assert sorted(extractor.calls) == ['a.mp3', 'b.mp3']
+            
+            extractor.calls.clear()
+            index.load_metadata(files)
+            assert extractor.calls == []
+            
+            with open(files[1], 'w') as f:
+                f.write('changed')
+            index.load_metadata(files)
+            assert extractor.calls == ['b.mp3']
+            
+            index.record_outcome(files[0], OUTCOME_DOWNLOADED)
+            assert index.get_entry(files[0])['last_outcome'] == OUTCOME_DOWNLOADED
+            
+            # Deleted files drop out of the index on the next scan
+            os.remove(files[1])
+            assert index.scan(music_dir) == [files[0]]
+            assert index.get_entry(files[1]) is None
+            index.close()
+    finally:
+        MusicProcessor.read_metadata = original
+    print("✓ library index test passed")
+
+if __name__ == '__main__':
+    test_only_changed_files_are_reparsed()
+    print("\n✅ All tests passed!")
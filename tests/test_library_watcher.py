@@ -0,0 +1,150 @@
+"""
+Tests for library_watcher module (inotify and polling backends)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import library_watcher
+from core.library_watcher import LibraryWatcher, InotifyBackend
+from core.scan_rules import DEFAULT_SCAN_RULES
+
+def _write(path, data=b'audio'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _watch(tmpdir, changes, expected, **kwargs):
+    """
+    Start a watcher, apply changes once it is running and wait for the
+    expected number of files; return the watcher, the reported files and
+    the time each file was reported
+    """
+    reported = []
+    times = {}
+    
+    def on_files(batch):
+        reported.extend(batch)
+        for path in batch:
+            times[path] = time.monotonic()
+    
+    watcher = LibraryWatcher([tmpdir], settle=0.2, **kwargs)
+    thread = threading.Thread(target=watcher.run, args=(on_files,))
+    thread.start()
+    try:
+        time.sleep(0.3)
+        changes()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and len(reported) < expected:
+            time.sleep(0.05)
+        # Leave room for duplicate reports to show up
+        time.sleep(0.6)
+    finally:
+        watcher.stop()
+        thread.join(timeout=5)
+    return watcher, reported, times
+
+def _check_backend(**kwargs):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        untouched = os.path.join(tmpdir, 'old.mp3')
+        _write(untouched)
+        edited = os.path.join(tmpdir, 'edited.mp3')
+        _write(edited)
+        new_file = os.path.join(tmpdir, 'new.flac')
+        in_new_dir = os.path.join(tmpdir, 'Album', 'Disc 1', 'track.mp3')
+        changed_at = {}
+        
+        def changes():
+            changed_at['start'] = time.monotonic()
+            _write(new_file)
+            _write(in_new_dir)
+            _write(edited, b'rewritten audio')
+            _write(os.path.join(tmpdir, 'cover.jpg'))
+            _write(os.path.join(tmpdir, '.hidden', 'skip.mp3'))
+        
+        watcher, reported, times = _watch(tmpdir, changes, expected=3, **kwargs)
+        # Each change is reported exactly once; the untouched file never is
+        assert sorted(reported) == sorted([new_file, in_new_dir, edited]), reported
+        assert untouched not in reported
+        # ... and only after it settled
+        assert times[edited] - changed_at['start'] >= watcher.settle
+        return watcher.backend_name
+
+def test_inotify_backend():
+    """Test new files and new directories are reported once settled"""
+    backend = _check_backend()
+    expected = 'inotify' if sys.platform.startswith('linux') else 'polling'
+    assert backend == expected
+    print(f"✓ {backend} backend test passed")
+
+def test_polling_backend():
+    """Test the polling fallback reports new and modified files only"""
+    backend = _check_backend(use_inotify=False, poll_interval=0.2)
+    assert backend == 'polling'
+    print("✓ Polling backend test passed")
+
+def test_inotify_overflow_reports_only_changes():
+    """Test that a queue overflow rescans and reports changed files, not the whole library"""
+    if not sys.platform.startswith('linux'):
+        print("- inotify not available, skipping")
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        untouched = os.path.join(tmpdir, 'old.mp3')
+        edited = os.path.join(tmpdir, 'edited.mp3')
+        _write(untouched)
+        _write(edited)
+        backend = InotifyBackend([tmpdir], DEFAULT_SCAN_RULES)
+        try:
+            backend.wait(0)
+            _write(edited, b'rewritten audio')
+            new_file = os.path.join(tmpdir, 'Album', 'new.flac')
+            _write(new_file)
+            # Events are dropped on overflow; only the rescan can find the changes
+            os.read(backend._fd, 256 * 1024)
+            assert backend._rescan() == {edited, new_file}
+            assert os.path.join(tmpdir, 'Album') in [d for d, _ in backend._dirs.values()]
+        finally:
+            backend.close()
+    print("✓ inotify overflow test passed")
+
+def test_inotify_out_of_watches_polls_subtree():
+    """Test that running out of watches for a new directory falls back to polling it"""
+    if not sys.platform.startswith('linux'):
+        print("- inotify not available, skipping")
+        return
+    
+    class NoWatchesLibc:
+        def inotify_add_watch(self, fd, path, mask):
+            return -1
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        backend = InotifyBackend([tmpdir], DEFAULT_SCAN_RULES, poll_interval=0)
+        try:
+            backend._libc = NoWatchesLibc()
+            album = os.path.join(tmpdir, 'Album')
+            with mock.patch.object(library_watcher.ctypes, 'get_errno', return_value=library_watcher.errno.ENOSPC):
+                os.mkdir(album)
+                files, dirs = backend.wait(1)
+            assert dirs == {album}
+            assert backend._polled is not None
+            
+            track = os.path.join(album, 'track.mp3')
+            _write(track)
+            files, dirs = backend.wait(0)
+            assert track in files
+        finally:
+            backend.close()
+    print("✓ inotify out of watches test passed")
+
+if __name__ == '__main__':
+    test_inotify_backend()
+    test_polling_backend()
+    test_inotify_overflow_reports_only_changes()
+    test_inotify_out_of_watches_polls_subtree()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,312 @@
+"""
+Tests for lyrics_downloader module (offline, using fake sources)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.lyrics_downloader import LyricsDownloader
+from core.lrc_sources import LRCSource, NetEaseSource, SourceUnavailable
+from core.negative_cache import NegativeCache
+from tests.test_async_engine import make_response
+
+class FakeSource:
+    """Source stand-in that returns canned candidates after a delay"""
+    
+    def __init__(self, name, scores, delay=0.0):
+        self.name = name
+        self.SOURCE_NAME = name
+        self.calls = 0
+        self.scores = scores
+        self.delay = delay
+    
+    def get_lyrics_candidates(self, artist, title, force_refresh=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [
+            {
+                'source': self.name,
+                'artist': artist,
+                'title': title,
+                'preview': '',
+                'full_lyrics': f'[00:00.00]{self.name} {score}',
+                'score': score,
+            }
+            for score in self.scores
+        ]
+
+class FakeSearchSource(LRCSource):
+    """Source stand-in for two-phase tests; counts lyric fetches"""
+    
+    def __init__(self, name, hits):
+        super().__init__(use_cache=False)
+        self.SOURCE_NAME = name
+        self.hits = hits
+        self.fetched = []
+    
+    def search(self, artist, title, force_refresh=False):
+        return [dict(hit, source=self.SOURCE_NAME) for hit in self.hits]
+    
+    def fetch_lyrics(self, hit, force_refresh=False):
+        self.fetched.append(hit['ref'])
+        return None if hit['ref'] == 'missing' else f"[00:00.00]{hit['ref']}"
+
+class RaceSource(LRCSource):
+    """Source stand-in for race tests: fixed search latency and match score"""
+    
+    def __init__(self, name, delay, match_score):
+        super().__init__(use_cache=False)
+        self.SOURCE_NAME = name
+        self.delay = delay
+        self.match = match_score
+        self.searched = False
+        self.refreshed = False
+    
+    def search(self, artist, title, force_refresh=False):
+        self.searched = True
+        self.refreshed = force_refresh
+        time.sleep(self.delay)
+        return [{'source': self.SOURCE_NAME, 'artist': artist, 'title': title,
+                 'score': 40, 'match_score': self.match, 'ref': self.SOURCE_NAME}]
+    
+    def fetch_lyrics(self, hit, force_refresh=False):
+        return f"[00:00.00]{hit['ref']}"
+
+def make_downloader(sources, concurrent, negative_cache=None):
+    # Never touch the developer's real caches under ~/.cache
+    downloader = LyricsDownloader(concurrent=concurrent, use_cache=False, negative_cache=negative_cache,
+                                  use_negative_cache=negative_cache is not None)
+    downloader.sources = sources
+    return downloader
+
+def test_concurrent_candidates_merged_and_sorted():
+    """Test that concurrent mode merges every source and sorts by score"""
+    sources = [
+        FakeSource('A', [10, 30], delay=0.2),
+        FakeSource('B', [40], delay=0.2),
+        FakeSource('C', [20], delay=0.2),
+    ]
+    downloader = make_downloader(sources, concurrent=True)
+    
+    start = time.monotonic()
+    candidates = downloader.get_all_lyrics_candidates({'artist': 'X', 'title': 'Y'})
+    elapsed = time.monotonic() - start
+    
+    assert [c['score'] for c in candidates] == [40, 30, 20, 10]
+    # Sources ran in parallel: roughly one delay, not three
+    assert elapsed < 0.5
+    print("✓ concurrent candidates test passed")
+
+def test_concurrent_candidates_survive_source_errors():
+    """Test that a failing source does not drop the other sources' results"""
+    class BrokenSource:
+        SOURCE_NAME = 'Broken'
+        
+        def get_lyrics_candidates(self, artist, title, force_refresh=False):
+            raise RuntimeError("boom")
+    
+    downloader = make_downloader([BrokenSource(), FakeSource('B', [15])], concurrent=True)
+    candidates = downloader.get_all_lyrics_candidates({'artist': 'X', 'title': 'Y'})
+    
+    assert len(candidates) == 1
+    assert candidates[0]['source'] == 'B'
+    print("✓ concurrent error isolation test passed")
+
+def test_two_phase_fetches_only_global_top_k():
+    """Test that two-phase resolution ranks across sources and fetches only the best k"""
+    a = FakeSearchSource('A', [
+        {'artist': 'X', 'title': 'Y', 'score': 40, 'match_score': 60, 'ref': 'a1'},
+        {'artist': 'X', 'title': 'Y', 'score': 30, 'match_score': 20, 'ref': 'a2'},
+    ])
+    b = FakeSearchSource('B', [
+        {'artist': 'X', 'title': 'Y', 'score': 50, 'match_score': 100, 'ref': 'missing'},
+        {'artist': 'X', 'title': 'Y', 'score': 45, 'match_score': 90, 'ref': 'b2'},
+        {'artist': 'X', 'title': 'Y', 'score': 2, 'match_score': 95, 'ref': 'low'},
+    ])
+    downloader = make_downloader([a, b], concurrent=True)
+    
+    candidates = downloader.resolve_top_candidates({'artist': 'X', 'title': 'Y'}, top_k=2)
+    
+    assert [c['full_lyrics'] for c in candidates] == ['[00:00.00]b2', '[00:00.00]a1']
+    # The missing body was replaced by the next best; low-score and tail hits never fetched
+    assert b.fetched == ['missing', 'b2']
+    assert a.fetched == ['a1']
+    print("✓ two-phase resolution test passed")
+
+def test_source_get_lyrics_wraps_search_and_fetch():
+    """Test that get_lyrics tries hits best first and skips unusable ones"""
+    source = FakeSearchSource('A', [
+        {'artist': 'X', 'title': 'Y', 'score': 50, 'match_score': 100, 'ref': 'missing'},
+        {'artist': 'X', 'title': 'Y', 'score': 2, 'match_score': 95, 'ref': 'low'},
+        {'artist': 'X', 'title': 'Y', 'score': 40, 'match_score': 90, 'ref': 'a2'},
+        {'artist': 'X', 'title': 'Y', 'score': 30, 'match_score': 80, 'ref': 'a3'},
+    ])
+    
+    assert source.get_lyrics('X', 'Y') == '[00:00.00]a2'
+    assert source.fetched == ['missing', 'a2']
+    print("✓ source get_lyrics test passed")
+
+def test_negative_cache_skips_known_misses():
+    """Test that empty lookups are remembered until a forced refresh"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = NegativeCache(os.path.join(tmpdir, 'neg.sqlite3'))
+        empty = FakeSource('Empty', [])
+        found = FakeSource('Found', [])
+        downloader = make_downloader([empty, found], concurrent=False, negative_cache=cache)
+        metadata = {'artist': 'Nobody', 'title': 'Nothing'}
+        
+        assert downloader.get_all_lyrics_candidates(metadata) == []
+        assert downloader.get_all_lyrics_candidates(metadata) == []
+        assert (empty.calls, found.calls) == (1, 1)
+        assert cache.is_miss(' NOBODY ', 'nothing')
+        
+        # A forced refresh queries again; a hit clears the recorded misses
+        found.scores = [30]
+        candidates = downloader.get_all_lyrics_candidates(metadata, force_refresh=True)
+        assert len(candidates) == 1
+        assert (empty.calls, found.calls) == (2, 2)
+        assert not cache.is_miss('Nobody', 'Nothing')
+        assert not cache.is_miss('Nobody', 'Nothing', 'Empty')
+        cache.close()
+    print("✓ negative cache test passed")
+
+class OfflineSource(NetEaseSource):
+    """NetEase source whose requests all fail, or all return an empty 200 when answering=True"""
+    
+    def __init__(self, answering=False):
+        super().__init__(use_cache=False)
+        self.SOURCE_NAME = 'Answering' if answering else 'Down'
+        self.answering = answering
+        self.sent = 0
+    
+    def _send_request(self, method, url, **kwargs):
+        self.sent += 1
+        if not self.answering:
+            return None
+        return make_response({'result': {'songs': []}})
+
+def test_transport_failures_are_not_recorded_as_misses():
+    """Test that an outage leaves the negative cache empty, while real empty answers are kept"""
+    metadata = {'artist': 'Artist', 'title': 'Song'}
+    calls = [
+        lambda d: d.download_lyrics(metadata, os.devnull),
+        lambda d: d.get_all_lyrics_candidates(metadata),
+        lambda d: d.resolve_top_candidates(metadata, top_k=2),
+        lambda d: d.race_lyrics(metadata),
+    ]
+    for call in calls:
+        cache = NegativeCache(':memory:')
+        down = OfflineSource()
+        downloader = make_downloader([down, OfflineSource(answering=True)], concurrent=True,
+                                     negative_cache=cache)
+        assert not call(downloader)
+        assert not cache.is_miss('Artist', 'Song')
+        assert not cache.is_miss('Artist', 'Song', 'Down')
+        
+        # The next run queries again instead of skipping the track
+        sent = down.sent
+        call(downloader)
+        assert down.sent > sent
+        cache.close()
+    
+    cache = NegativeCache(':memory:')
+    downloader = make_downloader([OfflineSource(answering=True)], concurrent=False, negative_cache=cache)
+    assert downloader.get_all_lyrics_candidates(metadata) == []
+    assert cache.is_miss('Artist', 'Song')
+    cache.close()
+    print("✓ transport failure test passed")
+
+def test_unexpected_source_errors_are_not_recorded_as_misses():
+    """Test that a source crashing on a body counts as unavailable, not as an empty answer"""
+    class CrashingSource(OfflineSource):
+        def fetch_candidates(self, hits, force_refresh=False):
+            raise KeyError('lrc')
+    
+    source = CrashingSource(answering=True)
+    source._send_request = lambda method, url, **kwargs: make_response(
+        {'result': {'songs': [{'name': 'Song', 'id': 1, 'artists': [{'name': 'Artist'}]}]}})
+    try:
+        source.get_lyrics_candidates('Artist', 'Song')
+        assert False, "expected SourceUnavailable"
+    except SourceUnavailable:
+        pass
+    
+    cache = NegativeCache(':memory:')
+    downloader = make_downloader([source], concurrent=False, negative_cache=cache)
+    assert downloader.get_all_lyrics_candidates({'artist': 'Artist', 'title': 'Song'}) == []
+    assert not cache.is_miss('Artist', 'Song')
+    assert not cache.is_miss('Artist', 'Song', source.SOURCE_NAME)
+    cache.close()
+    print("✓ unexpected source error test passed")
+
+def test_race_returns_first_confident_result():
+    """Test that the fastest confident source wins without waiting for slower ones"""
+    slow = RaceSource('Slow', delay=1.0, match_score=100)
+    weak = RaceSource('Weak', delay=0.0, match_score=30)
+    fast = RaceSource('Fast', delay=0.1, match_score=90)
+    downloader = make_downloader([slow, weak, fast], concurrent=True)
+    
+    start = time.monotonic()
+    winner = downloader.race_lyrics({'artist': 'X', 'title': 'Y'})
+    
+    assert winner['source'] == 'Fast'
+    assert time.monotonic() - start < 0.5
+    print("✓ race test passed")
+
+def test_race_hedging_and_timeout():
+    """Test that hedged sources start only when the primary is late, and the deadline is enforced"""
+    primary = RaceSource('Primary', delay=0.0, match_score=100)
+    backup = RaceSource('Backup', delay=0.0, match_score=100)
+    downloader = make_downloader([primary, backup], concurrent=True)
+    
+    winner = downloader.race_lyrics({'artist': 'X', 'title': 'Y'}, hedge_delay=0.5)
+    assert winner['source'] == 'Primary'
+    assert not backup.searched
+    
+    primary.delay = 1.0
+    winner = downloader.race_lyrics({'artist': 'X', 'title': 'Y'}, hedge_delay=0.1)
+    assert winner['source'] == 'Backup'
+    
+    backup.delay = 1.0
+    try:
+        downloader.race_lyrics({'artist': 'X', 'title': 'Y'}, timeout=0.2)
+        assert False, "expected TimeoutError"
+    except TimeoutError:
+        pass
+    print("✓ race hedging and timeout test passed")
+
+def test_race_survives_a_bad_lyric_body():
+    """Test that a parse error on one hit moves the racer on to its next hit"""
+    class TwoHitSource(RaceSource):
+        def search(self, artist, title, force_refresh=False):
+            return [{'source': self.SOURCE_NAME, 'artist': artist, 'title': title, 'score': 40,
+                     'match_score': match, 'ref': ref} for ref, match in (('broken', 100), ('good', 90))]
+        
+        def fetch_lyrics(self, hit, force_refresh=False):
+            if hit['ref'] == 'broken':
+                raise KeyError('lyric')
+            return super().fetch_lyrics(hit)
+    
+    cache = NegativeCache(':memory:')
+    downloader = make_downloader([TwoHitSource('Two', 0.0, 100)], concurrent=True, negative_cache=cache)
+    winner = downloader.race_lyrics({'artist': 'X', 'title': 'Y'})
+    assert winner['full_lyrics'] == '[00:00.00]good'
+    cache.close()
+    print("✓ race bad body test passed")
+
+if __name__ == '__main__':
+    test_race_returns_first_confident_result()
+    test_race_hedging_and_timeout()
+    test_race_survives_a_bad_lyric_body()
+    test_negative_cache_skips_known_misses()
+    test_transport_failures_are_not_recorded_as_misses()
+    test_unexpected_source_errors_are_not_recorded_as_misses()
+    test_two_phase_fetches_only_global_top_k()
+    test_source_get_lyrics_wraps_search_and_fetch()
+    test_concurrent_candidates_merged_and_sorted()
+    test_concurrent_candidates_survive_source_errors()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,63 @@
+"""
+Tests for main window slots (skipped when PyQt6 is not installed)
+"""
+
+import os
+import sys
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from gui import main_window
+    from gui.main_window import MainWindow
+except ImportError:
+    main_window = None
+
+def test_selection_request_ignored_after_cancel():
+    """Test that a queued selection request does not open a dialog once the batch is cancelled"""
+    if main_window is None:
+        print("- PyQt6 not installed, skipping")
+        return
+    
+    worker = SimpleNamespace(cancelled=threading.Event(), set_user_selection=mock.Mock())
+    worker.cancelled.set()
+    window = SimpleNamespace(worker_thread=worker)
+    with mock.patch.object(main_window, 'LyricsSelectionDialog') as dialog:
+        MainWindow.on_user_selection_needed(window, 'song.mp3', [{'source': 'A'}])
+    dialog.assert_not_called()
+    worker.set_user_selection.assert_not_called()
+    print("✓ cancelled selection request test passed")
+
+def test_watched_files_metadata_loaded_by_path():
+    """Test that a loader given a file list skips the scan and its rows fill in the matching table rows"""
+    if main_window is None:
+        print("- PyQt6 not installed, skipping")
+        return
+    
+    class StubIndex:
+        def scan(self, folder):
+            raise AssertionError("a file list must not be rescanned")
+        def load_metadata(self, music_files):
+            return {f: {'artist': 'Artist', 'title': os.path.basename(f)} for f in music_files if 'untagged' not in f}
+    
+    watched = ['/music/new.mp3', '/music/untagged.mp3', '/music/other.mp3']
+    loader = main_window.MetadataLoaderThread(None, StubIndex(), watched)
+    batches = []
+    loader.metadata_loaded.connect(batches.append)
+    loader.run()
+    assert batches == [[(0, 'Artist - new.mp3'), (2, 'Artist - other.mp3')]]
+    
+    # The table holds other files too, so rows are matched by path rather than position
+    model = mock.Mock()
+    MainWindow.on_watched_metadata_loaded(SimpleNamespace(results_model=model), watched, batches[0])
+    assert model.set_info_for.call_args_list == [
+        mock.call('/music/new.mp3', 'Artist - new.mp3'), mock.call('/music/other.mp3', 'Artist - other.mp3')]
+    print("✓ watched files metadata test passed")
+
+if __name__ == '__main__':
+    test_selection_request_ignored_after_cancel()
+    test_watched_files_metadata_loaded_by_path()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,83 @@
+"""
+Tests for metadata_analysis module: one parse gives metadata and issues
+"""
+
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import metadata_analysis
+from core.metadata_analysis import analyze_file, analyze_batch, format_issues, ISSUES_OK
+from core.music_processor import MusicProcessor
+from tests.test_tag_reader import _write_id3, _write_flac, _write_wav
+
+def test_clean_tags_match_extract_metadata():
+    """Test that clean files have no issues and the same metadata as extract_metadata"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mp3 = os.path.join(tmpdir, 'a.mp3')
+        flac = os.path.join(tmpdir, 'b.flac')
+        wav = os.path.join(tmpdir, 'c.wav')
+        _write_id3(mp3, 4, 3, '周杰伦', '晴天')
+        _write_flac(flac, 'Flac Artist', 'Flac Title')
+        _write_wav(wav, 'Wav Artist', 'Wav Title')
+
+        for path in (mp3, flac, wav):
+            result = analyze_file(path)
+            assert result['issues'] == [], result['issues']
+            assert format_issues(result['issues']) == ISSUES_OK
+            assert result['metadata'] == MusicProcessor.extract_metadata(path)
+            assert result['error'] is None
+        assert analyze_file(mp3)['artist'] == '周杰伦'
+        assert 'TPE1' in analyze_file(mp3)['raw_data']
+    print("✓ clean tags test passed")
+
+def test_issue_rules():
+    """Test missing tags, stray whitespace, null and control characters"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'bad.mp3')
+        _write_id3(path, 4, 3, ['Artist', 'Guest'], ' Title\x01 ')
+        result = analyze_file(path)
+        assert result['issues'] == ['艺术家包含空字符', "包含不可见字符: '\\x01'", '歌曲名有多余空格']
+        assert result['metadata'] == {'artist': 'ArtistGuest', 'title': 'Title\x01', 'format': 'mp3'}
+
+        untagged = os.path.join(tmpdir, 'untagged.mp3')
+        with open(untagged, 'wb') as f:
+            f.write(b'\xff\xfb\x90\x00' * 64)
+        result = analyze_file(untagged)
+        assert result['issues'] == ['没有元数据标签']
+        assert result['metadata'] is None
+
+        broken = os.path.join(tmpdir, 'broken.flac')
+        with open(broken, 'wb') as f:
+            f.write(b'not a flac file')
+        result = analyze_file(broken)
+        assert result['error'] and result['issues'][0].startswith('分析错误')
+    print("✓ issue rules test passed")
+
+def test_single_parse_and_batch():
+    """Test that each file is parsed once and batches keep input order"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for i in range(12):
+            path = os.path.join(tmpdir, f'{i:02d}.flac')
+            _write_flac(path, f'Artist {i}', f'Title {i}')
+            paths.append(path)
+
+        with mock.patch.object(metadata_analysis, 'read_tags', wraps=metadata_analysis.read_tags) as read:
+            results = list(analyze_batch(iter(paths), max_workers=3))
+        assert read.call_count == len(paths)
+        assert [r['file'] for r in results] == paths
+        assert [r['metadata']['title'] for r in results] == [f'Title {i}' for i in range(12)]
+
+        unordered = analyze_batch(paths, ordered=False, max_workers=3)
+        assert sorted(r['file'] for r in unordered) == paths
+    print("✓ single parse and batch test passed")
+
+if __name__ == '__main__':
+    test_clean_tags_match_extract_metadata()
+    test_issue_rules()
+    test_single_parse_and_batch()
+    print("\n✅ All tests passed!")
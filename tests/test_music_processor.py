@@ -8,7 +8,7 @@ import tempfile
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.music_processor import MusicProcessor, SUPPORTED_FORMATS
+from core.music_processor import MusicProcessor, SUPPORTED_FORMATS, ORDER_NATIVE
 
 def test_supported_formats():
     """Test that supported formats are correctly defined"""
@@ -33,6 +33,33 @@ def test_get_music_files():
         assert any('song2.flac' in f for f in files)
         print("✓ get_music_files test passed")
 
+def test_iter_music_files():
+    """Test the streaming walker: recursion, ordering and parallel listing"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for sub in ('a', 'b', os.path.join('b', 'c')):
+            os.makedirs(os.path.join(tmpdir, sub), exist_ok=True)
+        for name in ('z.mp3', os.path.join('a', 'x.FLAC'), os.path.join('b', 'y.wav'),
+                     os.path.join('b', 'c', 'w.mp3'), os.path.join('b', 'notes.txt')):
+            open(os.path.join(tmpdir, name), 'w').close()
+        os.makedirs(os.path.join(tmpdir, 'fake.mp3'))
+        
+        walked = list(MusicProcessor.iter_music_files(tmpdir))
+        assert [os.path.relpath(f, tmpdir) for f in walked] == [
+            'z.mp3', os.path.join('a', 'x.FLAC'), os.path.join('b', 'y.wav'), os.path.join('b', 'c', 'w.mp3')]
+        
+        assert list(MusicProcessor.iter_music_files(tmpdir, recursive=False)) == [os.path.join(tmpdir, 'z.mp3')]
+        
+        parallel = MusicProcessor.iter_music_files(tmpdir, order=ORDER_NATIVE, max_workers=4)
+        assert sorted(parallel) == sorted(walked)
+        
+        reverse = lambda entries: sorted(entries, key=lambda e: e.name, reverse=True)
+        reversed_walk = list(MusicProcessor.iter_music_files(tmpdir, order=reverse))
+        assert [os.path.basename(f) for f in reversed_walk] == ['z.mp3', 'y.wav', 'w.mp3', 'x.FLAC']
+        
+        assert MusicProcessor.get_music_files(tmpdir) == sorted(walked)
+        assert list(MusicProcessor.iter_music_files(os.path.join(tmpdir, 'missing'))) == []
+    print("✓ iter_music_files test passed")
+
 def test_get_lrc_path():
     """Test LRC path generation"""
     music_file = "/path/to/song.mp3"
@@ -51,9 +78,45 @@ def test_extract_metadata_from_filename():
     assert metadata['title'] == 'Song Title'
     print("✓ extract_metadata_from_filename test passed")
 
+def _write_tagged_mp3(path, artist, title):
+    from mutagen.id3 import ID3, TPE1, TIT2
+    with open(path, 'wb') as f:
+        f.write(b'\xff\xfb\x90\x00' * 64)
+    tags = ID3()
+    tags.add(TPE1(encoding=3, text=artist))
+    tags.add(TIT2(encoding=3, text=title))
+    tags.save(path)
+
+def test_extract_metadata_batch():
+    """Test batch extraction: ordering, per-file errors and process pools"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = []
+        for i in range(12):
+            path = os.path.join(tmpdir, f'song{i}.mp3')
+            _write_tagged_mp3(path, f'Artist {i}', f'Title {i}')
+            files.append(path)
+        missing = os.path.join(tmpdir, 'missing.mp3')
+        files.insert(5, missing)
+        
+        results = list(MusicProcessor.extract_metadata_batch(files, max_workers=2))
+        assert [r[0] for r in results] == files
+        
+        by_path = {path: (metadata, error) for path, metadata, error in results}
+        assert by_path[missing][0] is None and by_path[missing][1]
+        assert by_path[files[0]] == ({'artist': 'Artist 0', 'title': 'Title 0', 'format': 'mp3'}, None)
+        
+        unordered = list(MusicProcessor.extract_metadata_batch(iter(files), ordered=False, max_workers=3))
+        assert sorted(r[0] for r in unordered) == sorted(files)
+        
+        in_processes = list(MusicProcessor.extract_metadata_batch(files[:4], max_workers=2, use_processes=True))
+        assert [r[1]['title'] for r in in_processes] == ['Title 0', 'Title 1', 'Title 2', 'Title 3']
+    print("✓ extract_metadata_batch test passed")
+
 if __name__ == '__main__':
     test_supported_formats()
     test_get_music_files()
+    test_iter_music_files()
     test_get_lrc_path()
     test_extract_metadata_from_filename()
+    test_extract_metadata_batch()
     print("\n✅ All tests passed!")
@@ -0,0 +1,62 @@
+"""
+Tests for prefetch module
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prefetch import CandidatePrefetcher
+
+def test_prefetch_hides_latency():
+    """Test upcoming keys are fetched in the background and taken without waiting"""
+    fetched = []
+    lock = threading.Lock()
+    
+    def fetch(key):
+        time.sleep(0.2)
+        with lock:
+            fetched.append(key)
+        return [{'full_lyrics': key}]
+    
+    prefetcher = CandidatePrefetcher(fetch, lookahead=2, max_workers=2)
+    keys = ['a', 'b', 'c', 'd']
+    prefetcher.schedule(keys[1:])
+    time.sleep(0.4)
+    assert sorted(fetched) == ['b', 'c']
+    
+    start = time.monotonic()
+    assert prefetcher.take('b') == [{'full_lyrics': 'b'}]
+    assert time.monotonic() - start < 0.1
+    assert prefetcher.held_size() == 1
+    
+    assert prefetcher.take('a') == [{'full_lyrics': 'a'}]
+    assert prefetcher.hits == 1
+    prefetcher.close()
+    print("✓ Prefetch latency test passed")
+
+def test_prefetch_memory_budget():
+    """Test scheduling pauses while finished results exceed the budget"""
+    prefetcher = CandidatePrefetcher(lambda key: [{'full_lyrics': 'x' * 100}], lookahead=5, memory_budget=150)
+    prefetcher.schedule(['a'])
+    prefetcher.take('a')
+    prefetcher.schedule(['b', 'c'])
+    time.sleep(0.2)
+    prefetcher.schedule(['b', 'c', 'd', 'e'])
+    time.sleep(0.2)
+    assert prefetcher.held_size() == 200
+    assert 'd' not in prefetcher._futures and 'e' not in prefetcher._futures
+    
+    prefetcher.take('b')
+    prefetcher.take('c')
+    assert prefetcher.held_size() == 0
+    prefetcher.close()
+    print("✓ Prefetch memory budget test passed")
+
+if __name__ == '__main__':
+    test_prefetch_hides_latency()
+    test_prefetch_memory_budget()
+    print("\n✅ All tests passed!")
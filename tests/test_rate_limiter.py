@@ -0,0 +1,75 @@
+"""
+Tests for rate_limiter module
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from core.lrc_sources import NetEaseSource
+from core.rate_limiter import TokenBucket, HostRateLimiter, parse_rate_spec
+
+def test_token_bucket_burst_then_paced():
+    """Test that a bucket allows its burst at once and then paces at its rate"""
+    bucket = TokenBucket(rate=20.0, capacity=3)
+    
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    delays = [bucket.reserve() for _ in range(2)]
+    assert abs(delays[0] - 0.05) < 0.01
+    assert abs(delays[1] - 0.10) < 0.01
+    print("✓ token bucket test passed")
+
+def test_hosts_are_limited_independently():
+    """Test that exhausting one host does not slow down another"""
+    limiter = HostRateLimiter(rates={'a.example.com': (1.0, 1), 'b.example.com': (1.0, 1)})
+    
+    assert limiter.reserve('https://a.example.com/x') == 0.0
+    assert limiter.reserve('https://a.example.com/y') > 0.5
+    assert limiter.reserve('https://B.example.com/x') == 0.0
+    
+    start = time.monotonic()
+    limiter.set_rate('a.example.com', 100.0, 5)
+    limiter.acquire('https://a.example.com/z')
+    assert time.monotonic() - start < 0.1
+    print("✓ per-host limiter test passed")
+
+def test_parse_rate_spec():
+    """Test parsing of LRC_RATE_LIMITS style specs"""
+    rates = parse_rate_spec('music.163.com=5/10, C.Y.QQ.com=2')
+    assert rates == {'music.163.com': (5.0, 10.0), 'c.y.qq.com': (2.0, 2.0)}
+    print("✓ parse_rate_spec test passed")
+
+def test_ssl_fallback_takes_its_own_token():
+    """Test that the verify=False retry after an SSL error is rate limited too"""
+    class CountingLimiter:
+        acquired = 0
+        def acquire(self, url):
+            self.acquired += 1
+            return 0.0
+    
+    class FlakySession(requests.Session):
+        def request(self, method, url, **kwargs):
+            if kwargs.get('verify') is not False:
+                raise requests.exceptions.SSLError("bad certificate")
+            response = requests.Response()
+            response.status_code = 200
+            return response
+    
+    limiter = CountingLimiter()
+    source = NetEaseSource(use_cache=False, rate_limiter=limiter)
+    source.session = FlakySession()
+    
+    assert source._send_request('GET', 'https://music.163.com/api/song/lyric').status_code == 200
+    assert limiter.acquired == 2
+    print("✓ SSL fallback rate limit test passed")
+
+if __name__ == '__main__':
+    test_token_bucket_burst_then_paced()
+    test_hosts_are_limited_independently()
+    test_parse_rate_spec()
+    test_ssl_fallback_takes_its_own_token()
+    print("\n✅ All tests passed!")
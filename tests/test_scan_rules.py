@@ -0,0 +1,74 @@
+"""
+Tests for scan_rules module and rule-based library walking
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.music_processor import MusicProcessor
+from core.scan_rules import ScanRules
+
+def _touch(root, *parts):
+    path = os.path.join(root, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+    return path
+
+def test_pattern_matching():
+    """Test glob and regex patterns on names"""
+    rules = ScanRules(include=['*.flac', 're:^live'], exclude=['._*', 're:demo'])
+    assert rules.allows_file('Song.FLAC')
+    assert rules.allows_file('live at home.mp3')
+    assert not rules.allows_file('song.mp3')
+    assert not rules.allows_file('._Song.flac')
+    assert not rules.allows_file('Song (Demo).flac')
+    
+    assert not rules.allows_dir('.Trashes', 1)
+    assert not rules.allows_dir('@eaDir', 1)
+    assert not rules.allows_dir('$RECYCLE.BIN', 1)
+    assert rules.allows_dir('Albums', 1)
+    assert not ScanRules(max_depth=1).allows_dir('Albums', 2)
+    assert ScanRules.unfiltered().allows_dir('.hidden', 5)
+    print("✓ Pattern matching test passed")
+
+def test_walk_prunes_excluded_dirs():
+    """Test that excluded subtrees are skipped during the walk"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        kept = _touch(tmpdir, 'Artist', 'Album', 'song.mp3')
+        _touch(tmpdir, 'Artist', '._song.mp3')
+        _touch(tmpdir, '@eaDir', 'song.mp3', 'SYNOFILE_THUMB.mp3')
+        _touch(tmpdir, '.Trash-1000', 'files', 'old.mp3')
+        _touch(tmpdir, '#recycle', 'old.flac')
+        deep = _touch(tmpdir, 'a', 'b', 'c', 'deep.wav')
+        
+        assert MusicProcessor.get_music_files(tmpdir) == sorted([kept, deep])
+        assert list(MusicProcessor.iter_music_files(tmpdir, rules=ScanRules(max_depth=2))) == [kept]
+        assert len(MusicProcessor.get_music_files(tmpdir, rules=ScanRules.unfiltered())) == 6
+        
+        parallel = MusicProcessor.iter_music_files(tmpdir, max_workers=3)
+        assert sorted(parallel) == sorted([kept, deep])
+    print("✓ Directory pruning test passed")
+
+def test_follow_symlinks():
+    """Test symlinked directories are entered once when followed and never loop"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        real = _touch(tmpdir, 'music', 'song.mp3')
+        os.symlink(os.path.join(tmpdir, 'music'), os.path.join(tmpdir, 'link'))
+        os.symlink(tmpdir, os.path.join(tmpdir, 'music', 'loop'))
+        
+        assert MusicProcessor.get_music_files(tmpdir) == [real]
+        
+        followed = MusicProcessor.get_music_files(tmpdir, rules=ScanRules(follow_symlinks=True))
+        assert len(followed) == 1
+        parallel = list(MusicProcessor.iter_music_files(tmpdir, max_workers=2, rules=ScanRules(follow_symlinks=True)))
+        assert len(parallel) == 1
+    print("✓ Symlink policy test passed")
+
+if __name__ == '__main__':
+    test_pattern_matching()
+    test_walk_prunes_excluded_dirs()
+    test_follow_symlinks()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,64 @@
+"""
+Tests for per-source request stats and the timed source comparison (offline)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cli_show_all_sources import query_source
+from core.http_cache import ResponseCache
+from core.lrc_sources import NetEaseSource
+from tests.test_async_engine import make_response
+
+class CannedNetEase(NetEaseSource):
+    """NetEase source whose network layer returns canned responses"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = []
+
+    def _send_request(self, method, url, **kwargs):
+        self.sent.append(url)
+        if 'search' in url:
+            return make_response({'result': {'songs': [
+                {'name': 'Song', 'id': 1, 'artists': [{'name': 'Artist'}]},
+                {'name': 'Song (Live)', 'id': 2, 'artists': [{'name': 'Artist'}]},
+            ]}})
+        if kwargs.get('params', {}).get('id') == 2:
+            return None
+        return make_response({'lrc': {'lyric': '[00:00.00]song'}})
+
+def test_query_source_reports_requests_and_bytes():
+    """Test that search and lyric requests are counted and timed separately"""
+    source = CannedNetEase(use_cache=False)
+    report = query_source(source, 'Artist', 'Song')
+
+    assert report['source'] == 'NetEase' and report['error'] is None
+    assert report['hits'] == 2 and len(report['candidates']) == 1
+    assert report['search']['requests'] == 1 and report['search']['bytes'] > 0
+    assert report['fetch']['requests'] == 2 and report['fetch']['failures'] == 1
+    assert report['search_time'] >= 0 and report['fetch_time'] >= 0
+    assert source.stats.snapshot()['requests'] == 3
+    print("✓ query_source stats test passed")
+
+def test_cache_hits_are_not_network_requests():
+    """Test that responses served from the cache count as cache hits only"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = ResponseCache(os.path.join(tmpdir, 'cache.sqlite3'))
+        query_source(CannedNetEase(response_cache=cache), 'Artist', 'Song')
+
+        source = CannedNetEase(response_cache=cache)
+        report = query_source(source, 'Artist', 'Song')
+        assert report['search'] == {'requests': 0, 'failures': 0, 'cache_hits': 1, 'bytes': 0}
+        # The failed lyric request was never cached, so it goes out again
+        assert report['fetch']['cache_hits'] == 1 and report['fetch']['requests'] == 1
+        assert len(source.sent) == 1
+    print("✓ cache hit stats test passed")
+
+if __name__ == '__main__':
+    test_query_source_reports_requests_and_bytes()
+    test_cache_hits_are_not_network_requests()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,101 @@
+"""
+Tests for tag_reader module: the fast path must agree with mutagen
+"""
+
+import os
+import struct
+import sys
+import tempfile
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutagen.flac import FLAC
+from mutagen.id3 import ID3, TPE1, TIT2, APIC
+from mutagen.wave import WAVE
+
+from core.music_processor import MusicProcessor
+from core.tag_reader import read_tag_fields
+
+def _write_id3(path, version, encoding, artist, title):
+    with open(path, 'wb') as f:
+        # Some fake MPEG audio after the tag
+        f.write(b'\xff\xfb\x90\x00' * 64)
+    tags = ID3()
+    tags.add(APIC(encoding=3, mime='image/png', type=3, desc='cover', data=b'\x89PNG' * 5000))
+    tags.add(TPE1(encoding=encoding, text=artist))
+    tags.add(TIT2(encoding=encoding, text=title))
+    tags.save(path, v2_version=version)
+
+def _write_flac(path, artist, title):
+    # 44.1 kHz, stereo, 16 bit, no samples
+    packed = (44100 << 44) | (1 << 41) | (15 << 36)
+    streaminfo = struct.pack('>HH', 4096, 4096) + b'\x00' * 6 + struct.pack('>Q', packed) + b'\x00' * 16
+    with open(path, 'wb') as f:
+        f.write(b'fLaC' + bytes([0x80]) + len(streaminfo).to_bytes(3, 'big') + streaminfo)
+    audio = FLAC(path)
+    audio['artist'] = artist
+    audio['title'] = title
+    audio.save()
+
+def _write_wav(path, artist, title):
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(b'\x00\x00' * 800)
+    audio = WAVE(path)
+    audio.add_tags()
+    audio.tags.add(TPE1(encoding=3, text=artist))
+    audio.tags.add(TIT2(encoding=3, text=title))
+    audio.save()
+
+def test_id3_matches_mutagen():
+    """Test every ID3 version and text encoding against mutagen"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'song.mp3')
+        for version in (3, 4):
+            for encoding in (0, 1, 2, 3):
+                if version == 3 and encoding in (2, 3):
+                    continue  # not valid in v2.3; mutagen would convert them
+                artist = ['Artist'] if encoding == 0 else ['周杰伦', 'Lara']
+                _write_id3(path, version, encoding, artist, ['Title'])
+                
+                fields = read_tag_fields(path)
+                tags = ID3(path)
+                assert fields['artist'] == str(tags['TPE1']), (version, encoding, fields)
+                assert fields['title'] == str(tags['TIT2'])
+    print("✓ ID3 fast path test passed")
+
+def test_flac_and_wav_match_extract_metadata():
+    """Test that FLAC and WAV tags are read from the tag region only"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        flac_path = os.path.join(tmpdir, 'song.flac')
+        _write_flac(flac_path, ['青花瓷 Artist', 'Second'], 'Title\x00')
+        assert read_tag_fields(flac_path) == {'artist': '青花瓷 Artist', 'title': 'Title\x00'}
+        assert MusicProcessor.extract_metadata(flac_path) == {
+            'artist': '青花瓷 Artist', 'title': 'Title', 'format': 'flac'
+        }
+        
+        wav_path = os.path.join(tmpdir, 'song.wav')
+        _write_wav(wav_path, 'Wav Artist', 'Wav Title')
+        assert MusicProcessor.extract_metadata(wav_path) == {
+            'artist': 'Wav Artist', 'title': 'Wav Title', 'format': 'wav'
+        }
+    print("✓ FLAC/WAV fast path test passed")
+
+def test_untagged_file_returns_none():
+    """Test that a file without tags yields no metadata instead of an error"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'untagged.mp3')
+        with open(path, 'wb') as f:
+            f.write(b'\xff\xfb\x90\x00' * 64)
+        assert read_tag_fields(path) == {}
+        assert MusicProcessor.extract_metadata(path) is None
+    print("✓ untagged file test passed")
+
+if __name__ == '__main__':
+    test_id3_matches_mutagen()
+    test_flac_and_wav_match_extract_metadata()
+    test_untagged_file_returns_none()
+    print("\n✅ All tests passed!")